@@ -2,3 +2,7 @@ import os
 
 # Suppress Tensorflow warnings
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+# directory of the image classifiers, it's available without importing TensorFlow
+CLASSIFIERS_DIR = os.path.abspath(
+    os.path.join(__file__, os.pardir, 'classifiers'))
@@ -0,0 +1,100 @@
+import time
+import queue
+import threading
+
+from concurrent.futures import Future
+
+from profilescout.common.constants import ConstantsNamespace
+from profilescout.common.interfaces import ImageProfileClassifier
+
+
+constants = ConstantsNamespace
+
+
+class BatchingClassifier(ImageProfileClassifier):
+    '''
+    Collects images from all crawling threads and classifies them in batches with the wrapped classifier,
+    which must implement predict_batch(images). The batch is classified once it has max_batch_size images or
+    max_latency seconds after its first image is received, whichever comes first
+    '''
+
+    def __init__(
+        self,
+        classifier,
+        max_batch_size=constants.CLASSIFIER_BATCH_SIZE,
+        max_latency=constants.CLASSIFIER_MAX_LATENCY,
+        clock=time.monotonic
+    ):
+        assert max_batch_size > 0, 'batch size must be greater then 0'
+        self.classifier = classifier
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.batch_count = 0
+        self._clock = clock
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _next_batch(self):
+        item = self._queue.get()
+        if item is None:
+            return None
+        batch = [item]
+        deadline = self._clock() + self.max_latency
+        while len(batch) < self.max_batch_size:
+            try:
+                item = self._queue.get(timeout=max(0, deadline - self._clock()))
+            except queue.Empty:
+                break
+            if item is None:
+                # classify what is collected, then stop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            images, futures = zip(*batch)
+            self.batch_count += 1
+            try:
+                predictions = self.classifier.predict_batch(list(images))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future, prediction in zip(futures, predictions):
+                future.set_result(prediction)
+
+    @property
+    def input_size(self):
+        return getattr(self.classifier, 'input_size', None)
+
+    def submit(self, image):
+        '''queues the image for classification and returns future of the prediction'''
+        assert not self._closed, 'classifier is closed'
+        future = Future()
+        self._queue.put((image, future))
+        return future
+
+    def preprocess(self, image, **kwargs):
+        return self.classifier.preprocess(image, **kwargs)
+
+    def predict_batch(self, images):
+        return [future.result() for future in [self.submit(image) for image in images]]
+
+    def predict(self, image, width=None, height=None, channels=3, verbose=0, **kwargs):
+        '''blocks until the batch with the image is classified'''
+        return self.submit(image).result()
+
+    def close(self):
+        '''classifies the queued images and stops the thread'''
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
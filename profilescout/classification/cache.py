@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from collections import OrderedDict
+from PIL import Image
+
+from profilescout.common.constants import ConstantsNamespace
+from profilescout.common.interfaces import ImageProfileClassifier
+
+
+constants = ConstantsNamespace
+
+
+def dhash(image, hash_size=constants.PREDICTION_CACHE_HASH_SIZE):
+    '''
+    Difference hash of the image (PIL image or array) as an integer of hash_size * hash_size bits.
+    Each bit tells whether the pixel is brighter than its right neighbour in the downscaled grayscale image
+    '''
+    if not isinstance(image, Image.Image):
+        image = Image.fromarray(np.squeeze(np.asarray(image, dtype=np.uint8)))
+    pixels = np.asarray(image.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(''.join('1' if bit else '0' for bit in bits), 2)
+
+
+def hamming_distance(first_hash, second_hash):
+    return bin(first_hash ^ second_hash).count('1')
+
+
+class CachingClassifier(ImageProfileClassifier):
+    '''
+    Reuses predictions of the wrapped classifier for screenshots that look the same, which is common for
+    profile pages of the same website, since they share a template. Screenshots are compared by their
+    difference hashes and the hashes that differ in at most 'tolerance' bits are considered the same.
+    Least recently used predictions are evicted once there are more than max_size of them.
+    If path is provided, predictions are loaded from it and saved to it when the classifier is closed
+    '''
+
+    def __init__(
+        self,
+        classifier,
+        max_size=constants.PREDICTION_CACHE_SIZE,
+        tolerance=constants.PREDICTION_CACHE_TOLERANCE,
+        path=None
+    ):
+        assert max_size > 0, 'cache size must be greater then 0'
+        self.classifier = classifier
+        self.max_size = max_size
+        self.tolerance = tolerance
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._predictions = OrderedDict()
+        self._lock = threading.Lock()
+        if path is not None and os.path.isfile(path):
+            self.load(path)
+
+    @property
+    def input_size(self):
+        return getattr(self.classifier, 'input_size', None)
+
+    def _lookup(self, image_hash):
+        if image_hash in self._predictions:
+            return image_hash
+        if self.tolerance > 0:
+            for cached_hash in reversed(self._predictions):
+                if hamming_distance(image_hash, cached_hash) <= self.tolerance:
+                    return cached_hash
+        return None
+
+    def _store(self, image_hash, prediction):
+        self._predictions[image_hash] = prediction
+        self._predictions.move_to_end(image_hash)
+        while len(self._predictions) > self.max_size:
+            self._predictions.popitem(last=False)
+
+    def preprocess(self, image, **kwargs):
+        return self.classifier.preprocess(image, **kwargs)
+
+    def predict(self, image, width=None, height=None, channels=3, verbose=0, **kwargs):
+        image_hash = dhash(image)
+        with self._lock:
+            cached_hash = self._lookup(image_hash)
+            if cached_hash is not None:
+                self.hits += 1
+                self._predictions.move_to_end(cached_hash)
+                return self._predictions[cached_hash]
+            self.misses += 1
+        # model is not called while the lock is held, so other threads can use the cache meanwhile
+        prediction = bool(self.classifier.predict(image, width, height, channels=channels, verbose=verbose, **kwargs))
+        with self._lock:
+            self._store(image_hash, prediction)
+        return prediction
+
+    def load(self, path):
+        '''adds predictions from the file created with save'''
+        try:
+            with open(path, 'r') as f:
+                predictions = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f'WARN: Failed to load predictions from {path!r} (reason: {e!r})')
+            return
+        with self._lock:
+            for image_hash, prediction in predictions:
+                self._store(int(image_hash, 16), prediction)
+
+    def save(self, path=None):
+        '''saves the predictions from the least to the most recently used'''
+        path = path if path is not None else self.path
+        with self._lock:
+            predictions = [[f'{image_hash:x}', prediction] for image_hash, prediction in self._predictions.items()]
+        try:
+            with open(path, 'w') as f:
+                json.dump(predictions, f)
+        except OSError as e:
+            print(f'WARN: Failed to save predictions to {path!r} (reason: {e!r})')
+
+    def close(self):
+        if self.path is not None:
+            self.save()
@@ -1,49 +1,97 @@
-import os
+import threading
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras.models import load_model
 
+from profilescout.classification import CLASSIFIERS_DIR  # noqa: F401
 from profilescout.common.constants import ConstantsNamespace
 from profilescout.common.interfaces import ImageProfileClassifier
 
 constants = ConstantsNamespace
 
-CLASSIFIERS_DIR = os.path.abspath(
-    os.path.join(__file__, os.pardir, 'classifiers'))
-
 
 class ScoobyDemoClassifier(ImageProfileClassifier):
-    def __init__(self, path):
+    # width and height of the images that are passed to the model
+    input_size = (360, 480)
+
+    def __init__(self, path, warmup=True):
         self._model = None
         self._path = path
         self._load_model(path)
+        self._compile()
+        # model is shared by the crawling threads
+        self._lock = threading.Lock()
+        if warmup:
+            self.warmup()
 
     def _load_model(self, path):
         if self._model is None:
             self._model = load_model(path)
         return self._model
 
+    def _compile(self):
+        '''
+        Preprocessing and inference are compiled to a single graph for each number of channels (RGB screenshots
+        and grayscale arrays), with the fixed input signature, so the graph is traced only once
+        '''
+        width, height = self.input_size
+
+        def infer(images):
+            return self._model(self.preprocess(images, width, height), training=False)
+
+        def predict(preprocessed_images):
+            return self._model(preprocessed_images, training=False)
+
+        self._infer = {
+            channels: tf.function(infer, input_signature=[tf.TensorSpec((None, None, None, channels), tf.uint8)])
+            for channels in [1, 3]}
+        self._predict = tf.function(predict, input_signature=[tf.TensorSpec((None, height, width, 1), tf.float32)])
+
+    def warmup(self):
+        '''traces the graphs and initializes the model, so it's not done while the first page is classified'''
+        width, height = self.input_size
+        with self._lock:
+            for channels, infer in self._infer.items():
+                infer(tf.zeros((1, height, width, channels), dtype=tf.uint8))
+            self._predict(tf.zeros((1, height, width, 1), dtype=tf.float32))
+
     def preprocess(self, image, resize_width=360, resize_height=480):
-        image = tf.image.rgb_to_grayscale(image)
+        if image.shape[-1] == 3:
+            image = tf.image.rgb_to_grayscale(image)
         resized = tf.image.resize(image, [resize_height, resize_width])
-        reshaped = tf.reshape(resized, (1, resize_height, resize_width, 1))
+        reshaped = tf.reshape(resized, (-1, resize_height, resize_width, 1))
         normalized = tf.divide(reshaped, 255.0)
         return normalized
 
-    def predict(self, image, width, height, channels=3, verbose=0):
-        array = np.array(image)
+    def _to_arrays(self, images):
+        # grayscale images are passed as 2D arrays
+        arrays = [np.array(image) for image in images]
+        return [array[..., np.newaxis] if array.ndim == 2 else array for array in arrays]
 
-        # Ensure the array has 3 channels
-        array = array.reshape((1,) + array.shape)
+    def _preprocess_batch(self, arrays):
+        width, height = self.input_size
+        return tf.concat([
+            self.preprocess(tf.convert_to_tensor(array.reshape((1,) + array.shape), dtype=tf.uint8), width, height)
+            for array in arrays], axis=0)
 
-        tensor = tf.convert_to_tensor(array, dtype=tf.uint8)
-        preprocessed_image = self.preprocess(tensor)
-        is_profile_percetage = self._model(preprocessed_image, training=False)
+    def predict_probabilities(self, images):
+        '''probability of the positive class for each of the images, the model is run once for all images'''
+        arrays = self._to_arrays(images)
+        channels = arrays[0].shape[-1]
+        with self._lock:
+            if channels in self._infer and all(array.shape == arrays[0].shape for array in arrays):
+                # screenshots of the same resolution are preprocessed inside the compiled graph
+                is_profile_percetages = self._infer[channels](tf.convert_to_tensor(np.stack(arrays), dtype=tf.uint8))
+            else:
+                is_profile_percetages = self._predict(self._preprocess_batch(arrays))
 
-        if is_profile_percetage.shape == (1, 2):
-            is_profile_percetage = is_profile_percetage[0][1]
+        # probability of the positive class if the model returns probabilities of both classes
+        is_profile_percetages = np.array(is_profile_percetages)
+        return is_profile_percetages[:, -1] if is_profile_percetages.ndim == 2 else is_profile_percetages
 
-        if is_profile_percetage > constants.PREDICTION_THRESHOLD:
-            return True
+    def predict_batch(self, images):
+        '''returns whether each of the images is a profile page'''
+        return [bool(p > constants.PREDICTION_THRESHOLD) for p in self.predict_probabilities(images)]
 
-        return False
+    def predict(self, image, width, height, channels=3, verbose=0):
+        return self.predict_batch([image])[0]
@@ -0,0 +1,157 @@
+import os
+import sys
+import numpy as np
+
+from PIL import Image
+
+from profilescout.common.constants import ConstantsNamespace
+from profilescout.classification.lite import LiteClassifier, preprocess
+
+
+constants = ConstantsNamespace
+
+QUANTIZATIONS = ['none', 'float16', 'int8']
+
+# quantizations supported for each type of the converted model, the first one is the default
+MODEL_QUANTIZATIONS = {
+    '.tflite': ['float16', 'none', 'int8'],
+    '.onnx': ['none', 'int8']}
+
+IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.webp']
+
+
+def load_images(dir_path, limit=None):
+    '''RGB images (e.g. screenshots of the pages) from the directory, sorted by filename'''
+    filenames = sorted(f for f in os.listdir(dir_path) if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS)
+    images = []
+    for filename in filenames[:limit]:
+        with Image.open(os.path.join(dir_path, filename)) as image:
+            images.append(np.asarray(image.convert('RGB')))
+    return images
+
+
+def _representative_dataset(images):
+    def generate():
+        # preprocessing must be the same as the one used for the inference
+        for image in images:
+            yield [preprocess(image)]
+    return generate
+
+
+def to_tflite(model, output_path, quantization='float16', representative_images=None):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        assert representative_images, 'representative images are required for int8 quantization'
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = _representative_dataset(representative_images)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    with open(output_path, 'wb') as f:
+        f.write(converter.convert())
+
+
+def to_onnx(model, output_path, quantization='none'):
+    if quantization not in MODEL_QUANTIZATIONS['.onnx']:
+        raise ValueError(f'{quantization} quantization is not supported for ONNX models, use int8 or none')
+    import tensorflow as tf
+    import tf2onnx
+
+    width, height = LiteClassifier.input_size
+    input_signature = (tf.TensorSpec((None, height, width, 1), tf.float32, name='input'),)
+    tf2onnx.convert.from_keras(model, input_signature=input_signature, output_path=output_path)
+    if quantization == 'int8':
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(output_path, output_path, weight_type=QuantType.QInt8)
+
+
+def default_quantization(output_path):
+    '''default quantization for the type of the converted model, None if the type is not supported'''
+    quantizations = MODEL_QUANTIZATIONS.get(os.path.splitext(output_path)[1])
+    return quantizations[0] if quantizations is not None else None
+
+
+def convert(keras_path, output_path, quantization=None, representative_images=None):
+    '''
+    converts Keras model to TFLite or ONNX model, depending on the extension of the output path.
+    If quantization is None, the default one for the type of the model is used (see 'MODEL_QUANTIZATIONS')
+    '''
+    ext = os.path.splitext(output_path)[1]
+    if ext not in MODEL_QUANTIZATIONS:
+        raise ValueError(f'expected .tflite or .onnx output path, but recieved: {output_path!r}')
+    quantization = quantization if quantization is not None else default_quantization(output_path)
+    from tensorflow.keras.models import load_model
+
+    model = load_model(keras_path)
+    if ext == '.tflite':
+        to_tflite(model, output_path, quantization, representative_images)
+    else:
+        to_onnx(model, output_path, quantization)
+
+
+def check_parity(keras_path, converted_path, images, tolerance=constants.PARITY_TOLERANCE):
+    '''
+    Compares outputs of the converted model with the outputs of the Keras model for the images.
+    Returns max absolute difference of the probabilities, share of the equal predictions and
+    whether the difference is within tolerance
+    '''
+    from profilescout.classification.classifier import ScoobyDemoClassifier
+
+    expected = np.asarray(ScoobyDemoClassifier(keras_path).predict_probabilities(images), dtype=np.float32)
+    actual = np.asarray(LiteClassifier(converted_path).predict_probabilities(images), dtype=np.float32)
+    max_diff = float(np.max(np.abs(expected - actual)))
+    agreement = float(np.mean((expected > constants.PREDICTION_THRESHOLD) == (actual > constants.PREDICTION_THRESHOLD)))
+    return {'max_diff': max_diff, 'agreement': agreement, 'passed': max_diff <= tolerance}
+
+
+def cli():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Convert Keras image classifier to TFLite or ONNX model and check the parity of their outputs')
+    parser.add_argument('keras_path', help='Path to the Keras model (.h5)')
+    parser.add_argument('output_path', help='Path to the converted model, .tflite or .onnx')
+    parser.add_argument(
+        '-q', '--quantization',
+        help='Quantization of the model, int8 requires images (default: float16 for TFLite, none for ONNX)',
+        dest='quantization',
+        choices=QUANTIZATIONS)
+    parser.add_argument(
+        '-i', '--images',
+        help='Directory with screenshots used for int8 quantization and the parity check',
+        dest='images_dir')
+    parser.add_argument(
+        '-pt', '--parity-tolerance',
+        help='Max absolute difference of the probabilities for the parity check (default: %(default)s)',
+        dest='tolerance',
+        default=constants.PARITY_TOLERANCE, type=float)
+    args = parser.parse_args()
+
+    ext = os.path.splitext(args.output_path)[1]
+    if ext not in MODEL_QUANTIZATIONS:
+        parser.error(f'output path must end with .tflite or .onnx, but recieved: {args.output_path!r}')
+    if args.quantization is None:
+        args.quantization = default_quantization(args.output_path)
+    if args.quantization not in MODEL_QUANTIZATIONS[ext]:
+        parser.error(f'{args.quantization} quantization is not supported for {ext} models, '
+                     + f"use one of: {', '.join(MODEL_QUANTIZATIONS[ext])}")
+    images = load_images(args.images_dir) if args.images_dir is not None else None
+    if args.quantization == 'int8' and not images:
+        parser.error('images are required for int8 quantization')
+    convert(args.keras_path, args.output_path, args.quantization, images)
+    print(f'INFO: Model is converted to {args.output_path!r}')
+    if not images:
+        print('WARN: Parity is not checked, since images are not provided')
+        return
+    result = check_parity(args.keras_path, args.output_path, images, args.tolerance)
+    print(f"INFO: Max difference: {result['max_diff']:.4f}, same predictions: {result['agreement']:.2%}")
+    if not result['passed']:
+        print(f'ERROR: Outputs of the converted model differ more than {args.tolerance}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    cli()
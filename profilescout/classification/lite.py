@@ -0,0 +1,132 @@
+import os
+import threading
+import numpy as np
+
+from profilescout.common.constants import ConstantsNamespace
+from profilescout.common.interfaces import ImageProfileClassifier
+
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    Interpreter = None
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+
+constants = ConstantsNamespace
+
+# weights used by tf.image.rgb_to_grayscale
+_GRAYSCALE_WEIGHTS = np.array([0.2989, 0.5870, 0.1140], dtype=np.float32)
+
+
+def to_grayscale(array):
+    '''RGB or grayscale uint8 array to 2D float32 array'''
+    if array.ndim == 3 and array.shape[-1] == 3:
+        return array.astype(np.float32) @ _GRAYSCALE_WEIGHTS
+    return array.reshape(array.shape[:2]).astype(np.float32)
+
+
+def resize_bilinear(array, height, width):
+    '''resizes 2D array like tf.image.resize with the bilinear method (half pixel centers, without antialiasing)'''
+    in_height, in_width = array.shape
+    y = np.clip((np.arange(height) + 0.5) * in_height / height - 0.5, 0, in_height - 1)
+    x = np.clip((np.arange(width) + 0.5) * in_width / width - 0.5, 0, in_width - 1)
+    y0, x0 = np.floor(y).astype(int), np.floor(x).astype(int)
+    y1, x1 = np.minimum(y0 + 1, in_height - 1), np.minimum(x0 + 1, in_width - 1)
+    wy, wx = (y - y0)[:, np.newaxis], (x - x0)[np.newaxis, :]
+    top = array[y0][:, x0] * (1 - wx) + array[y0][:, x1] * wx
+    bottom = array[y1][:, x0] * (1 - wx) + array[y1][:, x1] * wx
+    return (top * (1 - wy) + bottom * wy).astype(np.float32)
+
+
+def preprocess(image, resize_width=360, resize_height=480):
+    '''NumPy version of ScoobyDemoClassifier.preprocess, returns batch with a single image'''
+    resized = resize_bilinear(to_grayscale(np.asarray(image)), resize_height, resize_width)
+    return (resized / 255.0).reshape((1, resize_height, resize_width, 1)).astype(np.float32)
+
+
+def _load_tflite_interpreter(path, num_threads):
+    interpreter_class = Interpreter
+    if interpreter_class is None:
+        # full TensorFlow is used only if the runtime is not installed
+        import tensorflow as tf
+        interpreter_class = tf.lite.Interpreter
+    return interpreter_class(model_path=path, num_threads=num_threads)
+
+
+class _TFLiteRunner:
+    def __init__(self, path, num_threads=None):
+        self._interpreter = _load_tflite_interpreter(path, num_threads)
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = None
+
+    def __call__(self, batch):
+        if self._batch_size != len(batch):
+            self._interpreter.resize_tensor_input(self._input['index'], batch.shape)
+            self._interpreter.allocate_tensors()
+            self._batch_size = len(batch)
+        # quantized models with integer input and output
+        scale, zero_point = self._input['quantization']
+        if self._input['dtype'] != np.float32 and scale:
+            batch = np.round(batch / scale + zero_point)
+        self._interpreter.set_tensor(self._input['index'], batch.astype(self._input['dtype']))
+        self._interpreter.invoke()
+        output = self._interpreter.get_tensor(self._output['index'])
+        scale, zero_point = self._output['quantization']
+        if self._output['dtype'] != np.float32 and scale:
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+
+class _OnnxRunner:
+    def __init__(self, path, num_threads=None):
+        assert onnxruntime is not None, 'onnxruntime is required for running ONNX models'
+        options = onnxruntime.SessionOptions()
+        if num_threads is not None:
+            options.intra_op_num_threads = num_threads
+        self._session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self._input_name = self._session.get_inputs()[0].name
+
+    def __call__(self, batch):
+        return self._session.run(None, {self._input_name: batch})[0]
+
+
+class LiteClassifier(ImageProfileClassifier):
+    '''
+    Runs the converted image classifier (see 'profilescout.classification.convert') with TFLite or ONNX Runtime,
+    depending on the extension of the model. Preprocessing is done with NumPy, so TensorFlow is not needed
+    '''
+
+    input_size = (360, 480)
+
+    def __init__(self, path, num_threads=None):
+        self._path = path
+        ext = os.path.splitext(path)[1]
+        if ext == '.tflite':
+            self._runner = _TFLiteRunner(path, num_threads)
+        elif ext == '.onnx':
+            self._runner = _OnnxRunner(path, num_threads)
+        else:
+            raise ValueError(f'expected .tflite or .onnx model, but recieved: {path!r}')
+        # interpreter is not thread-safe
+        self._lock = threading.Lock()
+
+    def preprocess(self, image, resize_width=360, resize_height=480):
+        return preprocess(image, resize_width, resize_height)
+
+    def predict_probabilities(self, images):
+        '''probability of the positive class for each of the images'''
+        batch = np.concatenate([self.preprocess(image) for image in images])
+        with self._lock:
+            probabilities = np.asarray(self._runner(batch))
+        return probabilities[:, -1] if probabilities.ndim == 2 else probabilities
+
+    def predict_batch(self, images):
+        return [bool(p > constants.PREDICTION_THRESHOLD) for p in self.predict_probabilities(images)]
+
+    def predict(self, image, width, height, channels=3, verbose=0):
+        return self.predict_batch([image])[0]
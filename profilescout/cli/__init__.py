@@ -2,17 +2,27 @@ import requests
 import os
 import sys
 import textwrap
+import functools
 from concurrent.futures import ThreadPoolExecutor, wait
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from profilescout.__about__ import __version__
 from profilescout.common.constants import ConstantsNamespace
+from profilescout.link.compact import VISITED_STORES
 from profilescout.link.utils import to_fqdn, to_base_url
 from profilescout.web.webpage import WebpageActionType, ScrapeOption
-from profilescout.web.crawl import CrawlOptions, crawl_website
-from profilescout.classification.classifier import CLASSIFIERS_DIR, ScoobyDemoClassifier
-from profilescout.extraction.htmlextract import get_resumes_from_dir
+from profilescout.web.crawl import CrawlOptions, crawl_website, crawl_websites
+from profilescout.web.executor import EXECUTORS, crawl_in_processes
+from profilescout.web.scheduler import PolitenessScheduler
+from profilescout.web.httpdriver import ENGINES, setup_driver
+from profilescout.web.retry import DEAD_HOST_ACTIONS
+from profilescout.web.webdriver import RESOURCE_TYPES, WebDriverPool
+from profilescout.web.readiness import READINESS_STRATEGIES
+from profilescout.web.screenshot import SCREENSHOT_FORMATS, is_format_supported
+from profilescout.classification import CLASSIFIERS_DIR
+from profilescout.classification.batching import BatchingClassifier
+from profilescout.common.registry import get_model
 
 
 constants = ConstantsNamespace
@@ -23,7 +33,9 @@ def generate_crawl_inputs(
         crawl_sleep, depth, max_pages, max_threads,
         include_fragment, bump_relevant, peserve_uri, use_buffer,
         action_type, scrape_option,
-        resolution, image_classifier):
+        resolution, image_classifier,
+        **extra_options):
+    '''extra_options are additional CrawlOptions fields that are same for every URL'''
     user_inputs = []
     crawl_inputs = []
     if urls_file_path is None:
@@ -42,10 +54,10 @@ def generate_crawl_inputs(
             parts = line.split(' ')
             if len(parts) == 1 and parts[0] != '':
                 read_url = parts[0]
-            elif len(parts) == 2:
-                read_depth, read_url = parts[0], parts[1]
-            elif len(parts) == 3:
-                read_depth, read_crawl_sleep, read_url = parts[0], parts[1], parts[2]
+            elif len(parts) == 2 and parts[0].isdigit():
+                read_depth, read_url = int(parts[0]), parts[1]
+            elif len(parts) == 3 and parts[0].isdigit() and parts[1].isdigit():
+                read_depth, read_crawl_sleep, read_url = int(parts[0]), int(parts[1]), parts[2]
             else:
                 print(f'WARN: {line=} is not in valid format. Ignored')
                 continue
@@ -72,7 +84,8 @@ def generate_crawl_inputs(
             bump_relevant=bump_relevant,
             use_buffer=use_buffer,
             scraping=scraping,
-            resolution=resolution)
+            resolution=resolution,
+            **extra_options)
         if not peserve_uri:
             read_url = to_base_url(read_url)
         crawl_inputs += [(
@@ -89,30 +102,116 @@ def main(url, urls_file_path, export_path, directory,
          crawl_sleep, depth, max_pages, max_threads,
          include_fragment, bump_relevant, peserve_uri, use_buffer,
          action_type, scrape_option,
-         resolution, image_classifier):
+         resolution, image_classifier,
+         sites_per_worker=1, host_rate=None,
+         driver_max_pages=constants.DRIVER_MAX_PAGES, driver_max_rss=None,
+         engine='browser', readiness='complete', page_load_timeout=constants.PAGE_LOAD_TIMEOUT,
+         executor='thread', workers=None, image_classifier_factory=None,
+         classifier_batch_size=constants.CLASSIFIER_BATCH_SIZE, driver_warmup=False,
+         **extra_options):
+    '''
+    image_classifier_factory is used instead of image_classifier if it's provided.
+    Returns results of the crawls'''
     # check if info extraction is chosen
     if directory is not None:
+        # NER model and its dependencies are loaded only for the extraction
+        from profilescout.extraction.htmlextract import get_resumes_from_dir
         if export_path == '':
             export_path = None
         resumes = get_resumes_from_dir(directory, export_path)
         print(resumes)
         return
+    if image_classifier_factory is not None and executor == 'thread':
+        image_classifier = image_classifier_factory()
+        if classifier_batch_size > 1 and max_threads > 1:
+            # screenshots from all threads are classified together
+            image_classifier = BatchingClassifier(image_classifier, classifier_batch_size)
     crawl_inputs = generate_crawl_inputs(
         url, urls_file_path, export_path,
         crawl_sleep, depth, max_pages, max_threads,
         include_fragment, bump_relevant, peserve_uri, use_buffer,
         action_type, scrape_option,
-        resolution, image_classifier)
-    # crawl each website in seperate thread
+        resolution, image_classifier,
+        engine=engine,
+        readiness=readiness,
+        page_load_timeout=page_load_timeout,
+        **extra_options)
+    # picklable, so it can be sent to worker processes
+    driver_factory = functools.partial(setup_driver, engine, readiness, page_load_timeout)
     print(f'INFO: PID: {os.getpid()!r}')
     print('INFO: Start submitting URls for crawling...')
-    with ThreadPoolExecutor(max_workers=max_threads) as executor:
-        # Submit each URL for crawling
-        futures = [executor.submit(crawl_website, *crawl_input) for crawl_input in crawl_inputs]
-        print('INFO: Waiting threads to complete...')
-        # Wait for all tasks to complete
-        wait(futures)
-        print('INFO: Threads have completed the crawling')
+    if executor == 'process':
+        # websites with the same host are crawled by the same process, which has its own browsers
+        results = crawl_in_processes(
+            crawl_inputs,
+            workers,
+            sites_per_worker,
+            host_rate,
+            driver_max_pages,
+            driver_max_rss,
+            driver_factory,
+            image_classifier_factory,
+            driver_warmup)
+        print('INFO: Worker processes have completed the crawling')
+    else:
+        try:
+            results = _crawl_in_threads(
+                crawl_inputs, max_threads, sites_per_worker, host_rate, driver_max_pages, driver_max_rss, driver_factory,
+                driver_warmup)
+        finally:
+            if isinstance(image_classifier, BatchingClassifier):
+                image_classifier.close()
+    _print_summary(results)
+    return results
+
+
+def _crawl_in_threads(
+        crawl_inputs, max_threads, sites_per_worker, host_rate, driver_max_pages, driver_max_rss, driver_factory,
+        driver_warmup=False):
+    results = []
+    # scheduler is shared, so delays between visits of the same host are respected across threads
+    scheduler = PolitenessScheduler(rate=host_rate)
+    # browsers are reused between websites instead of starting a new one for each website.
+    # Each crawled website uses one browser, so there are never more live browsers than the pool size
+    pool_size = max_threads * sites_per_worker
+    driver_pool = WebDriverPool(
+        pool_size,
+        driver_max_pages,
+        driver_max_rss,
+        factory=driver_factory,
+        prewarm=min(pool_size, len(crawl_inputs)) if driver_warmup else 0,
+        max_live=pool_size)
+    # crawl each website in seperate thread or interleave several websites in one thread
+    try:
+        with ThreadPoolExecutor(max_workers=max_threads) as executor:
+            # Submit each URL for crawling
+            if sites_per_worker > 1:
+                shards = [crawl_inputs[i:i+sites_per_worker] for i in range(0, len(crawl_inputs), sites_per_worker)]
+                futures = [executor.submit(crawl_websites, shard, scheduler, driver_pool) for shard in shards]
+            else:
+                futures = [
+                    executor.submit(crawl_website, *crawl_input, scheduler=scheduler, driver_pool=driver_pool)
+                    for crawl_input in crawl_inputs]
+            print('INFO: Waiting threads to complete...')
+            # Wait for all tasks to complete
+            wait(futures)
+            print('INFO: Threads have completed the crawling')
+    finally:
+        driver_pool.close()
+    for future in futures:
+        result = future.result()
+        results += result if sites_per_worker > 1 else [result]
+    return results
+
+
+def _print_summary(results):
+    failed = [result for result in results if not result['successful']]
+    for result in failed:
+        print(f"WARN: Crawling of {result['url']!r} has failed (reason: {result['error']})")
+    print(f'INFO: {len(results) - len(failed)}/{len(results)} websites are crawled successfully')
+    failed_writes = sum(result.get('failed_writes', 0) for result in results)
+    if failed_writes > 0:
+        print(f'WARN: {failed_writes} HTML file(s) and screenshot(s) could not be written, see the error logs')
 
 
 def cli():
@@ -173,6 +272,15 @@ def cli():
         help="Buffer errors and outputs until crawling of website is finished and then create logs",
         dest='use_buffer',
         action='store_const', const=True, default=False)
+    parser.add_argument(
+        '-bl', '--block',
+        help='''
+                Resource types which are not loaded by the browser. By default, images, fonts and stylesheets are
+                blocked if screenshots are not needed, while media and third-party scripts are always blocked.
+                If the option is used without values, nothing is blocked
+                ''',
+        dest='blocked_resources',
+        nargs='*', choices=RESOURCE_TYPES)
     parser.add_argument(
         '-br', '--bump-relevant',
         help="Bump relevant links to the top of the visiting queue (based on RELEVANT_WORDS list)",
@@ -185,19 +293,155 @@ def cli():
         default='./results')
     parser.add_argument(
         '-ic', '--image-classifier',
-        help="Image classifier to be used for identifying profile pages (default: %(default)s)",
+        help='''
+                Image classifier to be used for identifying profile pages. TFLite and ONNX classifiers
+                run the model converted with 'profilescout-convert' (default: %(default)s)
+                ''',
         dest='image_classifier',
-        choices=constants.IMAGE_CLASSIFIERS, default=constants.IMAGE_CLASSIFIERS[0])
+        choices=list(constants.IMAGE_CLASSIFIERS), default=list(constants.IMAGE_CLASSIFIERS)[0])
     parser.add_argument(
         '-cs', '--crawl-sleep',
-        help='Time to sleep between each page visit (default: %(default)s)',
+        help='Time to wait between two visits of the same host (default: %(default)s)',
         dest='crawl_sleep',
         default=2, type=int)
+    parser.add_argument(
+        '-sc', '--scaled-capture',
+        help='''
+                Capture screenshots for the classifier already scaled down to the input size of the model
+                by the browser, instead of capturing them at full resolution
+                ''',
+        dest='scaled_capture',
+        action='store_const', const=True, default=False)
+    parser.add_argument(
+        '-cbs', '--classifier-batch-size',
+        help='''
+                Max number of screenshots from different threads that are classified at once,
+                screenshots are classified one by one if 1 (default: %(default)s)
+                ''',
+        dest='classifier_batch_size',
+        default=constants.CLASSIFIER_BATCH_SIZE, type=int)
+    parser.add_argument(
+        '-pcs', '--prediction-cache-size',
+        help='''
+                Max number of predictions per website that are reused for screenshots that look the same,
+                e.g. profile pages with the same template. Cache is disabled if 0 (default: %(default)s),
+                since listing and profile pages with the same layout can look the same, e.g. 1024
+                ''',
+        dest='prediction_cache_size',
+        default=0, type=int)
+    parser.add_argument(
+        '-pct', '--prediction-cache-tolerance',
+        help='''
+                Max number of different bits between perceptual hashes of two screenshots,
+                for which the screenshots are considered the same (default: %(default)s)
+                ''',
+        dest='prediction_cache_tolerance',
+        default=constants.PREDICTION_CACHE_TOLERANCE, type=int)
+    parser.add_argument(
+        '-pcd', '--prediction-cache-dir',
+        help='Directory where cached predictions are stored per website, so they are reused in the next runs',
+        dest='prediction_cache_dir',
+        type=str)
+    parser.add_argument(
+        '-ug', '--url-gate',
+        help='''
+                Learn url templates of profile and other pages from the classifier results during the crawl
+                and decide pages of the learned templates by their url, without screenshots and classification
+                ''',
+        dest='url_gate',
+        action='store_const', const=True, default=False)
+    parser.add_argument(
+        '-ugc', '--url-gate-confidence',
+        help='''
+                Min share of the classifier results for a url template that must agree,
+                so the pages of the template are decided by url (default: %(default)s)
+                ''',
+        dest='url_gate_confidence',
+        default=constants.URL_GATE_CONFIDENCE, type=float)
+    parser.add_argument(
+        '-ugv', '--url-gate-verification-rate',
+        help='Share of the pages decided by url that are still classified for verification (default: %(default)s)',
+        dest='url_gate_verification_rate',
+        default=constants.URL_GATE_VERIFICATION_RATE, type=float)
+    parser.add_argument(
+        '-dmp', '--driver-max-pages',
+        help='Number of visited pages after which the browser is replaced with a new one (default: %(default)s)',
+        dest='driver_max_pages',
+        default=constants.DRIVER_MAX_PAGES, type=int)
+    parser.add_argument(
+        '-dw', '--driver-warmup',
+        help='Start the browsers before the crawling, so the first websites do not wait for the browser to start',
+        dest='driver_warmup',
+        action='store_const', const=True, default=False)
+    parser.add_argument(
+        '-dmr', '--driver-max-rss',
+        help='Memory limit in MB after which the browser is replaced with a new one. Requires psutil (default: unlimited)',
+        dest='driver_max_rss',
+        type=int)
+    parser.add_argument(
+        '-e', '--engine',
+        help='''
+                Engine used for fetching pages. 'hybrid' fetches pages over HTTP and uses the browser only
+                for pages that look script-rendered and for screenshots. Requires lxml (default: %(default)s)
+                ''',
+        dest='engine',
+        choices=ENGINES, default=ENGINES[0])
+    parser.add_argument(
+        '-rd', '--readiness',
+        help='''
+                When the loaded page is ready for extraction: 'complete' waits for the load event, 'dom' for
+                DOMContentLoaded, 'network-idle' waits until there are no network requests for a while and
+                'fixed' waits for a fixed time after DOMContentLoaded (default: %(default)s)
+                ''',
+        dest='readiness',
+        choices=READINESS_STRATEGIES, default=READINESS_STRATEGIES[0])
+    parser.add_argument(
+        '-plt', '--page-load-timeout',
+        help='Time in seconds for the page to load, the partially loaded page is used after it (default: %(default)s)',
+        dest='page_load_timeout',
+        default=constants.PAGE_LOAD_TIMEOUT, type=int)
+    parser.add_argument(
+        '-x', '--executor',
+        help='''
+                Run crawls of the websites in threads or in worker processes. Websites with the same host are
+                crawled by the same process and each process has its own browsers (default: %(default)s)
+                ''',
+        dest='executor',
+        choices=EXECUTORS, default=EXECUTORS[0])
+    parser.add_argument(
+        '-hr', '--host-rate',
+        help='Maximum number of page visits per second for each host (default: unlimited)',
+        dest='host_rate',
+        type=float)
+    parser.add_argument(
+        '-dh', '--dead-host',
+        help='''
+                What to do with the links of the host which is considered as down, drop them or defer them until
+                the host is checked again (default: %(default)s)
+                ''',
+        dest='dead_host_action',
+        choices=DEAD_HOST_ACTIONS, default=DEAD_HOST_ACTIONS[0])
+    parser.add_argument(
+        '-bt', '--breaker-threshold',
+        help='''
+                Number of consecutive failed visits after which the host is considered as down.
+                Set to 0 to never stop visiting the host (default: %(default)s)
+                ''',
+        dest='breaker_threshold',
+        default=constants.BREAKER_FAILURE_THRESHOLD, type=int)
     parser.add_argument(
         '-d', '--depth',
         help='Maximum crawl depth (default: %(default)s)',
         dest='depth',
         default=2, type=int)
+    parser.add_argument(
+        '-ci', '--checkpoint-interval',
+        help='''
+                Number of visited pages after which the crawl state is saved to the export directory of the website.
+                Set to 0 to disable checkpoints (default: %(default)s)
+                ''',
+        dest='checkpoint_interval',
+        default=constants.CHECKPOINT_INTERVAL, type=int)
     parser.add_argument(
         '-if', '--include-fragment',
         help="Consider links with URI Fragment (e.g. http://example.com/some#fragment) as seperate page",
@@ -221,6 +465,27 @@ def cli():
         help="Maximum number of threads to use if '-f'/'--file' is provided (default: %(default)s)",
         dest='max_threads',
         default=4, type=int)
+    parser.add_argument(
+        '-w', '--workers',
+        help="Number of worker processes if '-x'/'--executor' is 'process' (default: number of CPUs)",
+        dest='workers',
+        type=int)
+    parser.add_argument(
+        '-spw', '--sites-per-worker',
+        help='''
+                Number of websites crawled by each thread at the same time. Pages of the websites are interleaved,
+                so the thread visits other websites instead of sleeping between visits of the same host (default: %(default)s)
+                ''',
+        dest='sites_per_worker',
+        default=1, type=int)
+    parser.add_argument(
+        '-mr', '--max-retries',
+        help='''
+                Number of times the visit of the page is retried if it fails with a temporary error (e.g. timeout).
+                Delay before each retry is doubled (default: %(default)s)
+                ''',
+        dest='max_retries',
+        default=constants.MAX_RETRIES, type=int)
     parser.add_argument(
         '-mp', '--max-pages',
         help='''
@@ -234,6 +499,65 @@ def cli():
         help="Preserve whole URI (e.g. \'http://example.com/something/\' instead of  \'http://example.com/\')",
         dest='peserve_uri',
         action='store_const', const=True, default=False)
+    parser.add_argument(
+        '--resume',
+        help="Continue crawling from the last saved crawl state in the export directory of the website",
+        dest='resume',
+        action='store_const', const=True, default=False)
+    parser.add_argument(
+        '-vs', '--visited-store',
+        help='''
+                Structure for storing visited links. 'hashed' and 'bloom' use much less memory on very large sites,
+                but there is a small chance that a link which is not visited is skipped (default: %(default)s)
+                ''',
+        dest='visited_store',
+        choices=VISITED_STORES, default=VISITED_STORES[0])
+    parser.add_argument(
+        '-ber', '--bloom-error-rate',
+        help="False positive rate of the Bloom filter used when visited store is 'bloom' (default: %(default)s)",
+        dest='bloom_error_rate',
+        default=constants.BLOOM_ERROR_RATE, type=float)
+    parser.add_argument(
+        '-cl', '--compact-links',
+        help="Use memory efficient representation for links in the visiting queue (link text is shortened)",
+        dest='compact_links',
+        action='store_const', const=True, default=False)
+    parser.add_argument(
+        '-sf', '--screenshot-format',
+        help='Format in which screenshots are stored. WebP and JPEG are lossy (default: %(default)s)',
+        dest='screenshot_format',
+        choices=SCREENSHOT_FORMATS, default=SCREENSHOT_FORMATS[0])
+    parser.add_argument(
+        '-sq', '--screenshot-quality',
+        help='Quality of the screenshots stored as WebP or JPEG, from 1 to 100 (default: %(default)s)',
+        dest='screenshot_quality',
+        default=constants.SCREENSHOT_QUALITY, type=int)
+    parser.add_argument(
+        '-smw', '--screenshot-max-width',
+        help='Stored screenshots are downscaled to this width, e.g. for thumbnails (default: resolution width)',
+        dest='screenshot_max_width',
+        type=int)
+    parser.add_argument(
+        '-sg', '--screenshot-grayscale',
+        help='Store screenshots in grayscale',
+        dest='screenshot_grayscale',
+        action='store_const', const=True, default=False)
+    parser.add_argument(
+        '-wt', '--writer-threads',
+        help='''
+                Number of threads per website that write HTML and screenshots in background,
+                files are written by the crawling thread if 0 (default: %(default)s)
+                ''',
+        dest='writer_threads',
+        default=constants.WRITER_THREADS, type=int)
+    parser.add_argument(
+        '-pf', '--preflight',
+        help='''
+                Check the content type with HEAD request before the page is visited, so downloads are not loaded
+                by the browser. Results are cached per URL pattern. Not needed with the hybrid engine
+                ''',
+        dest='preflight',
+        action='store_const', const=True, default=False)
     parser.add_argument(
         '-r', '--resolution',
         help="Resolution of headless browser and output images. Format: WIDTHxHIGHT (default: %(default)s)",
@@ -265,6 +589,18 @@ def cli():
     ):
         parser.error("valid format for resolution: WIDTHxHEIGHT. Example: 2880x1620")
         sys.exit()
+    if not 1 <= args.screenshot_quality <= 100:
+        parser.error('screenshot quality should be from 1 to 100')
+    if not is_format_supported(args.screenshot_format):
+        parser.error(f'screenshot format {args.screenshot_format!r} is not supported by the installed Pillow')
+    if args.screenshot_max_width is not None and args.screenshot_max_width <= 0:
+        parser.error('screenshot max width should be greater than 0')
+    if args.prediction_cache_size < 0 or args.prediction_cache_tolerance < 0:
+        parser.error('prediction cache size and tolerance should not be negative')
+    if not 0.5 < args.url_gate_confidence <= 1:
+        parser.error('url gate confidence should be greater than 0.5 and at most 1')
+    if not 0 <= args.url_gate_verification_rate <= 1:
+        parser.error('url gate verification rate should be from 0 to 1')
 
     # map action str to enum
     action_type = getattr(WebpageActionType, args.action.upper(), None)
@@ -286,28 +622,34 @@ def cli():
             ''')
         args.export_path = '.'
     image_classifier = None
+    image_classifier_factory = None
     if (
         args.directory is None
         and action_type in [WebpageActionType.SCRAPE_PROFILES, WebpageActionType.FIND_ORIGIN]
     ):
         # check for classifier dir and file presence
         model_found = False
-        classifier_name = f'{args.image_classifier}.h5'
+        classifier_name = constants.IMAGE_CLASSIFIERS[args.image_classifier]
+        model_ext = os.path.splitext(classifier_name)[1]
         if not os.path.exists(CLASSIFIERS_DIR):
             print(f'WARN: Directory {CLASSIFIERS_DIR!r} is not present')
             os.makedirs(CLASSIFIERS_DIR, exist_ok=True)
         else:
             classifiers_dir_files = os.listdir(CLASSIFIERS_DIR)
             if classifiers_dir_files:
-                h5_files = [file for file in classifiers_dir_files if file.endswith('.h5')]
-                if len(h5_files) == 0:
-                    print(f'WARN: Directory {CLASSIFIERS_DIR!r} does not contain any .h5 files')
-                elif classifier_name not in h5_files:
+                model_files = [file for file in classifiers_dir_files if file.endswith(model_ext)]
+                if len(model_files) == 0:
+                    print(f'WARN: Directory {CLASSIFIERS_DIR!r} does not contain any {model_ext} files')
+                elif classifier_name not in model_files:
                     print(f'WARN: Model {classifier_name!r} is not found at {CLASSIFIERS_DIR!r}')
                 else:
                     model_found = True
 
-        if not model_found:
+        if not model_found and model_ext != '.h5':
+            keras_path = os.path.join(CLASSIFIERS_DIR, constants.IMAGE_CLASSIFIERS['scooby'])
+            parser.error(f'convert the model first: profilescout-convert {keras_path} '
+                         + os.path.join(CLASSIFIERS_DIR, classifier_name))
+        elif not model_found:
             ans = input(
                 'Classification feature of this program is just a demo which works only for profile pages '
                 'of faculties of University of Kragujevac.\n'
@@ -322,8 +664,10 @@ def cli():
             else:
                 parser.error('to use classification try to import the program as a package in your project, '
                              + 'extend classifier interface and then implement your own classifier')
-        else:
-            image_classifier = ScoobyDemoClassifier(os.path.join(CLASSIFIERS_DIR,  classifier_name))
+        # classifier is created by main, since worker processes need to create their own
+        # TensorFlow is imported when the classifier is created
+        image_classifier_factory = functools.partial(
+            get_model, args.image_classifier, os.path.join(CLASSIFIERS_DIR,  classifier_name))
     try:
         main(
             url=args.url,
@@ -341,7 +685,41 @@ def cli():
             action_type=action_type,
             scrape_option=scrape_option,
             resolution=args.resolution,
-            image_classifier=image_classifier)
+            image_classifier=image_classifier,
+            sites_per_worker=args.sites_per_worker,
+            host_rate=args.host_rate,
+            driver_max_pages=args.driver_max_pages,
+            driver_max_rss=args.driver_max_rss,
+            engine=args.engine,
+            readiness=args.readiness,
+            page_load_timeout=args.page_load_timeout,
+            executor=args.executor,
+            workers=args.workers,
+            image_classifier_factory=image_classifier_factory,
+            classifier_batch_size=args.classifier_batch_size,
+            driver_warmup=args.driver_warmup,
+            resume=args.resume,
+            checkpoint_interval=args.checkpoint_interval,
+            visited_store=args.visited_store,
+            bloom_error_rate=args.bloom_error_rate,
+            compact_links=args.compact_links,
+            preflight=args.preflight,
+            scaled_capture=args.scaled_capture,
+            prediction_cache_size=args.prediction_cache_size,
+            prediction_cache_tolerance=args.prediction_cache_tolerance,
+            prediction_cache_dir=args.prediction_cache_dir,
+            url_gate=args.url_gate,
+            url_gate_confidence=args.url_gate_confidence,
+            url_gate_verification_rate=args.url_gate_verification_rate,
+            screenshot_format=args.screenshot_format,
+            screenshot_quality=args.screenshot_quality,
+            screenshot_max_width=args.screenshot_max_width,
+            screenshot_grayscale=args.screenshot_grayscale,
+            writer_threads=args.writer_threads,
+            max_retries=args.max_retries,
+            breaker_threshold=args.breaker_threshold,
+            dead_host_action=args.dead_host_action,
+            blocked_resources=args.blocked_resources)
     except KeyboardInterrupt:
         print('\nINFO: Exited')
     else:
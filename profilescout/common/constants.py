@@ -1,20 +1,107 @@
 class ConstantsNamespace:
     __slots__ = ()
 
-    # File extension of the screenshot
-    IMG_EXT = 'png'
-
     # Default image resolution
     WIDTH = 2880
     HEIGHT = 1620
 
-    # Time for web driver to wait implicitly before attempting to
-    # perform the action
-    IMPL_WAIT_FOR_FULL_LOAD = 18
+    # Time in seconds for the browser to load the page, page is stopped and
+    # the partially loaded content is used after it
+    PAGE_LOAD_TIMEOUT = 30
+
+    # Time in seconds without network requests after which the page is considered ready
+    NETWORK_IDLE_TIME = 0.5
+
+    # Timeout in seconds for checking the content type of the page before it is visited
+    PREFLIGHT_TIMEOUT = 10
+
+    # Quality of the screenshots stored as WebP or JPEG, from 1 to 100
+    SCREENSHOT_QUALITY = 80
+
+    # Number of threads that write HTML and screenshots of a website to files
+    WRITER_THREADS = 2
+
+    # Number of HTML files and screenshots waiting to be written, after which the crawler waits
+    WRITER_QUEUE_SIZE = 32
+
+    # Number of URL patterns whose content type is remembered
+    PREFLIGHT_CACHE_SIZE = 10_000
+
+    # Time in seconds between checks of the network activity
+    NETWORK_IDLE_POLL_INTERVAL = 0.1
+
+    # Time in seconds to wait after DOMContentLoaded for the 'fixed' readiness strategy
+    FIXED_READY_WAIT = 3
+
+    # Number of visited pages after which the browser from the pool is replaced with a new one
+    DRIVER_MAX_PAGES = 1000
+
+    # Timeout in seconds for fetching the page without browser
+    HTTP_TIMEOUT = 30
+
+    # Max size in bytes of the HTML page fetched without browser, the rest of the page is ignored
+    HTTP_MAX_SIZE = 10 * 2**20
+
+    # Number of connections per host kept alive by HTTP client
+    HTTP_POOL_SIZE = 10
+
+    # Status codes after which the page is loaded again with the browser, since they are often
+    # returned by bot protections which require JavaScript
+    BROWSER_FALLBACK_STATUS = [403, 503]
+
+    # Page with less visible text than this, which contains scripts, is considered as script-rendered
+    MIN_STATIC_TEXT_LENGTH = 200
+
+    # File extensions of the resources that can be blocked in the browser, grouped by resource type
+    RESOURCE_EXTENSIONS = {
+        'image': ['png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp'],
+        'media': ['mp4', 'webm', 'ogg', 'ogv', 'mp3', 'wav', 'm4a', 'mov', 'avi'],
+        'font': ['woff', 'woff2', 'ttf', 'otf', 'eot'],
+        'stylesheet': ['css']}
+
+    # Domains of third-party analytics, ads and widgets which are blocked as 'third-party' resources
+    THIRD_PARTY_DOMAINS = [
+        'google-analytics.com', 'googletagmanager.com', 'googlesyndication.com', 'doubleclick.net',
+        'googleadservices.com', 'facebook.net', 'connect.facebook.com', 'hotjar.com', 'clarity.ms',
+        'addthis.com', 'sharethis.com', 'disqus.com', 'platform.twitter.com', 'mc.yandex.ru']
+
+    # Number of times the page is visited again after a failure with retryable reason
+    MAX_RETRIES = 2
+
+    # Time to wait before the first retry, which is doubled for each next retry up to RETRY_MAX_DELAY
+    RETRY_BASE_DELAY = 2
+    RETRY_MAX_DELAY = 60
 
-    # Time to wait before next attempt to interact with web driver is made.
-    # Used for page visit
-    RETRY_TIME = 60
+    # Reasons of failed visits (see 'parse_web_driver_exception') for which visit is retried
+    RETRYABLE_REASONS = ['timed out', 'stale', 'connection reset', 'error']
+
+    # Reasons of failed visits which indicate that the host is down
+    HOST_FAILURE_REASONS = ['unresolved', 'unreachable', 'timed out', 'connection refused', 'https not supported']
+
+    # Number of consecutive failures after which visits of the host are stopped
+    BREAKER_FAILURE_THRESHOLD = 3
+
+    # Time after which the host, whose visits are stopped, is visited once again to check if it's up
+    BREAKER_RESET_TIMEOUT = 300
+
+    # Maximum number of urls for which results of canonicalization and domain extraction are cached
+    URL_CACHE_SIZE = 65_536
+
+    # Number of visited pages after which the crawl state is saved
+    CHECKPOINT_INTERVAL = 20
+
+    # Name of the file, located in export directory of the website, in which the crawl state is saved
+    CRAWL_STATE_FILENAME = 'crawl_state.sqlite3'
+
+    # Default false positive rate of the Bloom filter used for storing visited links.
+    # False positive means that a link which is not visited is considered as visited
+    BLOOM_ERROR_RATE = 0.001
+
+    # Number of links that can be stored in the first Bloom filter before a new one is added
+    BLOOM_INITIAL_CAPACITY = 100_000
+
+    # Maximum length of the link text kept by the compact page link
+    COMPACT_LINK_TXT_LENGTH = 100
 
     # Threshold for using buffer instead of printing everything to the file
     # line by line
@@ -50,14 +137,49 @@ class ConstantsNamespace:
     # Threshold value for detecting positive class
     PREDICTION_THRESHOLD = 0.5
 
+    # Quality of the scaled JPEG screenshots that are captured for the classification
+    SCALED_CAPTURE_QUALITY = 90
+
+    # Max number of screenshots that are classified at once
+    CLASSIFIER_BATCH_SIZE = 8
+
+    # Max time in seconds that the screenshot waits for other screenshots to be classified in the same batch
+    CLASSIFIER_MAX_LATENCY = 0.05
+
+    # Min share of the classifier results for a url template that must agree to decide its pages by url
+    URL_GATE_CONFIDENCE = 0.9
+
+    # Min number of classified pages with the same url template before its pages are decided by url
+    URL_GATE_MIN_SAMPLES = 3
+
+    # Share of the pages decided by url that are still classified to verify the decision
+    URL_GATE_VERIFICATION_RATE = 0.1
+
+    # Max number of cached predictions for the screenshots of a website, when the cache is enabled
+    PREDICTION_CACHE_SIZE = 1024
+
+    # Max number of different bits between hashes of two screenshots that are considered the same,
+    # only identical hashes by default, since listing and profile pages of a website often share the layout
+    PREDICTION_CACHE_TOLERANCE = 0
+
+    # Width and height of the downscaled screenshot used for hashing, hash has HASH_SIZE * HASH_SIZE bits
+    PREDICTION_CACHE_HASH_SIZE = 8
+
     # The threshold determines the number of subpages of a URL that are categorized as profile pages.
     # Once this threshold is met, the URL is regarded as the parent page for all subsequent profile pages
     ORIGIN_PAGE_THRESHOLD = 3
 
     DEMO_MODEL_URL = 'https://huggingface.co/tsrdjan/scooby/resolve/main/scooby.h5'
 
-    IMAGE_CLASSIFIERS = [
-        'scooby']
+    # Image classifiers and their model files in the classifiers directory.
+    # Converted models are created from the Keras one with 'profilescout-convert'
+    IMAGE_CLASSIFIERS = {
+        'scooby': 'scooby.h5',
+        'scooby-tflite': 'scooby.tflite',
+        'scooby-onnx': 'scooby.onnx'}
+
+    # Max absolute difference between the outputs of the converted and the Keras model
+    PARITY_TOLERANCE = 0.05
 
     NER_MODEL = 'Davlan/bert-base-multilingual-cased-ner-hrl'
 
@@ -11,6 +11,12 @@ def parse_web_driver_exception(e, url):
     elif 'ERR_CONNECTION_TIMED_OUT' in str(e):
         reason = 'timed out'
         err_msg = f'ERROR: cannot visit url "{url}" (reason: connection timed out)'
+    elif 'ERR_CONNECTION_REFUSED' in str(e):
+        reason = 'connection refused'
+        err_msg = f'ERROR: cannot visit url "{url}" (reason: connection refused)'
+    elif 'ERR_CONNECTION_RESET' in str(e):
+        reason = 'connection reset'
+        err_msg = f'ERROR: cannot visit url "{url}" (reason: connection reset)'
     elif 'stale element reference' in str(e):
         reason = 'stale'
         err_msg = f'ERROR: cannot visit url "{url}" (reason: stale element)'
@@ -0,0 +1,54 @@
+import importlib
+import threading
+
+
+class ModelRegistry:
+    '''
+    Creates models on their first use and caches them, so heavy libraries (e.g. TensorFlow and Transformers)
+    are imported only by the processes that use the models. Factories are registered by import path
+    'module:attribute' and the model is created once for each combination of arguments. Registry is thread-safe
+    '''
+
+    def __init__(self):
+        self._factories = dict()  # name -> import path
+        self._models = dict()  # (name, args) -> model
+        self._lock = threading.Lock()
+
+    def register(self, name, factory_path):
+        self._factories[name] = factory_path
+
+    def names(self):
+        return list(self._factories.keys())
+
+    def _import_factory(self, name):
+        try:
+            module_name, attribute = self._factories[name].split(':')
+        except KeyError:
+            raise KeyError(f'model {name!r} is not registered')
+        return getattr(importlib.import_module(module_name), attribute)
+
+    def get(self, name, *args):
+        key = (name, args)
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = self._import_factory(name)(*args)
+            return self._models[key]
+
+    def is_loaded(self, name, *args):
+        return (name, args) in self._models
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+
+models = ModelRegistry()
+models.register('scooby', 'profilescout.classification.classifier:ScoobyDemoClassifier')
+models.register('scooby-tflite', 'profilescout.classification.lite:LiteClassifier')
+models.register('scooby-onnx', 'profilescout.classification.lite:LiteClassifier')
+models.register('ner', 'profilescout.extraction.ner:NamedEntityRecognition')
+
+
+def get_model(name, *args):
+    '''model from the shared registry, module-level function can be sent to worker processes with functools.partial'''
+    return models.get(name, *args)
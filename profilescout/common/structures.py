@@ -2,6 +2,7 @@ from dataclasses import dataclass, field
 
 from profilescout.common.constants import ConstantsNamespace
 from profilescout.common.interfaces import DetectionStrategy
+from profilescout.link.gate import UrlTemplateGate
 from profilescout.link.utils import most_common_format
 
 
@@ -13,6 +14,7 @@ class OriginPageDetectionStrategy(DetectionStrategy):
     succeeded: bool = False
     result: dict = None
     origin_candidates: dict = field(default_factory=dict)
+    gate: UrlTemplateGate = None  # pages are classified by the url when possible, gate is kept between resets
 
     def successful(self):
         return self.succeeded
@@ -25,10 +27,21 @@ class OriginPageDetectionStrategy(DetectionStrategy):
         self.result = None
         self.origin_candidates = dict()  # TODO determine whether or not this should be completely cleared
 
-    def analyse(self, curr_page, classifier, resolution):
+    def _is_profile(self, curr_page, classifier, resolution):
+        '''returns whether the classification was successful and whether the page is a profile page'''
+        url = curr_page.link.url
+        if self.gate is not None:
+            decision = self.gate.decide(url)
+            if decision is not None:
+                return True, decision
         action_result = curr_page.is_profile(classifier, *resolution)
-        profile_detected = action_result.val
-        if action_result.successful and profile_detected:
+        if self.gate is not None and action_result.successful:
+            self.gate.learn(url, action_result.val)
+        return action_result.successful, action_result.val
+
+    def analyse(self, curr_page, classifier, resolution):
+        successful, profile_detected = self._is_profile(curr_page, classifier, resolution)
+        if successful and profile_detected:
             # assume that this is initial page
             origin = curr_page.link.url
             parent_url = curr_page.link.parent_url
@@ -49,4 +62,6 @@ class OriginPageDetectionStrategy(DetectionStrategy):
                     'most_common_format': most_common_format(children),  # TODO add placeholder
                     'message': f'Found profile page origin at {origin!r}'}
                 self.succeeded = True
+                if self.gate is not None:
+                    self.gate.add_profile_format(self.result['most_common_format'])
         return self.result
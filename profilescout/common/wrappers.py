@@ -1,4 +1,6 @@
+from io import BytesIO
 from abc import ABC, abstractmethod
+from PIL import Image
 
 
 class WebElementWrapper(ABC):
@@ -30,6 +32,16 @@ class WebDriverWrapper(ABC):
     def save_screenshot(self, path):
         pass
 
+    def get_screenshot_as_jpeg(self, scale=1, quality=95):
+        '''screenshot scaled by the given factor, PNG screenshot is scaled if the driver can't capture it scaled'''
+        with BytesIO(self.get_screenshot_as_png()) as buffer:
+            image = Image.open(buffer).convert('RGB')
+        if scale != 1:
+            image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))))
+        with BytesIO() as buffer:
+            image.save(buffer, format='JPEG', quality=quality)
+            return buffer.getvalue()
+
     @abstractmethod
     def get_page_source(self):
         pass
@@ -42,10 +54,18 @@ class WebDriverWrapper(ABC):
     def execute_script(self, script):
         pass
 
+    @abstractmethod
+    def get_content_type(self):
+        pass
+
     @abstractmethod
     def set_window_size(self, width, height):
         pass
 
+    def block_resources(self, resource_types):
+        '''blocks loading of the given resource types (see RESOURCE_TYPES), nothing is blocked by default'''
+        pass
+
     @abstractmethod
     def quit(self):
         pass
@@ -12,7 +12,7 @@ from phonenumbers import PhoneNumberMatcher, PhoneNumberFormat, format_number, p
 
 from profilescout.common.texthelpers import longest_common_substring, dl_distance
 from profilescout.link.utils import to_key, is_url, to_abs_path
-from profilescout.extraction.ner import NamedEntityRecognition
+from profilescout.common.registry import get_model
 
 
 PATTERNS = {'unwanted_tag__has_placeholder': r'(<\/?(?:b|i|strong|em|blockquote|h[1-6])\b[^>]*>)',
@@ -29,9 +29,6 @@ PATTERNS = {'unwanted_tag__has_placeholder': r'(<\/?(?:b|i|strong|em|blockquote|
             }
 
 
-ner = NamedEntityRecognition()
-
-
 def _get_differences(different_lines):
     differences = []
     for line in different_lines:
@@ -219,7 +216,8 @@ def _post_processing(resume):
     if 'Source text' in resume:
         link_text = resume.pop('Source text')
     # try to guess person's name
-    name = guess_name(ner, '\n'.join(resume['other']), link_text)
+    # NER model is loaded on the first use
+    name = guess_name(get_model('ner'), '\n'.join(resume['other']), link_text)
     if name is not None:
         resume['name'] = name
         # remove name instances from `other`
@@ -0,0 +1,94 @@
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit
+
+import tldextract
+
+from profilescout.common.constants import ConstantsNamespace
+
+
+constants = ConstantsNamespace
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+@lru_cache(maxsize=constants.URL_CACHE_SIZE)
+def extract(url):
+    '''memoized version of tldextract.extract'''
+    return tldextract.extract(url)
+
+
+def _strip_nocache_and_fragment(url, include_fragment=False):
+    idx = url.find('?nocache')
+    if idx != -1:
+        url = url[:idx]
+    if not include_fragment:
+        frag_idx = url.find('#')
+        if frag_idx != -1:
+            url = url[:frag_idx]
+    return url
+
+
+def _remove_dot_segments(path):
+    '''resolve '.' and '..' segments of the path (RFC 3986, section 5.2.4)'''
+    if '/.' not in path:
+        return path
+    output = []
+    for segment in path.split('/'):
+        if segment == '..':
+            if len(output) > 1:
+                output.pop()
+        elif segment != '.':
+            output.append(segment)
+    if path.endswith('/.') or path.endswith('/..'):
+        output.append('')
+    return '/'.join(output)
+
+
+def _split(url, include_fragment):
+    '''returns normalized (scheme, host, port, path, query, fragment) or None if url is not absolute http(s) url'''
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or parts.hostname is None:
+        return None
+    port = '' if port is None or port == DEFAULT_PORTS[scheme] else f':{port}'
+    path = _remove_dot_segments(parts.path) or '/'
+    fragment = parts.fragment if include_fragment else ''
+    return scheme, parts.hostname.lower(), port, path, parts.query, fragment
+
+
+@lru_cache(maxsize=constants.URL_CACHE_SIZE)
+def canonicalize(url, include_fragment=False):
+    '''
+    Returns normalized url: lowercase scheme and host, without default port,
+    with resolved dot-segments and without fragment (unless it is included) or '?nocache' part.
+    Urls that are not absolute http(s) urls are only stripped of the fragment and '?nocache' part
+    '''
+    url = _strip_nocache_and_fragment(url.strip(), include_fragment)
+    parts = _split(url, include_fragment)
+    if parts is None:
+        return url
+    scheme, host, port, path, query, fragment = parts
+    return urlunsplit((scheme, host + port, path, query, fragment))
+
+
+@lru_cache(maxsize=constants.URL_CACHE_SIZE)
+def url_key(url):
+    '''
+    Compact key which is same for all spellings of the url.
+    In addition to canonicalization, 'www' and trailing slash are ignored.
+    Fragment is kept since it is only present if fragments are considered as separate pages
+    '''
+    parts = _split(url.strip(), include_fragment=True)
+    if parts is None:
+        return url[4:] if url.startswith('www.') else url
+    scheme, host, port, path, query, fragment = parts
+    if host.startswith('www.'):
+        host = host[4:]
+    path = path.rstrip('/')
+    query = '?' + query if query else ''
+    fragment = '#' + fragment if fragment else ''
+    return f'{scheme}://{host}{port}{path}{query}{fragment}'
@@ -0,0 +1,232 @@
+import sys
+import math
+import hashlib
+
+from array import array
+
+from profilescout.common.constants import ConstantsNamespace
+from profilescout.link.canonical import url_key
+from profilescout.link.utils import UrlIndex
+
+
+constants = ConstantsNamespace
+
+VISITED_STORES = ['exact', 'hashed', 'bloom']
+
+
+def _hash64(key):
+    h = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little')
+    return h or 1  # 0 marks an empty slot
+
+
+def _hash128(key):
+    digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+class _KeyView:
+    '''view which checks membership by url key, used by 'select_new_links\''''
+
+    def __init__(self, contains_key):
+        self._contains_key = contains_key
+
+    def __contains__(self, key):
+        return self._contains_key(key)
+
+
+class HashedUrlSet:
+    '''
+    Set of 64-bit hashes of url keys stored in array based open addressing hash table.
+    Uses around 8-16 bytes per url, but urls can't be listed and there is
+    a small chance of collision, in which case unvisited url is considered as visited
+    '''
+
+    MAX_LOAD_FACTOR = 0.6
+
+    def __init__(self, urls=(), capacity=1024):
+        self._slots = array('Q', bytes(8 * capacity))
+        self._mask = capacity - 1
+        self._len = 0
+        self.update(urls)
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, url):
+        return self._contains_hash(_hash64(url_key(url)))
+
+    def keys(self):
+        return _KeyView(lambda key: self._contains_hash(_hash64(key)))
+
+    def _find_slot(self, h):
+        idx = h & self._mask
+        while self._slots[idx] != 0 and self._slots[idx] != h:
+            idx = (idx + 1) & self._mask
+        return idx
+
+    def _contains_hash(self, h):
+        return self._slots[self._find_slot(h)] == h
+
+    def _add_hash(self, h):
+        idx = self._find_slot(h)
+        if self._slots[idx] == h:
+            return
+        self._slots[idx] = h
+        self._len += 1
+        if self._len > len(self._slots) * HashedUrlSet.MAX_LOAD_FACTOR:
+            self._grow()
+
+    def _grow(self):
+        old_slots = self._slots
+        self._slots = array('Q', bytes(16 * len(old_slots)))
+        self._mask = len(self._slots) - 1
+        for h in old_slots:
+            if h != 0:
+                self._slots[self._find_slot(h)] = h
+
+    def add(self, url):
+        self._add_hash(_hash64(url_key(url)))
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def merge(self, other):
+        if not isinstance(other, HashedUrlSet):
+            return self.update(other)
+        for h in other._slots:
+            if h != 0:
+                self._add_hash(h)
+
+
+class BloomFilter:
+    '''Bloom filter with fixed capacity and false positive rate'''
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, h1, h2):
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, h1, h2):
+        for pos in self._positions(h1, h2):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def contains(self, h1, h2):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(h1, h2))
+
+    def same_parameters(self, other):
+        return (self.num_bits, self.num_hashes) == (other.num_bits, other.num_hashes)
+
+    def union(self, other):
+        '''adds urls of the filter with the same parameters, count is overestimated if the filters share urls'''
+        assert self.same_parameters(other), 'filters must have the same number of bits and hashes'
+        self._bits = bytearray((int.from_bytes(self._bits, 'little') | int.from_bytes(other._bits, 'little')).to_bytes(
+            len(self._bits), 'little'))
+        self.count += other.count
+
+    def copy(self):
+        bloom_filter = BloomFilter(self.capacity, self.error_rate)
+        bloom_filter.union(self)
+        return bloom_filter
+
+
+class ScalableBloomFilter:
+    '''
+    Bloom filter that adds a new, larger and stricter, filter once the current one is full,
+    so the overall false positive rate stays below the given one regardless of the number of urls.
+    False positive means that unvisited url is considered as visited
+    '''
+
+    GROWTH = 2
+    TIGHTENING_RATIO = 0.5
+
+    def __init__(self, urls=(), error_rate=constants.BLOOM_ERROR_RATE, initial_capacity=constants.BLOOM_INITIAL_CAPACITY):
+        assert 0 < error_rate < 1, 'error rate must be between 0 and 1'
+        self.error_rate = error_rate
+        self.initial_capacity = initial_capacity
+        self._filters = []
+        self._len = 0
+        self.update(urls)
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, url):
+        return self._contains_key(url_key(url))
+
+    def keys(self):
+        return _KeyView(self._contains_key)
+
+    def _contains_key(self, key):
+        h1, h2 = _hash128(key)
+        return any(bloom_filter.contains(h1, h2) for bloom_filter in self._filters)
+
+    def add(self, url):
+        key = url_key(url)
+        if self._contains_key(key):
+            return
+        if not self._filters or self._filters[-1].count >= self._filters[-1].capacity:
+            n = len(self._filters)
+            self._filters.append(BloomFilter(
+                self.initial_capacity * ScalableBloomFilter.GROWTH ** n,
+                self.error_rate * (1 - ScalableBloomFilter.TIGHTENING_RATIO) * ScalableBloomFilter.TIGHTENING_RATIO ** n))
+        self._filters[-1].add(*_hash128(key))
+        self._len += 1
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def merge(self, other):
+        '''
+        Adds urls of the other filter. Filters created with the same error rate and initial capacity have
+        the same parameters at the same position, so their bits are ORed if both fit into the capacity.
+        Otherwise filters of the other one are appended, since url is present if any of the filters contains it,
+        but then the false positive rate is bounded only by the sum of the rates of both filters
+        '''
+        if not isinstance(other, ScalableBloomFilter):
+            return self.update(other)
+        for i, bloom_filter in enumerate(other._filters):
+            if (i < len(self._filters) and self._filters[i].same_parameters(bloom_filter)
+                    and self._filters[i].count + bloom_filter.count <= self._filters[i].capacity):
+                self._filters[i].union(bloom_filter)
+            else:
+                self._filters.append(bloom_filter.copy())
+        self._len += len(other)
+
+
+class CompactPageLink:
+    '''Memory efficient version of PageLink with shared parent url and shortened link text'''
+
+    __slots__ = ('url', 'depth', 'parent_url', 'txt')
+
+    def __init__(self, url, depth, parent_url=None, txt=''):
+        self.url = url
+        self.depth = depth
+        self.parent_url = sys.intern(parent_url) if parent_url is not None else None
+        self.txt = txt[:constants.COMPACT_LINK_TXT_LENGTH] if txt else txt
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactPageLink):
+            return NotImplemented
+        return (self.url, self.depth, self.parent_url, self.txt) == (other.url, other.depth, other.parent_url, other.txt)
+
+    def __repr__(self):
+        return f'CompactPageLink(url={self.url!r}, depth={self.depth!r}, parent_url={self.parent_url!r}, txt={self.txt!r})'
+
+
+def create_visited_store(kind='exact', error_rate=constants.BLOOM_ERROR_RATE):
+    if kind == 'exact':
+        return UrlIndex()
+    if kind == 'hashed':
+        return HashedUrlSet()
+    if kind == 'bloom':
+        return ScalableBloomFilter(error_rate=error_rate)
+    raise KeyError(f'provided value {kind!r} is not recognised as a visited store')
@@ -0,0 +1,100 @@
+import re
+import random
+
+from urllib.parse import urlparse
+
+from profilescout.common.constants import ConstantsNamespace
+from profilescout.link.utils import replace_param_vals
+
+
+constants = ConstantsNamespace
+
+
+def to_url_template(url, placeholder='####'):
+    '''
+    Template shared by the url and its siblings: last part of the path and the values
+    of the query parameters are replaced with the placeholder
+    e.g. https://example.com/staff/john-doe?lang=en -> https://example.com/staff/####?lang=####
+    '''
+    parsed_url = urlparse(url)
+    path_parts = [part for part in parsed_url.path.split('/') if part != '']
+    if len(path_parts) > 0:
+        path_parts[-1] = placeholder
+    template = f'{parsed_url.scheme}://{parsed_url.netloc}/' + '/'.join(path_parts)
+    if parsed_url.query != '':
+        template += replace_param_vals(f'?{parsed_url.query}', placeholder)
+    return template
+
+
+def to_format_pattern(fmt, placeholder='####'):
+    '''pattern matching the whole url, placeholder matches exactly one part of the path or one query value'''
+    return re.compile(re.escape(fmt).replace(re.escape(placeholder), r'[^/?&#]+') + '/?')
+
+
+class UrlTemplateGate:
+    '''
+    Learns which url templates belong to profile pages from the results of the classifier, so the pages
+    of templates with enough consistent results are decided by url, without the screenshot and the inference.
+    Formats of the found profile pages (see 'most_common_format') count as a single profile result
+    for the urls that match them, so they never decide the page on their own.
+    Share of the decided pages, determined by verification_rate, is still classified to keep learning
+    '''
+
+    def __init__(
+        self,
+        confidence=constants.URL_GATE_CONFIDENCE,
+        min_samples=constants.URL_GATE_MIN_SAMPLES,
+        verification_rate=constants.URL_GATE_VERIFICATION_RATE,
+        placeholder='####',
+        rng=None
+    ):
+        assert 0.5 < confidence <= 1, 'confidence must be greater than 0.5 and at most 1'
+        assert 0 <= verification_rate <= 1, 'verification rate must be between 0 and 1'
+        self.confidence = confidence
+        self.min_samples = min_samples
+        self.verification_rate = verification_rate
+        self.placeholder = placeholder
+        self.decided_count = 0
+        self.classified_count = 0
+        self.mismatch_count = 0  # verified pages for which the classifier disagrees with the url
+        self._rng = rng if rng is not None else random.Random()
+        self._counts = dict()  # template -> [profile count, non-profile count]
+        self._profile_formats = dict()  # format -> pattern
+
+    def add_profile_format(self, fmt):
+        if fmt is not None and self.placeholder in fmt and fmt not in self._profile_formats:
+            self._profile_formats[fmt] = to_format_pattern(fmt, self.placeholder)
+
+    def _decide_by_url(self, url):
+        profile_count, other_count = self._counts.get(to_url_template(url, self.placeholder), (0, 0))
+        if any(pattern.fullmatch(url) for pattern in self._profile_formats.values()):
+            # format of the found profile pages is a prior for the template, not a decision
+            profile_count += 1
+        total = profile_count + other_count
+        if total >= self.min_samples:
+            if profile_count / total >= self.confidence:
+                return True
+            if other_count / total >= self.confidence:
+                return False
+        return None
+
+    def decide(self, url):
+        '''
+        returns whether the page is a profile page according to its url or None if the page
+        needs to be classified, either because it's ambiguous or because it's sampled for verification
+        '''
+        decision = self._decide_by_url(url)
+        if decision is not None and self._rng.random() < self.verification_rate:
+            decision = None
+        if decision is None:
+            self.classified_count += 1
+        else:
+            self.decided_count += 1
+        return decision
+
+    def learn(self, url, profile_detected):
+        '''records the classifier result for the url'''
+        if self._decide_by_url(url) not in (None, profile_detected):
+            self.mismatch_count += 1
+        counts = self._counts.setdefault(to_url_template(url, self.placeholder), [0, 0])
+        counts[0 if profile_detected else 1] += 1
@@ -2,12 +2,12 @@ import re
 import os
 import sys
 import random
-import tldextract
 from urllib.parse import urlparse, quote_plus
 
 from dataclasses import dataclass
 
 from profilescout.common.constants import ConstantsNamespace
+from profilescout.link.canonical import canonicalize, extract, url_key
 
 
 constants = ConstantsNamespace
@@ -22,7 +22,7 @@ class PageLink:
 
 
 def is_url(s):
-    extracted = tldextract.extract(s)
+    extracted = extract(s)
     return bool(extracted.domain and extracted.suffix)
 
 
@@ -46,8 +46,8 @@ def is_valid(url, base_url):
         if ext.lower() in constants.INVALID_EXTENSIONS:
             return False
 
-    base_extract = tldextract.extract(base_url)
-    link_extract = tldextract.extract(url)
+    base_extract = extract(base_url)
+    link_extract = extract(url)
     base_subdo_reversed = base_extract.subdomain.replace('www', '').split('.')[::-1]
     link_subdo_reversed = link_extract.subdomain.replace('www', '').split('.')[::-1]
     common_len = min(len(base_subdo_reversed), len(link_subdo_reversed))
@@ -67,7 +67,6 @@ def is_valid(url, base_url):
 
 
 def to_abs_path(url, current_url):
-    base_url = to_base_url(current_url)
     # fix relative links or links that start with '/'
     abs_url = url
     if url.startswith('http'):
@@ -78,6 +77,7 @@ def to_abs_path(url, current_url):
         # relative path or absoulte path from '/'
         if url[0] == '/':
             # absolute path
+            base_url = to_base_url(current_url)
             if base_url[-1] == '/':
                 url = url[1:]  # remove '/' since base_url ends with one
             abs_url = base_url + url
@@ -90,7 +90,7 @@ def to_abs_path(url, current_url):
 
 
 def to_key(url):
-    result = tldextract.extract(url)
+    result = extract(url)
     subdomain = result.subdomain
     if subdomain in ['', 'www']:
         return result.domain
@@ -100,7 +100,7 @@ def to_key(url):
 
 
 def to_fqdn(url):
-    return tldextract.extract(url).fqdn
+    return extract(url).fqdn
 
 
 def to_base_url(url):
@@ -114,26 +114,47 @@ def to_base_url(url):
 
 
 def remove_duplicates(page_links):
-    unique_links = page_links
+    '''remove links to the same page, keep the first seen link and update its depth if there is a better path'''
+    unique_links = dict()
+    for page_link in page_links:
+        key = url_key(page_link.url)
+        seen = unique_links.get(key)
+        if seen is None:
+            unique_links[key] = page_link
+        elif seen.depth > page_link.depth:
+            seen.depth = page_link.depth
+
+    return list(unique_links.values())
+
+
+def select_new_links(page_links, *known_links):
+    '''
+    Remove duplicates and links that are present in any of the known links containers
+    (e.g. visited links or links to visit) in a single pass. Containers must provide
+    'keys()' with url keys of their links
+    '''
+    known_keys = [links.keys() for links in known_links]
+    new_links = dict()
+    for page_link in page_links:
+        key = url_key(page_link.url)
+        if any(key in keys for keys in known_keys):
+            continue
+        seen = new_links.get(key)
+        if seen is None:
+            new_links[key] = page_link
+        elif seen.depth > page_link.depth:
+            seen.depth = page_link.depth
 
-    i = 0
-    n = len(unique_links)
-    while i < n-1:
-        j = i+1
-        while j < n:
-            if unique_links[i].url == unique_links[j].url:
-                # update depth if there is better path
-                if unique_links[i].depth > unique_links[j].depth:
-                    unique_links[i].depth = unique_links[j].depth
+    return list(new_links.values())
 
-                # delete duplicate
-                del unique_links[j]
-                j -= 1
-                n -= 1
-            j += 1
-        i += 1
 
-    return unique_links
+def is_relevant(url):
+    '''check if url contains any of the relevant words'''
+    url = url.lower()
+    for word in constants.RELEVANT_WORDS:
+        if quote_plus(word) in url:
+            return True
+    return False
 
 
 def prioritize_relevant(link_queue):
@@ -141,14 +162,9 @@ def prioritize_relevant(link_queue):
     front = []
     rest = []
     for page_link in link_queue:
-        has_relevant = False
-        for word in constants.RELEVANT_WORDS:
-            word = quote_plus(word)
-            if word in page_link.url.lower():
-                front.append(page_link)
-                has_relevant = True
-                break
-        if not has_relevant:
+        if is_relevant(page_link.url):
+            front.append(page_link)
+        else:
             rest.append(page_link)
 
     return front + rest
@@ -165,6 +181,39 @@ def with_and_without_www(url):
     return url.replace(f'{parsed_url.scheme}://', f'{parsed_url.scheme}://www.'), url
 
 
+class UrlIndex:
+    '''Set of urls with O(1) membership check where different spellings of the same url are considered the same'''
+
+    def __init__(self, urls=()):
+        self._urls = dict()  # key -> first added url
+        self.update(urls)
+
+    def __contains__(self, url):
+        return url_key(url) in self._urls
+
+    def __iter__(self):
+        return iter(list(self._urls.values()))
+
+    def __len__(self):
+        return len(self._urls)
+
+    def keys(self):
+        return self._urls.keys()
+
+    def add(self, url):
+        self._urls.setdefault(url_key(url), url)
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def discard(self, url):
+        self._urls.pop(url_key(url), None)
+
+    def merge(self, other):
+        self.update(other)
+
+
 def filter_out_invalid(page_links, base_url):
     result = filter(lambda pl: is_valid(pl.url, base_url),
                     page_links)
@@ -172,22 +221,17 @@ def filter_out_invalid(page_links, base_url):
 
 
 def filter_out_visited(page_links, visited_links):
-    result = []
-    for page_link in page_links:
-        www, wo_www = with_and_without_www(page_link.url)
-        if www not in visited_links and wo_www not in visited_links:
-            result += [page_link]
-    return result
+    if not isinstance(visited_links, UrlIndex):
+        visited_links = UrlIndex(visited_links)
+    return [page_link for page_link in page_links if page_link.url not in visited_links]
 
 
 def filter_out_present_links(page_links, links_to_visit):
-    result = []
-    urls_to_visit = [to_visit.url for to_visit in links_to_visit]
-    for page_link in page_links:
-        www, wo_www = with_and_without_www(page_link.url)
-        if www not in urls_to_visit and wo_www not in urls_to_visit:
-            result += [page_link]
-    return result
+    # links_to_visit can be any container that checks membership by url,
+    # lists of links are indexed first
+    if isinstance(links_to_visit, (list, tuple)):
+        links_to_visit = UrlIndex(to_visit.url for to_visit in links_to_visit)
+    return [page_link for page_link in page_links if page_link.url not in links_to_visit]
 
 
 def filter_out_long(page_links, err_file=sys.stderr):
@@ -240,7 +284,7 @@ def to_filename(url, export_path, extension, err_file=sys.stderr):
 
 def to_file_path(link, export_path, extension, ignore_existing=False, err_file=sys.stderr):
     filename = ''
-    filename = to_filename(link, export_path, extension)
+    filename = to_filename(canonicalize(link), export_path, extension)
     path = os.path.join(export_path, filename)
     if not ignore_existing and os.path.exists(path):
         print(f'WARN: File already exists at: {path}', file=err_file)
@@ -2,27 +2,44 @@ import os
 import sys
 import time
 import random
+import sqlite3
 import traceback
 import copy
+import functools
 
 from io import StringIO
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from http.client import RemoteDisconnected
 
 from profilescout.common.constants import ConstantsNamespace
 from profilescout.common.structures import OriginPageDetectionStrategy
-from profilescout.link.utils import is_valid_sublink
+from profilescout.link.compact import CompactPageLink, create_visited_store
+from profilescout.link.gate import UrlTemplateGate
+from profilescout.link.utils import PageLink, is_valid_sublink
 from profilescout.web.manager import CrawlManager, CrawlStatus
-from profilescout.web.webdriver import setup_web_driver
-from profilescout.web.webpage import ScrapeOption, WebpageActionType
+from profilescout.web.retry import CircuitBreaker, RetryPolicy
+from profilescout.web.scheduler import PolitenessScheduler, to_host
+from profilescout.web.state import CrawlStateStore
+from profilescout.web.httpdriver import setup_driver
+from profilescout.web.preflight import ContentTypePreflight
+from profilescout.web.writer import ArtifactWriter
+from profilescout.classification.cache import CachingClassifier
+from profilescout.web.screenshot import ScreenshotEncoding
+from profilescout.web.webpage import ScrapeOption, WebpageActionType, default_blocked_resources
 
 
 constants = ConstantsNamespace
 
 
-def _close_everything(web_driver, out_file, err_file, export_path, use_buffer):
+def _close_everything(web_driver, out_file, err_file, export_path, use_buffer, driver_pool=None, writer=None):
+    if writer is not None:
+        # write pending artifacts before the logs are closed, since errors are written to them
+        writer.close()
     if web_driver is not None:
-        web_driver.quit()
+        if driver_pool is not None:
+            driver_pool.release(web_driver)
+        else:
+            web_driver.quit()
     # make sure that everything is flushed before stream is closed
     out_file.flush()
     err_file.flush()
@@ -60,27 +77,38 @@ def _create_out_and_err_files(export_path):
     return out_file, err_file
 
 
-def crawl_website(
+def _crawl_website_steps(
     export_path,
     base_url,
     options,
     action_type,
     scrape_option,
-    image_classifier
+    image_classifier,
+    scheduler=None,
+    driver_pool=None
 ):
+    '''crawls the website, yields the active crawler after each visited page and returns the main crawler'''
+    crawler = None
     detection_strategy = OriginPageDetectionStrategy()
+    if options.url_gate:
+        detection_strategy.gate = UrlTemplateGate(options.url_gate_confidence, verification_rate=options.url_gate_verification_rate)
+    if options.blocked_resources is None:
+        options = replace(options, blocked_resources=default_blocked_resources(action_type, scrape_option))
     if action_type == WebpageActionType.SCRAPE_PAGES:
-        crawler = Crawler(options, export_path)
+        crawler = Crawler(options, export_path, scheduler=scheduler, driver_pool=driver_pool)
         for step in crawler.crawl(base_url):
             crawler.save(scrape_option)
+            yield crawler
     elif action_type == WebpageActionType.FIND_ORIGIN:
-        crawler = Crawler(options, export_path, detection_strategy, image_classifier)
+        crawler = Crawler(options, export_path, detection_strategy, image_classifier, scheduler=scheduler, driver_pool=driver_pool)
         for step in crawler.crawl(base_url):
             if detection_strategy.successful():
                 break
+            yield crawler
     elif action_type == WebpageActionType.SCRAPE_PROFILES:
-        crawler = Crawler(options, export_path, detection_strategy, image_classifier)
+        crawler = Crawler(options, export_path, detection_strategy, image_classifier, scheduler=scheduler, driver_pool=driver_pool)
         for step in crawler.crawl(base_url):
+            yield crawler
             if detection_strategy.successful():
                 result = detection_strategy.get_result()
                 origin = result['origin']
@@ -93,7 +121,94 @@ def crawl_website(
                 for og_step in og_crawler.crawl(origin, result['depth']):
                     og_crawler.save(scrape_option)
                     og_crawler.skip_sublinks = True
+                    yield og_crawler
                 crawler.mark_as_visited(og_crawler.get_visited_links(), og_crawler.get_scraped_count())
+    return crawler
+
+
+def _run_steps(steps):
+    '''runs crawl steps until the end and returns the main crawler'''
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+def crawl_result(base_url, export_path, crawler=None, error=None):
+    '''summary of the website crawl, which can be sent to other process'''
+    if crawler is not None and error is None:
+        error = crawler.error
+    scraped_count = 0
+    failed_writes = 0
+    origin = None
+    if crawler is not None:
+        failed_writes = crawler.get_failed_write_count()
+        if crawler.crawl_manager is not None:
+            scraped_count = crawler.get_scraped_count()
+            if error is None and len(crawler.get_visited_links()) == 0:
+                error = 'none of the pages could be visited'
+        if crawler.detection_strategy is not None and crawler.detection_strategy.successful():
+            origin = crawler.detection_strategy.get_result()['origin']
+    return {
+        'url': base_url,
+        'export_path': export_path,
+        'successful': error is None,
+        'scraped_count': scraped_count,
+        'failed_writes': failed_writes,  # pages are counted as scraped even if their files are not written
+        'origin': origin,
+        'error': error}
+
+
+def crawl_website(
+    export_path,
+    base_url,
+    options,
+    action_type,
+    scrape_option,
+    image_classifier,
+    scheduler=None,
+    driver_pool=None
+):
+    '''crawls the website and returns the result of the crawl'''
+    steps = _crawl_website_steps(
+        export_path, base_url, options, action_type, scrape_option, image_classifier, scheduler, driver_pool)
+    try:
+        crawler = _run_steps(steps)
+    except Exception as e:
+        print(f'ERROR: Crawling of {base_url!r} has failed (reason: {e!r})')
+        return crawl_result(base_url, export_path, error=repr(e))
+    return crawl_result(base_url, export_path, crawler)
+
+
+def crawl_websites(crawl_inputs, scheduler=None, driver_pool=None):
+    '''
+    Crawls several websites in the current thread by interleaving their pages.
+    The next page is always visited on the website whose host can be visited the soonest,
+    so the thread doesn't sleep while waiting for the crawl delay of one host.
+    Returns results of the crawls in the order of crawl inputs
+    '''
+    if scheduler is None:
+        scheduler = PolitenessScheduler()
+    results = [None] * len(crawl_inputs)
+    # crawl steps, currently active crawler (None if crawling has not started yet) and index of the input
+    crawls = [
+        [_crawl_website_steps(*crawl_input, scheduler=scheduler, driver_pool=driver_pool), None, idx]
+        for idx, crawl_input in enumerate(crawl_inputs)]
+    while crawls:
+        crawl = min(crawls, key=lambda c: 0 if c[1] is None else c[1].next_wait())
+        export_path, base_url = crawl_inputs[crawl[2]][:2]
+        try:
+            crawl[1] = next(crawl[0])
+        except StopIteration as stop:
+            crawls.remove(crawl)
+            results[crawl[2]] = crawl_result(base_url, export_path, stop.value)
+        except Exception as e:
+            # failure of one website doesn't stop crawling of the others
+            print(f'ERROR: Crawling of {base_url!r} has failed (reason: {e!r})')
+            crawls.remove(crawl)
+            results[crawl[2]] = crawl_result(base_url, export_path, error=repr(e))
+    return results
 
 
 @dataclass
@@ -106,6 +221,31 @@ class CrawlOptions:
     use_buffer: bool = False
     scraping: bool = True
     resolution: tuple = (constants.WIDTH, constants.HEIGHT)
+    resume: bool = False
+    checkpoint_interval: int = constants.CHECKPOINT_INTERVAL
+    visited_store: str = 'exact'
+    bloom_error_rate: float = constants.BLOOM_ERROR_RATE
+    compact_links: bool = False
+    engine: str = 'browser'
+    readiness: str = 'complete'
+    page_load_timeout: int = constants.PAGE_LOAD_TIMEOUT
+    max_retries: int = constants.MAX_RETRIES
+    breaker_threshold: int = constants.BREAKER_FAILURE_THRESHOLD
+    dead_host_action: str = 'drop'
+    preflight: bool = False
+    scaled_capture: bool = False  # screenshots for the classifier are captured at its input size
+    prediction_cache_size: int = 0  # predictions are not cached if 0 (opt-in)
+    prediction_cache_tolerance: int = constants.PREDICTION_CACHE_TOLERANCE
+    prediction_cache_dir: str = None  # cached predictions are not stored if None
+    url_gate: bool = False  # pages of url templates learned from the classifier results are not classified
+    url_gate_confidence: float = constants.URL_GATE_CONFIDENCE
+    url_gate_verification_rate: float = constants.URL_GATE_VERIFICATION_RATE
+    screenshot_format: str = 'png'
+    screenshot_quality: int = constants.SCREENSHOT_QUALITY
+    screenshot_max_width: int = None
+    screenshot_grayscale: bool = False
+    writer_threads: int = constants.WRITER_THREADS  # HTML and screenshots are written on the crawl thread if 0
+    blocked_resources: list = None  # resource types blocked in the browser, defaults for the action are used if None
 
     def increase(self, to_incr):
         for option, val in to_incr.items():
@@ -129,7 +269,13 @@ class Crawler:
         image_classifier=None,
         parent_out_file=None,
         parent_err_file=None,
-        is_subcrawler=False
+        is_subcrawler=False,
+        scheduler=None,
+        driver_pool=None,
+        web_driver=None,
+        circuit_breaker=None,
+        preflight=None,
+        writer=None
     ):
         self.skip_sublinks = False
         self.skip_first_page = False
@@ -142,6 +288,27 @@ class Crawler:
         self.options = options
         self.image_classifier = image_classifier
         self.is_subcrawler = is_subcrawler
+        self.scheduler = scheduler if scheduler is not None else PolitenessScheduler()
+        self.driver_pool = driver_pool
+        self._web_driver = web_driver  # subcrawler uses browser of the parent crawler
+        self._web_driver_lent = False
+        self.crawl_manager = None
+        self._state_store = None
+        self._pages_since_checkpoint = 0
+        self.error = None
+        self.retry_policy = RetryPolicy(max_retries=options.max_retries)
+        self.circuit_breaker = circuit_breaker
+        if circuit_breaker is None and options.breaker_threshold > 0:
+            self.circuit_breaker = CircuitBreaker(options.breaker_threshold)
+        self.preflight = preflight
+        if preflight is None and options.preflight:
+            self.preflight = ContentTypePreflight()
+        self.writer = writer  # subcrawler writes artifacts with the writer of the parent crawler
+        self.screenshot_encoding = ScreenshotEncoding(
+            options.screenshot_format,
+            options.screenshot_quality,
+            options.screenshot_max_width,
+            options.screenshot_grayscale)
         # prepare output files and directories
         self.export_path = export_path
         self._out_file = sys.stdout
@@ -181,16 +348,119 @@ class Crawler:
                   file=self._out_file)
             self.status = CrawlStatus.FINISHED
             return None
-        self.curr_page = self.crawl_manager.visit_next()
+        next_link = self.crawl_manager.peek_next()
+        if next_link is None:
+            # only links of the hosts that are down are left, so wait until one of them can be checked
+            time.sleep(self.crawl_manager.parked_wait())
+            return None
+        # wait until the host can be visited and visit the page
+        host = to_host(next_link.url)
+        self.scheduler.acquire(host, self.options.crawl_sleep)
+        try:
+            self.curr_page = self.crawl_manager.visit_next()
+        finally:
+            # failed visit can delay the next visit of the host more than usual
+            self.scheduler.release(host, max(self.options.crawl_sleep, self.crawl_manager.backoff))
         if self.curr_page is None:
             return None
         print(f'{self.curr_page.link.depth} {self.curr_page.link.url}', file=self._out_file, flush=True)
         return self.curr_page
 
+    def _reload_page(self):
+        '''loads the current page again, respecting the delays between visits of the host and the retry policy'''
+        host = to_host(self.curr_page.link.url)
+        attempt = 0
+        loaded = None
+        while loaded is None:
+            self.scheduler.acquire(host, self.options.crawl_sleep)
+            try:
+                loaded = self.crawl_manager.reload_curr_page(attempt)
+            finally:
+                self.scheduler.release(host, max(self.options.crawl_sleep, self.crawl_manager.backoff))
+            attempt += 1
+        return loaded
+
     def _visit_cleanup(self):
         self._out_file.flush()
         self._err_file.flush()
-        time.sleep(self.options.crawl_sleep)
+        self._pages_since_checkpoint += 1
+        if self._state_store is not None and self._pages_since_checkpoint >= self.options.checkpoint_interval:
+            self._checkpoint()
+        self._renew_web_driver()
+
+    def _renew_web_driver(self):
+        '''replaces the browser between pages if it has visited too many pages or uses too much memory'''
+        if self.is_subcrawler or self.driver_pool is None:
+            return
+        web_driver = self.driver_pool.renew(self._web_driver)
+        if web_driver is self._web_driver:
+            return
+        print('INFO: Browser is replaced with a new one', file=self._out_file)
+        self._web_driver = web_driver
+        self._web_driver.block_resources(self.options.blocked_resources or [])
+        self.crawl_manager.set_web_driver(web_driver)
+
+    def next_wait(self):
+        '''number of seconds until the next page can be visited'''
+        if self.crawl_manager is None:
+            return 0
+        next_link = self.crawl_manager.peek_next()
+        if next_link is None:
+            return self.crawl_manager.parked_wait()
+        return self.scheduler.wait_time(to_host(next_link.url))
+
+    def _open_state_store(self):
+        '''opens crawl state store and restores saved state if crawl is resumed. Returns False if saved crawl is finished'''
+        if self.is_subcrawler or not self.options.checkpoint_interval:
+            return True
+        path = os.path.join(self.export_path, constants.CRAWL_STATE_FILENAME)
+        try:
+            self._state_store = CrawlStateStore(path)
+        except sqlite3.Error as e:
+            print(f'ERROR: Cannot open crawl state at {path!r}, checkpoints are disabled (reason: {e!s})', file=self._err_file)
+            return True
+        if not self.options.resume:
+            self._state_store.clear()
+            return True
+        state = self._state_store.load(self._link_factory())
+        if state is None:
+            print(f'INFO: There is no saved crawl state at {path!r}, crawling from the beginning', file=self._out_file)
+            return True
+        if state['finished']:
+            print(f'INFO: Saved crawl state at {path!r} belongs to the finished crawl', file=self._out_file)
+            return False
+        self.crawl_manager.restore(state['links_to_visit'], state['visited_links'], state['scraped_count'])
+        if self.detection_strategy is not None:
+            self.detection_strategy.origin_candidates = state['origin_candidates']
+        print(f"INFO: Resumed crawling with {len(state['links_to_visit'])} links to visit",
+              f"and {len(state['visited_links'])} visited links",
+              file=self._out_file)
+        return True
+
+    def _checkpoint(self):
+        origin_candidates = None
+        if self.detection_strategy is not None:
+            origin_candidates = self.detection_strategy.origin_candidates
+        try:
+            self._state_store.save(
+                self.crawl_manager.get_unvisited_links(),
+                self.crawl_manager.get_visited_links(),
+                self.crawl_manager.get_scraped_count(),
+                origin_candidates,
+                finished=self.status == CrawlStatus.FINISHED)
+        except sqlite3.Error as e:
+            print(f'ERROR: Failed to save crawl state (reason: {e!s})', file=self._err_file)
+        self._pages_since_checkpoint = 0
+
+    def _close_state_store(self):
+        if self._state_store is None:
+            return
+        self._checkpoint()
+        self._state_store.close()
+        self._state_store = None
+
+    def _link_factory(self):
+        return CompactPageLink if self.options.compact_links else PageLink
 
     def _perform_detection_strategy(self):
         self.detection_strategy.analyse(self.curr_page, self.image_classifier, self.options.resolution)
@@ -219,19 +489,44 @@ class Crawler:
     def crawl(self, base_url, base_depth=0):
         if not self.is_subcrawler:
             print(f'INFO: Logs for {base_url!r} are located at {self.export_path!r}')
-        self._web_driver = setup_web_driver()
+        if self._web_driver is None or not self.is_subcrawler:
+            if self.driver_pool is not None:
+                self._web_driver = self.driver_pool.acquire()
+            else:
+                self._web_driver = setup_driver(
+                    self.options.engine, self.options.readiness, self.options.page_load_timeout)
+            self._web_driver.block_resources(self.options.blocked_resources or [])
+        if not self.is_subcrawler and self.writer is None and self.options.writer_threads > 0:
+            self.writer = ArtifactWriter(self.options.writer_threads, err_file=self._err_file)
+        if not self.is_subcrawler:
+            self._setup_prediction_cache(base_url)
         self.status = CrawlStatus.RUNNING
-        self.crawl_manager = CrawlManager(self._web_driver, base_url, self._out_file, self._err_file, base_depth=base_depth)
+        self.crawl_manager = CrawlManager(
+            self._web_driver,
+            base_url,
+            self._out_file,
+            self._err_file,
+            base_depth=base_depth,
+            visited_factory=functools.partial(create_visited_store, self.options.visited_store, self.options.bloom_error_rate),
+            link_factory=self._link_factory())
         self.crawl_manager.set_options(
             self.options.max_depth,
             self.options.max_pages,
             self.options.bump_relevant)
+        self.crawl_manager.set_retry(self.retry_policy, self.circuit_breaker, self.options.dead_host_action)
+        self.crawl_manager.set_preflight(self.preflight)
+        self.crawl_manager.set_scaled_capture(self.options.scaled_capture)
+        if not self._open_state_store():
+            self.status = CrawlStatus.FINISHED
         try:
-            while True:
+            while self.status != CrawlStatus.FINISHED:
                 self.skip_sublinks = False
                 current_page = self._visit_page()
-                if current_page is None or self.status == CrawlStatus.FINISHED:
+                if self.status == CrawlStatus.FINISHED:
                     break
+                if current_page is None:
+                    # page is not visited or it's not a text file, so continue with the next one
+                    continue
 
                 if self.detection_strategy is not None:
                     if self.detection_strategy.successful():
@@ -244,6 +539,12 @@ class Crawler:
                 else:
                     yield current_page.link
 
+                if self._web_driver_lent:
+                    # subcrawler has used the same browser, so the current page needs to be loaded again
+                    self._web_driver_lent = False
+                    if not self._reload_page():
+                        self.skip_sublinks = True
+
                 # execution will resume here so check status to find out if crawling should be finished or not
                 # note: caller might do something like performing action, which can lead to change of the
                 #       crawl status
@@ -253,38 +554,96 @@ class Crawler:
                 if not self.skip_sublinks:
                     self._queue_sublinks()
                 self._visit_cleanup()
+        except GeneratorExit:
+            # caller has stopped the crawling
+            self.status = CrawlStatus.FINISHED
+            raise
         except RemoteDisconnected as rde:
+            self.error = repr(rde)
             print(f'INFO: Interrupted. Exiting... ({rde!r})', file=self._err_file)
         except Exception as e:
+            self.error = repr(e)
             print(f'ERROR: {e!s}', file=self._err_file)
             print(f'{traceback.format_exc()}', file=self._err_file)
         finally:
+            self._close_state_store()
             if not self.is_subcrawler:
-                _close_everything(self._web_driver, self._out_file, self._err_file, self.export_path, self.options.use_buffer)
+                self._print_url_gate_summary()
+                self._close_prediction_cache()
+                _close_everything(
+                    self._web_driver,
+                    self._out_file,
+                    self._err_file,
+                    self.export_path,
+                    self.options.use_buffer,
+                    self.driver_pool,
+                    self.writer)
+                if self.preflight is not None:
+                    self.preflight.close()
                 print(f'INFO: Crawling of {base_url!r} is complete')
             else:
                 print(f'INFO: Subcrawling of {base_url!r} is complete')
 
+    def _setup_prediction_cache(self, base_url):
+        '''predictions are cached per website, since screenshots of different websites rarely look the same'''
+        if self.image_classifier is None or self.options.prediction_cache_size <= 0:
+            return
+        if isinstance(self.image_classifier, CachingClassifier):
+            self.image_classifier = self.image_classifier.classifier
+        path = None
+        if self.options.prediction_cache_dir is not None:
+            os.makedirs(self.options.prediction_cache_dir, exist_ok=True)
+            host = to_host(base_url)
+            path = os.path.join(self.options.prediction_cache_dir, f'{host}.json')
+        self.image_classifier = CachingClassifier(
+            self.image_classifier,
+            self.options.prediction_cache_size,
+            self.options.prediction_cache_tolerance,
+            path)
+
+    def _print_url_gate_summary(self):
+        gate = getattr(self.detection_strategy, 'gate', None)
+        if gate is not None:
+            print(
+                f'INFO: Pages decided by url: {gate.decided_count}, classified pages: {gate.classified_count}'
+                + f', url decisions rejected by verification: {gate.mismatch_count}',
+                file=self._out_file)
+
+    def _close_prediction_cache(self):
+        if isinstance(self.image_classifier, CachingClassifier):
+            cache = self.image_classifier
+            print(f'INFO: Reused predictions: {cache.hits}, classified screenshots: {cache.misses}', file=self._out_file)
+            cache.close()
+
     def create_subcrawler(self):
         options = copy.copy(self.options)
+        self._web_driver_lent = True
         return Crawler(
             options,
             self.export_path,
             parent_out_file=self._out_file,
             parent_err_file=self._err_file,
-            is_subcrawler=True)
+            is_subcrawler=True,
+            scheduler=self.scheduler,
+            driver_pool=self.driver_pool,
+            web_driver=self._web_driver,
+            circuit_breaker=self.circuit_breaker,
+            preflight=self.preflight,
+            writer=self.writer)
 
     def save(self, scrape_option):
         action = self.curr_page.scrape_page
         if scrape_option == ScrapeOption.ALL:
             args = {'export_path': self.export_path, 'scrape_option': ScrapeOption.ALL,
-                    'width': self.img_width, 'height': self.img_height}
+                    'width': self.img_width, 'height': self.img_height, 'writer': self.writer,
+                    'screenshot_encoding': self.screenshot_encoding}
         elif scrape_option == ScrapeOption.HTML:
             args = {'export_path': self.export_path, 'scrape_option': ScrapeOption.HTML,
-                    'width': self.img_width, 'height': self.img_height}
+                    'width': self.img_width, 'height': self.img_height, 'writer': self.writer}
         elif scrape_option == ScrapeOption.SCREENSHOT:
             args = {'export_path': self.export_path, 'scrape_option': ScrapeOption.SCREENSHOT,
-                    'width': self.img_width, 'height': self.img_height}
+                    'width': self.img_width, 'height': self.img_height, 'writer': self.writer,
+                    'screenshot_encoding': self.screenshot_encoding}
         else:
             return None
         return self._perform_action(action, args)
@@ -295,6 +654,10 @@ class Crawler:
     def get_links_to_visit(self):
         return self.crawl_manager.get_links_to_visit()
 
+    def get_failed_write_count(self):
+        '''number of files that the background writer has failed to write'''
+        return self.writer.failed_count if self.writer is not None else 0
+
     def get_scraped_count(self):
         return self.crawl_manager.get_scraped_count()
 
@@ -0,0 +1,157 @@
+import multiprocessing
+
+from multiprocessing.util import Finalize
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from profilescout.common.constants import ConstantsNamespace
+from profilescout.web.crawl import crawl_result, crawl_websites
+from profilescout.web.scheduler import PolitenessScheduler, to_host
+from profilescout.web.webdriver import WebDriverPool
+
+
+constants = ConstantsNamespace
+
+EXECUTORS = ['thread', 'process']
+
+# state of the worker process, created by the initializer and shared by all tasks of the worker
+_worker = dict()
+
+
+def shard_by_host(crawl_inputs, hosts_per_shard=1):
+    '''
+    Splits crawl inputs into shards, where inputs with the same host always end up in the same shard,
+    so delays between visits of the host are respected without coordination between processes
+    '''
+    inputs_by_host = dict()
+    for crawl_input in crawl_inputs:
+        inputs_by_host.setdefault(to_host(crawl_input[1]), []).append(crawl_input)
+    groups = list(inputs_by_host.values())
+    return [
+        [crawl_input for group in groups[i:i+hosts_per_shard] for crawl_input in group]
+        for i in range(0, len(groups), hosts_per_shard)]
+
+
+def _init_worker(
+        pool_size, max_live, host_rate, driver_max_pages, driver_max_rss, driver_factory, image_classifier_factory,
+        driver_warmup, started):
+    driver_pool = WebDriverPool(
+        pool_size, driver_max_pages, driver_max_rss, factory=driver_factory,
+        prewarm=pool_size if driver_warmup else 0, max_live=max_live)
+    # quit browsers when the worker process exits
+    Finalize(driver_pool, driver_pool.close, exitpriority=10)
+    _worker['driver_pool'] = driver_pool
+    _worker['scheduler'] = PolitenessScheduler(rate=host_rate)
+    _worker['image_classifier'] = image_classifier_factory() if image_classifier_factory is not None else None
+    _worker['started'] = started  # ids of the shards taken by the workers, used to find out which one crashed
+
+
+def _crawl_shard(shard_id, shard):
+    _worker['started'].put(shard_id)
+    image_classifier = _worker['image_classifier']
+    if image_classifier is not None:
+        shard = [crawl_input[:-1] + (image_classifier,) for crawl_input in shard]
+    return crawl_websites(shard, _worker['scheduler'], _worker['driver_pool'])
+
+
+def crawl_in_processes(
+    crawl_inputs,
+    workers,
+    sites_per_worker=1,
+    host_rate=None,
+    driver_max_pages=constants.DRIVER_MAX_PAGES,
+    driver_max_rss=None,
+    driver_factory=None,
+    image_classifier_factory=None,
+    driver_warmup=False
+):
+    '''
+    Crawls websites in worker processes, where each worker has its own browsers, scheduler and classifier.
+    Classifier can't be sent to other process, so each worker creates one with image_classifier_factory.
+    Both factories must be picklable, e.g. module-level functions or functools.partial of them.
+
+    Crash of a worker process breaks the whole pool, so unfinished shards are crawled again by a new pool.
+    Shards that were being crawled during the crash are crawled again one by one in their own pool,
+    so only the shard which crashes the worker again is reported as failed.
+    Returns results of the crawls in the order of crawl inputs
+    '''
+    if image_classifier_factory is not None:
+        crawl_inputs = [crawl_input[:-1] + (None,) for crawl_input in crawl_inputs]
+    # shards of input indices, so results can be returned in the order of crawl inputs
+    shards = [
+        [idx for idx, _ in shard]
+        for shard in shard_by_host([(idx, crawl_input[1]) for idx, crawl_input in enumerate(crawl_inputs)], sites_per_worker)]
+    results = [None] * len(crawl_inputs)
+    # all websites of the shard are crawled at once and each one uses its own browser,
+    # so shard with several websites of the same host needs more browsers than sites_per_worker
+    max_live = max([sites_per_worker] + [len(shard) for shard in shards])
+    initargs = (
+        sites_per_worker, max_live, host_rate, driver_max_pages, driver_max_rss, driver_factory, image_classifier_factory, driver_warmup)
+    pending = list(range(len(shards)))
+    suspects = set()  # shards that were being crawled when a worker has crashed
+    print('INFO: Waiting worker processes to complete...')
+    while pending:
+        batches = [[shard_id for shard_id in pending if shard_id not in suspects]]
+        batches += [[shard_id] for shard_id in pending if shard_id in suspects]
+        pending = []
+        for batch in [batch for batch in batches if batch]:
+            crashed, not_started = _run_shards(batch, shards, crawl_inputs, results, workers, initargs)
+            if not_started and not crashed:
+                # pool broke before any shard was started, e.g. the initializer has failed
+                for shard_id in not_started:
+                    _fail_shard(shards[shard_id], crawl_inputs, results, 'worker process could not be started')
+                continue
+            pending += not_started
+            for shard_id in crashed:
+                if shard_id not in suspects:
+                    suspects.add(shard_id)
+                    pending.append(shard_id)
+                else:
+                    _fail_shard(shards[shard_id], crawl_inputs, results, 'worker process has crashed')
+        if pending:
+            print(f'WARN: Worker process has crashed, {len(pending)} unfinished shard(s) are submitted again')
+    return results
+
+
+def _fail_shard(shard, crawl_inputs, results, error):
+    print(f'ERROR: Crawling of {len(shard)} website(s) has failed (reason: {error})')
+    for idx in shard:
+        export_path, base_url = crawl_inputs[idx][:2]
+        results[idx] = crawl_result(base_url, export_path, error=error)
+
+
+def _run_shards(shard_ids, shards, crawl_inputs, results, workers, initargs):
+    '''
+    crawls the shards in a new process pool and stores their results. Returns ids of the shards that
+    were being crawled when the pool broke and ids of the shards that were not started
+    '''
+    context = multiprocessing.get_context('spawn')
+    started = context.SimpleQueue()
+    broken = []
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(shard_ids)) if workers is not None else None,
+        # fork is not safe with threads of the browser driver and TensorFlow
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=initargs + (started,)
+    ) as executor:
+        futures = {
+            executor.submit(_crawl_shard, shard_id, [crawl_inputs[idx] for idx in shards[shard_id]]): shard_id
+            for shard_id in shard_ids}
+        for future in as_completed(futures):
+            shard_id = futures[future]
+            try:
+                shard_results = future.result()
+            except BrokenProcessPool:
+                broken.append(shard_id)
+                continue
+            except Exception as e:
+                _fail_shard(shards[shard_id], crawl_inputs, results, repr(e))
+                continue
+            for idx, result in zip(shards[shard_id], shard_results):
+                results[idx] = result
+    started_ids = set()
+    while not started.empty():
+        started_ids.add(started.get())
+    return [shard_id for shard_id in broken if shard_id in started_ids], [
+        shard_id for shard_id in broken if shard_id not in started_ids]
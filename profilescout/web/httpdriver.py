@@ -0,0 +1,321 @@
+import re
+import codecs
+import requests
+import functools
+
+from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
+
+from profilescout.__about__ import __version__
+from profilescout.common.constants import ConstantsNamespace
+from profilescout.common.wrappers import WebElementWrapper, WebDriverWrapper
+from profilescout.common.exceptions import WebDriverException
+from profilescout.web.webdriver import setup_web_driver
+
+try:
+    import lxml.html
+    from lxml.etree import ParserError, XPathError
+except ImportError:
+    lxml = None
+
+
+constants = ConstantsNamespace
+
+ENGINES = ['browser', 'hybrid']
+
+_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+# visible text of the body, without the text of scripts, styles and templates
+_VISIBLE_TEXT_XPATH = '//body//text()[not(ancestor::script or ancestor::style or ancestor::noscript or ancestor::template)]'
+
+# empty element in which the content is rendered by frameworks such as React, Vue, Next.js or Nuxt
+_EMPTY_APP_ROOT_XPATH = '''//body//*[(@id='root' or @id='app' or @id='__next' or @id='__nuxt')
+                                     and not(*) and not(normalize-space())]'''
+
+
+def _is_known_encoding(encoding):
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        return False
+    return True
+
+
+def _detect_encoding(response, content):
+    '''encoding from the Content-Type header, then from the meta tag, otherwise (or if it's unknown) utf-8'''
+    if 'charset' in response.headers.get('Content-Type', ''):
+        encoding = response.encoding
+    else:
+        match = _CHARSET_RE.search(content[:2048])
+        encoding = match.group(1).decode('ascii') if match else None
+    return encoding if encoding and _is_known_encoding(encoding) else 'utf-8'
+
+
+def _read_body(response, max_size):
+    '''reads at most max_size bytes of the body, the rest is not downloaded'''
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= max_size:
+            break
+    return b''.join(chunks)[:max_size]
+
+
+def create_session(pool_size=constants.HTTP_POOL_SIZE):
+    '''HTTP session that keeps up to pool_size connections per host alive'''
+    session = requests.Session()
+    session.headers['User-Agent'] = f'Mozilla/5.0 (compatible; profilescout/{__version__})'
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _to_web_driver_exception(e, url):
+    '''converts requests exception to WebDriverException with a message similar to the browser one'''
+    msg = str(e)
+    if isinstance(e, requests.exceptions.Timeout):
+        msg = f'net::ERR_CONNECTION_TIMED_OUT ({msg})'
+    elif isinstance(e, requests.exceptions.ConnectionError) and (
+            'NameResolutionError' in msg or 'Name or service not known' in msg or 'getaddrinfo failed' in msg):
+        msg = f'net::ERR_NAME_NOT_RESOLVED ({msg})'
+    elif isinstance(e, requests.exceptions.ConnectionError) and 'Connection refused' in msg:
+        msg = f'net::ERR_CONNECTION_REFUSED ({msg})'
+    elif isinstance(e, requests.exceptions.ConnectionError) and 'Connection reset' in msg:
+        msg = f'net::ERR_CONNECTION_RESET ({msg})'
+    return WebDriverException(f'cannot fetch {url!r}: {msg}')
+
+
+class HttpElement(WebElementWrapper):
+    '''Implementation of WebElementWrapper that wraps element of the parsed HTML'''
+
+    def __init__(self, element, base_url):
+        self.element = element
+        self._base_url = base_url
+
+    def get_attribute(self, name):
+        val = self.element.get(name)
+        if val is not None and name in ['href', 'src']:
+            # browser returns absolute url for these attributes
+            val = urljoin(self._base_url, val.strip())
+        return val
+
+    def find_elements_with_xpath(self, xpath):
+        return [HttpElement(el, self._base_url) for el in self.element.xpath(xpath)]
+
+    @property
+    def text(self):
+        return ' '.join(self.element.text_content().split())
+
+
+class HttpDriver(WebDriverWrapper):
+    '''
+    Implementation of WebDriverWrapper that fetches pages with HTTP client instead of the browser.
+
+    Connections are kept alive and reused, and responses are compressed, so it is much faster and lighter than
+    the browser, but scripts are not executed and screenshots can't be taken. Requires lxml
+    '''
+
+    def __init__(
+        self,
+        timeout=constants.HTTP_TIMEOUT,
+        pool_size=constants.HTTP_POOL_SIZE,
+        max_size=constants.HTTP_MAX_SIZE
+    ):
+        assert lxml is not None, 'lxml is required for fetching pages without browser'
+        self.timeout = timeout
+        self.max_size = max_size
+        self.page_count = 0
+        self._session = create_session(pool_size)
+        self._reset_page()
+
+    def _reset_page(self):
+        self.url = None
+        self.status_code = None
+        self._content_type = 'text/html'
+        self._html = ''
+        self._document = None
+
+    def get(self, url):
+        self.page_count += 1
+        self._reset_page()
+        try:
+            # body is downloaded only for HTML, so downloads like PDFs and videos are not fetched
+            with self._session.get(url, timeout=self.timeout, stream=True) as response:
+                self.url = response.url
+                self.status_code = response.status_code
+                content_type = response.headers.get('Content-Type', 'text/html')
+                self._content_type = content_type.split(';')[0].strip().lower()
+                if self._content_type not in ['text/html', 'application/xhtml+xml']:
+                    return
+                content = _read_body(response, self.max_size)
+        except requests.exceptions.RequestException as e:
+            raise _to_web_driver_exception(e, url)
+        self._html = content.decode(_detect_encoding(response, content), errors='replace')
+        try:
+            self._document = lxml.html.document_fromstring(self._html)
+        except (ParserError, ValueError):
+            self._document = None  # empty document
+
+    def looks_script_rendered(self):
+        '''whether the content of the current page is probably rendered by scripts'''
+        if self._document is None:
+            return self._content_type == 'text/html'
+        if self._document.xpath(_EMPTY_APP_ROOT_XPATH):
+            return True
+        visible_text = ''.join(self._document.xpath(_VISIBLE_TEXT_XPATH)).strip()
+        return len(visible_text) < constants.MIN_STATIC_TEXT_LENGTH and bool(self._document.xpath('//script'))
+
+    def _base_url(self):
+        base = self._document.xpath('//base/@href') if self._document is not None else []
+        return urljoin(self.url, base[0].strip()) if base else self.url
+
+    def get_screenshot_as_png(self):
+        raise WebDriverException('screenshot can not be taken without browser')
+
+    def save_screenshot(self, path):
+        raise WebDriverException('screenshot can not be taken without browser')
+
+    def get_screenshot_as_jpeg(self, scale=1, quality=95):
+        raise WebDriverException('screenshot can not be taken without browser')
+
+    def get_page_source(self):
+        return self._html
+
+    def find_elements_with_xpath(self, xpath):
+        if self._document is None:
+            return []
+        try:
+            elements = self._document.xpath(xpath)
+        except XPathError as e:
+            raise WebDriverException(f'invalid xpath {xpath!r}: {e!s}')
+        base_url = self._base_url()
+        return [HttpElement(el, base_url) for el in elements]
+
+    def execute_script(self, script):
+        '''scripts are not executed without browser, so None is returned'''
+        return None
+
+    def get_content_type(self):
+        return self._content_type
+
+    def set_window_size(self, width, height):
+        pass
+
+    def reset(self):
+        self._session.cookies.clear()
+        self._reset_page()
+
+    def quit(self):
+        self._session.close()
+
+
+class HybridDriver(WebDriverWrapper):
+    '''
+    Fetches pages with HttpDriver and loads them with the browser only when it is needed,
+    i.e. when the page looks script-rendered or when the screenshot is requested.
+    Browser is started on the first such page
+    '''
+
+    def __init__(self, http_driver=None, browser_factory=setup_web_driver):
+        self._http_driver = http_driver if http_driver is not None else HttpDriver()
+        self._browser_factory = browser_factory
+        self._browser = None
+        self._url = None
+        self._in_browser = False
+        self._window_size = None
+        self._blocked_resources = []
+
+    @property
+    def page_count(self):
+        # only the browser needs to be recycled after a number of pages
+        return self._browser.page_count if self._browser is not None else 0
+
+    def get_rss(self):
+        return self._browser.get_rss() if self._browser is not None else None
+
+    def _load_in_browser(self):
+        if self._in_browser:
+            return
+        if self._browser is None:
+            self._browser = self._browser_factory()
+            if self._window_size is not None:
+                self._browser.set_window_size(*self._window_size)
+            self._browser.block_resources(self._blocked_resources)
+        self._browser.get(self._url)
+        self._in_browser = True
+
+    def _active(self):
+        return self._browser if self._in_browser else self._http_driver
+
+    def get(self, url):
+        self._url = url
+        self._in_browser = False
+        self._http_driver.get(url)
+        if (
+            self._http_driver.status_code in constants.BROWSER_FALLBACK_STATUS
+            or self._http_driver.looks_script_rendered()
+        ):
+            self._load_in_browser()
+
+    def get_screenshot_as_png(self):
+        self._load_in_browser()
+        return self._browser.get_screenshot_as_png()
+
+    def save_screenshot(self, path):
+        self._load_in_browser()
+        return self._browser.save_screenshot(path)
+
+    def get_screenshot_as_jpeg(self, scale=1, quality=95):
+        self._load_in_browser()
+        return self._browser.get_screenshot_as_jpeg(scale, quality)
+
+    def get_page_source(self):
+        return self._active().get_page_source()
+
+    def find_elements_with_xpath(self, xpath):
+        return self._active().find_elements_with_xpath(xpath)
+
+    def execute_script(self, script):
+        return self._active().execute_script(script)
+
+    def get_content_type(self):
+        return self._active().get_content_type()
+
+    def set_window_size(self, width, height):
+        self._window_size = (width, height)
+        if self._browser is not None:
+            self._browser.set_window_size(width, height)
+
+    def block_resources(self, resource_types):
+        # page fetched over HTTP doesn't load any resources, so only the browser is affected
+        self._blocked_resources = resource_types
+        if self._browser is not None:
+            self._browser.block_resources(resource_types)
+
+    def reset(self):
+        self._http_driver.reset()
+        if self._browser is not None:
+            self._browser.reset()
+        self._url = None
+        self._in_browser = False
+
+    def quit(self):
+        self._http_driver.quit()
+        if self._browser is not None:
+            self._browser.quit()
+
+
+def setup_driver(engine='browser', readiness='complete', page_load_timeout=constants.PAGE_LOAD_TIMEOUT):
+    '''creates web driver for the given engine, readiness strategy and page load timeout are used by the browser'''
+    browser_factory = functools.partial(setup_web_driver, readiness, page_load_timeout)
+    if engine == 'browser':
+        return browser_factory()
+    if engine == 'hybrid':
+        if lxml is None:
+            print('WARN: lxml is not installed, browser is used for all pages')
+            return browser_factory()
+        return HybridDriver(HttpDriver(timeout=min(page_load_timeout, constants.HTTP_TIMEOUT)), browser_factory)
+    raise KeyError(f'provided value {engine!r} is not recognised as an engine')
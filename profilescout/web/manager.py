@@ -1,10 +1,15 @@
+import heapq
+import itertools
+
 from enum import Enum
 
 from profilescout.web.webpage import Webpage
 from profilescout.common.constants import ConstantsNamespace
 from profilescout.common.exceptions import WebDriverException, parse_web_driver_exception
-from profilescout.link.utils import PageLink, remove_duplicates, prioritize_relevant, to_abs_path
-from profilescout.link.utils import filter_out_invalid, filter_out_visited, filter_out_present_links, filter_out_long
+from profilescout.link.canonical import url_key
+from profilescout.link.utils import PageLink, UrlIndex, select_new_links, is_relevant, to_abs_path
+from profilescout.link.utils import filter_out_invalid, filter_out_long
+from profilescout.web.scheduler import to_host
 
 
 constants = ConstantsNamespace
@@ -12,49 +17,229 @@ constants = ConstantsNamespace
 CrawlStatus = Enum('CrawlStatus', ['NOT_STARTED', 'RUNNING', 'FINISHED'])
 
 
+class LinkFrontier:
+    '''
+    Priority queue of links that need to be visited.
+
+    Links are ordered by priority tier, then by depth and then by insertion order,
+    which keeps the BFS order within a tier. Removed links are only marked as removed
+    and skipped when they reach the top of the heap.
+    Links are indexed by url key, so urls with and without 'www' are considered the same.
+    '''
+
+    RELEVANT_TIER = 0
+    DEFAULT_TIER = 1
+
+    def __init__(self, page_links=(), bump_relevant=False):
+        self._heap = []
+        self._entries = dict()  # url key -> [tier, depth, seq, page_link]
+        self._counter = itertools.count()
+        self._bump_relevant = bump_relevant
+        self.extend(page_links)
+
+    def _tier(self, url):
+        if self._bump_relevant and is_relevant(url):
+            return LinkFrontier.RELEVANT_TIER
+        return LinkFrontier.DEFAULT_TIER
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, url):
+        return url_key(url) in self._entries
+
+    def keys(self):
+        return self._entries.keys()
+
+    def __iter__(self):
+        # iterate in insertion order, use 'to_list' to get links in visiting order
+        return (entry[-1] for entry in list(self._entries.values()))
+
+    def push(self, page_link, tier=None):
+        '''add link to the queue, returns False if the link is already queued with lower or same depth'''
+        key = url_key(page_link.url)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] <= page_link.depth:
+                return False
+            entry[-1] = None
+        if tier is None:
+            tier = self._tier(page_link.url)
+        entry = [tier, page_link.depth, next(self._counter), page_link]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+        return True
+
+    def extend(self, page_links):
+        for page_link in page_links:
+            self.push(page_link)
+
+    def _drop_removed(self):
+        while self._heap and self._heap[0][-1] is None:
+            heapq.heappop(self._heap)
+
+    def peek(self):
+        self._drop_removed()
+        if not self._heap:
+            return None
+        return self._heap[0][-1]
+
+    def pop(self):
+        self._drop_removed()
+        if not self._heap:
+            raise IndexError('pop from an empty frontier')
+        page_link = heapq.heappop(self._heap)[-1]
+        del self._entries[url_key(page_link.url)]
+        return page_link
+
+    def remove_where(self, predicate):
+        '''removes links for which the predicate is true and returns their number'''
+        return len(self.pop_where(predicate))
+
+    def pop_where(self, predicate):
+        '''removes links for which the predicate is true and returns them'''
+        removed = [entry[-1] for entry in list(self._entries.values()) if predicate(entry[-1])]
+        for page_link in removed:
+            self.remove(page_link.url)
+        return removed
+
+    def remove(self, url):
+        entry = self._entries.pop(url_key(url), None)
+        if entry is None:
+            return False
+        entry[-1] = None
+        return True
+
+    def clear(self):
+        self._heap = []
+        self._entries = dict()
+
+    def set_bump_relevant(self, bump_relevant):
+        if bump_relevant == self._bump_relevant:
+            return
+        self._bump_relevant = bump_relevant
+        for entry in self._entries.values():
+            entry[0] = self._tier(entry[-1].url)
+        self._heap = list(self._entries.values())
+        heapq.heapify(self._heap)
+
+    def to_list(self):
+        return [entry[-1] for entry in sorted(self._entries.values(), key=lambda entry: entry[:3])]
+
+
 class CrawlManager:
-    def __init__(self, web_driver, base_url, out_file, err_file, max_depth=3, max_pages=None, base_depth=0):
+    def __init__(
+        self,
+        web_driver,
+        base_url,
+        out_file,
+        err_file,
+        max_depth=3,
+        max_pages=None,
+        base_depth=0,
+        visited_factory=UrlIndex,
+        link_factory=PageLink
+    ):
         self._web_driver = web_driver
         self._base_url = base_url
         self._max_depth = max_depth
         self._max_pages = max_pages
         self._bump_relevant = False
+        self._visited_factory = visited_factory
+        self._link_factory = link_factory
 
-        page_link = PageLink(base_url, base_depth)
+        page_link = link_factory(base_url, base_depth)
         self.curr_page = Webpage(web_driver, page_link, out_file, err_file)
 
         self._scraped_count = 0
-        self._visited_links = set()
-        self._links_to_visit = [page_link]  # add base url as link that needs to be visited
+        self._visited_links = visited_factory()
+        self._in_progress_link = None  # link that is taken from the queue, but not visited yet
+        self._links_to_visit = LinkFrontier([page_link])  # add base url as link that needs to be visited
+        self._retry_policy = None
+        self._circuit_breaker = None
+        self._dead_host_action = 'drop'
+        self._attempts = dict()  # url -> number of retries
+        self._parked = dict()  # host -> links of the host that is down, which are deferred until it is checked
+        self._probes = dict()  # host -> url of the link which is visited to check if the host is up
+        self._preflight = None
+        self._scaled_capture = False
+        self.backoff = 0  # time to wait before the next visit of the host of the last visited link
 
         self._out_file = out_file
         self._err_file = err_file
 
+    def set_web_driver(self, web_driver):
+        '''replaces the browser, which is used from the next visited page'''
+        self._web_driver = web_driver
+
     def _set_curr_page(self, page_link):
-        self.curr_page = Webpage(self._web_driver, page_link, self._out_file, self._err_file)
+        self.curr_page = Webpage(self._web_driver, page_link, self._out_file, self._err_file, self._scaled_capture)
         return self.curr_page
 
     def has_next(self):
-        return len(self._links_to_visit) > 0
+        return len(self._links_to_visit) > 0 or len(self._parked) > 0
+
+    def peek_next(self):
+        '''returns the next link or None if all remaining links are deferred (see 'parked_wait')'''
+        self._release_probes()
+        return self._links_to_visit.peek()
+
+    def parked_wait(self):
+        '''number of seconds until the next host that is down can be checked'''
+        waits = [
+            self._circuit_breaker.retry_after(host)
+            for host in self._parked if host not in self._probes]
+        return min(waits, default=0)
 
     def clear_history(self, init_page=None):
         self._scraped_count = 0
-        self._visited_links = set()
+        self._visited_links = self._visited_factory()
+
+        link = init_page if init_page is not None else self.curr_page.link
+        self._links_to_visit = LinkFrontier([link], self._bump_relevant)
+        self._parked = dict()
+        self._probes = dict()
 
-        link = init_page if init_page is not None else self.curr_page
-        self._links_to_visit = [link]
+    def restore(self, links_to_visit, visited_links, scraped_count):
+        self._scraped_count = scraped_count
+        if isinstance(visited_links, list):
+            self._visited_links = self._visited_factory()
+            self._visited_links.update(visited_links)
+        else:
+            self._visited_links = visited_links
+        self._in_progress_link = None
+        self._links_to_visit = LinkFrontier(links_to_visit, self._bump_relevant)
+        self._parked = dict()
+        self._probes = dict()
 
     def mark_as_visited(self, urls, scraped_count):
+        '''marks urls as visited and returns the queue of links to visit (parked links excluded) and visited links'''
         self._scraped_count += scraped_count
-        self._visited_links.update(urls)
-        self._links_to_visit = [pl for pl in self._links_to_visit if pl.url not in urls]
+        self._visited_links.merge(urls)
+        try:
+            urls_iter = iter(urls)
+        except TypeError:
+            # compact visited stores can't list their urls
+            self._links_to_visit.remove_where(lambda page_link: page_link.url in urls)
+        else:
+            for url in urls_iter:
+                self._links_to_visit.remove(url)
+        self._prune_parked()
         return self._links_to_visit, self._visited_links
 
     def get_visited_links(self):
         return self._visited_links
 
     def get_links_to_visit(self):
-        return self._links_to_visit
+        parked_links = [page_link for page_links in self._parked.values() for page_link in page_links]
+        return self._links_to_visit.to_list() + parked_links
+
+    def get_unvisited_links(self):
+        '''links to visit including the link whose visit was interrupted'''
+        links = self.get_links_to_visit()
+        if self._in_progress_link is not None:
+            links.insert(0, self._in_progress_link)
+        return links
 
     def get_scraped_count(self):
         return self._scraped_count
@@ -63,6 +248,7 @@ class CrawlManager:
         self._max_depth = max_depth if max_depth is not None else self._max_depth
         self._max_pages = max_pages if max_pages is not None else self._max_pages
         self._bump_relevant = bump_relevant if bump_relevant is not None else self._bump_relevant
+        self._links_to_visit.set_bump_relevant(self._bump_relevant)
 
     def is_page_max_reached(self):
         if self._max_pages is not None and self._scraped_count == self._max_pages:
@@ -75,28 +261,165 @@ class CrawlManager:
             return True
         return False
 
+    def set_retry(self, retry_policy=None, circuit_breaker=None, dead_host_action='drop'):
+        '''
+        Sets the policy for retrying failed visits and the circuit breaker which stops visits of the hosts
+        that are down. Links of such hosts are either dropped or deferred until the host is checked again
+        '''
+        self._retry_policy = retry_policy
+        self._circuit_breaker = circuit_breaker
+        self._dead_host_action = dead_host_action
+
+    def set_preflight(self, preflight):
+        '''sets the preflight which checks the content type before the page is visited (see 'ContentTypePreflight')'''
+        self._preflight = preflight
+
+    def set_scaled_capture(self, scaled_capture):
+        '''whether screenshots for the classifier are captured at its input size (see 'Webpage.take_scaled_screenshot')'''
+        self._scaled_capture = scaled_capture
+        self.curr_page.scaled_capture = scaled_capture
+
+    def _park(self, host, page_links):
+        '''defers all links of the host until the circuit breaker allows a single visit to check it'''
+        page_links = page_links + self._links_to_visit.pop_where(lambda pl: to_host(pl.url) == host)
+        self._parked.setdefault(host, []).extend(page_links)
+        retry_after = self._circuit_breaker.retry_after(host)
+        print(f'INFO: Host {host!r} is down, {len(page_links)} link(s) are deferred for {retry_after:.0f}s',
+              file=self._out_file)
+
+    def _prune_parked(self):
+        '''removes visited links from the parked ones and forgets hosts without links or probe'''
+        for host in list(self._parked):
+            self._parked[host] = [pl for pl in self._parked[host] if pl.url not in self._visited_links]
+            if host in self._probes and self._probes[host] not in self._links_to_visit:
+                # probe is visited elsewhere, so the next parked link checks the host
+                del self._probes[host]
+            if not self._parked[host] and host not in self._probes:
+                del self._parked[host]
+
+    def _release_probes(self):
+        '''queues a single link of each host whose reset timeout has passed, the rest stays parked'''
+        for host, page_links in self._parked.items():
+            if host in self._probes or self._circuit_breaker.retry_after(host) > 0:
+                continue
+            if not page_links:
+                continue
+            probe = page_links.pop(0)
+            self._probes[host] = probe.url
+            self._links_to_visit.push(probe, LinkFrontier.RELEVANT_TIER)
+
+    def _resolve_probe(self, host, is_up):
+        '''queues all parked links of the host if it's up, otherwise drops them'''
+        self._probes.pop(host, None)
+        page_links = self._parked.pop(host, [])
+        if is_up:
+            self._links_to_visit.extend(page_links)
+            print(f'INFO: Host {host!r} is up again, {len(page_links)} deferred link(s) are queued', file=self._out_file)
+        else:
+            print(f'WARN: Host {host!r} is still down, {len(page_links) + 1} link(s) are dropped', file=self._out_file)
+
+    def _handle_dead_host(self, page_link, host):
+        if self._dead_host_action == 'defer':
+            self._probes.pop(host, None)
+            self._park(host, [page_link])
+            return
+        removed = self._links_to_visit.remove_where(lambda pl: to_host(pl.url) == host) + 1
+        print(f'WARN: Host {host!r} is down, {removed} link(s) are dropped', file=self._out_file)
+
+    def _handle_failure(self, page_link, host, reason):
+        attempt = self._attempts.pop(page_link.url, 0)
+        opened = self._circuit_breaker is not None and self._circuit_breaker.record_failure(host, reason)
+        if opened:
+            print(f'WARN: Visits of {host!r} are stopped after consecutive failures', file=self._out_file)
+        if self._probes.get(host) == page_link.url:
+            self._resolve_probe(host, not opened)
+            if opened:
+                return
+        elif opened and self._dead_host_action == 'defer':
+            self._park(host, [page_link])
+            return
+        if self._retry_policy is not None and self._retry_policy.should_retry(reason, attempt):
+            # queue the link again and delay the next visit of the host
+            self._attempts[page_link.url] = attempt + 1
+            self.backoff = self._retry_policy.delay(attempt)
+            self._links_to_visit.push(page_link)
+            print(f'INFO: Visit of {page_link.url} will be retried',
+                  f'(attempt: {attempt + 1}/{self._retry_policy.max_retries}, delay: {self.backoff:.1f}s)',
+                  file=self._out_file)
+        else:
+            print(f'WARN: {reason} {page_link.url}', file=self._out_file)
+
     def visit_next(self):
         # take next link from the queue and visit it
-        self._set_curr_page(self._links_to_visit.pop(0))
+        page_link = self._links_to_visit.pop()
+        host = to_host(page_link.url)
+        self.backoff = 0
+        is_probe = self._probes.get(host) == page_link.url
+        if host in self._parked and not is_probe:
+            # host is checked by the probe only, other links wait for its result
+            self._parked[host].append(page_link)
+            return None
+        if self._circuit_breaker is not None and not self._circuit_breaker.allow(host):
+            self._handle_dead_host(page_link, host)
+            return None
+        self._set_curr_page(page_link)
+        self._in_progress_link = self.curr_page.link
+
+        # skip pages that are not 'text/*' without loading them in the browser
+        # note: link that checks if the host is up is always visited
+        if self._preflight is not None and not is_probe and not self._preflight.is_text(page_link.url):
+            self._visited_links.add(page_link.url)
+            self._in_progress_link = None
+            self._attempts.pop(page_link.url, None)
+            return None
 
         # visit page
         try:
             is_text_file = self.curr_page.visit()
         except WebDriverException as e:
+            self._in_progress_link = None
             err_msg, reason = parse_web_driver_exception(e, self.curr_page.link.url)
             print(f'ERROR: {err_msg} (reason: {reason})', file=self._err_file)
-            print(f'WARN: {reason} {self.curr_page.link.url}', file=self._out_file)
-            # skip this url
+            self._handle_failure(page_link, host, reason)
             return None
 
         # mark link as visited
         self._visited_links.add(self.curr_page.link.url)
+        self._in_progress_link = None
+        self._attempts.pop(page_link.url, None)
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.record_success(host)
+        if is_probe:
+            self._resolve_probe(host, True)
 
         # if content-type is not 'text/*' then ignore it
         if not is_text_file:
             return None
         return self.curr_page
 
+    def reload_curr_page(self, attempt=0):
+        '''
+        loads the current page again, e.g. after its browser was used for other pages. Returns whether
+        the page is loaded or None if the load has failed and can be retried after 'backoff' seconds
+        '''
+        host = to_host(self.curr_page.link.url)
+        self.backoff = 0
+        if self._circuit_breaker is not None and not self._circuit_breaker.allow(host):
+            return False
+        try:
+            self.curr_page.visit()
+        except WebDriverException as e:
+            err_msg, reason = parse_web_driver_exception(e, self.curr_page.link.url)
+            print(f'ERROR: {err_msg} (reason: {reason})', file=self._err_file)
+            opened = self._circuit_breaker is not None and self._circuit_breaker.record_failure(host, reason)
+            if not opened and self._retry_policy is not None and self._retry_policy.should_retry(reason, attempt):
+                self.backoff = self._retry_policy.delay(attempt)
+                return None
+            return False
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.record_success(host)
+        return True
+
     def increase_count(self):
         self._scraped_count += 1
         return self._scraped_count
@@ -115,27 +438,24 @@ class CrawlManager:
         # extract URLs
         if not links_from_structure or not hasattr(self, '_previous_links'):
             self._previous_links = []
-        hops = self.curr_page.extract_links(self._base_url, include_fragment, links_from_structure,  self._previous_links)
+        hops = self.curr_page.extract_links(
+            self._base_url, include_fragment, links_from_structure, self._previous_links, self._link_factory)
         self._previous_links = [hop.url for hop in hops]
 
         # transform extracted URLs, as some of them may be invalid or irrelevant
-        hops_with_abs_path = [PageLink(
+        hops_with_abs_path = [self._link_factory(
                 to_abs_path(pl.url, self.curr_page.link.url),
                 pl.depth,
                 pl.parent_url,
                 pl.txt)
             for pl in hops]
         valid = filter_out_invalid(hops_with_abs_path, self._base_url)
-        valid_not_visited = filter_out_visited(valid, self._visited_links)
-        new_links = filter_out_present_links(valid_not_visited, self._links_to_visit)
-        new_links = filter_out_long(new_links, self._err_file)
-        new_links = remove_duplicates(new_links)
+        new_links = filter_out_long(valid, self._err_file)
+        # remove duplicates, visited links and links that are already in the queue
+        new_links = select_new_links(new_links, self._visited_links, self._links_to_visit)
         if link_filters != []:
             for link_filter in link_filters:
                 new_links = filter(link_filter, new_links)
         self._links_to_visit.extend(new_links)
 
-        if self._bump_relevant:
-            self._links_to_visit = prioritize_relevant(self._links_to_visit)
-
         return self._links_to_visit
@@ -0,0 +1,93 @@
+import re
+import requests
+
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from profilescout.common.constants import ConstantsNamespace
+from profilescout.link.utils import replace_param_vals
+from profilescout.web.httpdriver import create_session
+
+
+constants = ConstantsNamespace
+
+# servers that don't implement HEAD usually respond with one of these
+_HEAD_NOT_SUPPORTED_STATUS = [405, 501]
+
+# extensions of the static files, whose content type doesn't depend on the name of the file
+_STATIC_EXTENSIONS = set(constants.INVALID_EXTENSIONS).union(*constants.RESOURCE_EXTENSIONS.values())
+
+
+def to_url_pattern(url):
+    '''
+    Pattern of the URLs that are expected to have the same content type. Numbers in the path and values
+    of the query parameters are replaced, and so is the name of the static file,
+    e.g. 'https://example.com/2023/files/report.pdf?v=2' -> 'example.com/#/files/*.pdf?v=####'.
+    Names of the scripts are kept, since scripts in the same directory can return different content,
+    e.g. 'view.php' a page and 'get.php' a document
+    '''
+    parts = urlsplit(url)
+    directory, _, name = parts.path.rpartition('/')
+    ext = re.search(r'\.(\w{1,5})$', name)
+    if ext is not None and ext.group(1).lower() in _STATIC_EXTENSIONS:
+        name = f'*.{ext.group(1).lower()}'
+    pattern = parts.netloc.lower() + re.sub(r'\d+', '#', f'{directory}/{name}')
+    if parts.query:
+        pattern += replace_param_vals(f'?{parts.query}')
+    return pattern
+
+
+class ContentTypePreflight:
+    '''
+    Checks the content type of the page with HEAD request before the browser visits it,
+    so downloads are not loaded by the browser. If the server doesn't support HEAD, the first
+    byte of the page is requested instead. Content types are cached per URL pattern (see 'to_url_pattern')
+    '''
+
+    def __init__(
+        self,
+        timeout=constants.PREFLIGHT_TIMEOUT,
+        pool_size=constants.HTTP_POOL_SIZE,
+        cache_size=constants.PREFLIGHT_CACHE_SIZE
+    ):
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.request_count = 0
+        self._session = create_session(pool_size)
+        self._cache = OrderedDict()  # url pattern -> content type
+
+    def _fetch_content_type(self, url):
+        self.request_count += 1
+        response = self._session.head(url, timeout=self.timeout, allow_redirects=True)
+        if response.status_code in _HEAD_NOT_SUPPORTED_STATUS or 'Content-Type' not in response.headers:
+            with self._session.get(
+                    url, headers={'Range': 'bytes=0-0'}, timeout=self.timeout, stream=True) as response:
+                pass
+        if response.status_code >= 400 or 'Content-Type' not in response.headers:
+            return None
+        return response.headers['Content-Type'].split(';')[0].strip().lower()
+
+    def content_type(self, url):
+        '''content type of the page, None if it can't be determined'''
+        pattern = to_url_pattern(url)
+        if pattern in self._cache:
+            self._cache.move_to_end(pattern)
+            return self._cache[pattern]
+        try:
+            content_type = self._fetch_content_type(url)
+        except requests.exceptions.RequestException:
+            content_type = None
+        if content_type is not None:
+            # errors are not cached, since they can be temporary
+            self._cache[pattern] = content_type
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return content_type
+
+    def is_text(self, url):
+        '''whether the page should be visited, i.e. its content type is 'text/*' or unknown'''
+        content_type = self.content_type(url)
+        return content_type is None or content_type.startswith('text')
+
+    def close(self):
+        self._session.close()
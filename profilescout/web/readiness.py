@@ -0,0 +1,116 @@
+import json
+import time
+
+from profilescout.common.constants import ConstantsNamespace
+
+
+constants = ConstantsNamespace
+
+READINESS_STRATEGIES = ['complete', 'dom', 'network-idle', 'fixed']
+
+
+class ReadinessStrategy:
+    '''
+    Decides when the page is ready for extraction. Browser returns from the navigation
+    according to page_load_strategy and then the strategy waits for the rest, if needed
+    '''
+
+    page_load_strategy = 'normal'
+
+    def configure(self, options):
+        '''configures the browser options before the browser is started'''
+        options.page_load_strategy = self.page_load_strategy
+
+    def before_load(self, driver):
+        pass
+
+    def wait(self, driver, timeout):
+        pass
+
+
+class DocumentComplete(ReadinessStrategy):
+    '''page is ready once 'document.readyState' is 'complete', i.e. after the load event'''
+
+    page_load_strategy = 'normal'
+
+
+class DomContentLoaded(ReadinessStrategy):
+    '''page is ready once the HTML is parsed, images and other resources might still be loading'''
+
+    page_load_strategy = 'eager'
+
+
+class FixedWait(ReadinessStrategy):
+    '''page is ready after the fixed time passes from DOMContentLoaded'''
+
+    page_load_strategy = 'eager'
+
+    def __init__(self, wait_time=constants.FIXED_READY_WAIT, sleep=time.sleep):
+        self.wait_time = wait_time
+        self._sleep = sleep
+
+    def wait(self, driver, timeout):
+        self._sleep(min(self.wait_time, timeout))
+
+
+class NetworkIdle(ReadinessStrategy):
+    '''
+    Page is ready once there were no pending network requests for idle_time seconds, which is useful for
+    pages rendered by scripts. Requests are tracked through the network events of the DevTools protocol
+    that are written to the performance log of the browser
+    '''
+
+    page_load_strategy = 'eager'
+
+    def __init__(
+        self,
+        idle_time=constants.NETWORK_IDLE_TIME,
+        poll_interval=constants.NETWORK_IDLE_POLL_INTERVAL,
+        clock=time.monotonic,
+        sleep=time.sleep
+    ):
+        self.idle_time = idle_time
+        self.poll_interval = poll_interval
+        self._clock = clock
+        self._sleep = sleep
+
+    def configure(self, options):
+        super().configure(options)
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+    def before_load(self, driver):
+        # drop events of the previous page
+        driver.get_log('performance')
+
+    def wait(self, driver, timeout):
+        pending = set()
+        deadline = self._clock() + timeout
+        idle_since = self._clock()
+        while self._clock() < deadline:
+            for entry in driver.get_log('performance'):
+                message = json.loads(entry['message'])['message']
+                method = message.get('method')
+                request_id = message.get('params', {}).get('requestId')
+                if method == 'Network.requestWillBeSent':
+                    pending.add(request_id)
+                elif method in ['Network.loadingFinished', 'Network.loadingFailed']:
+                    pending.discard(request_id)
+                else:
+                    continue
+                idle_since = self._clock()
+            if not pending and self._clock() - idle_since >= self.idle_time:
+                return True
+            self._sleep(self.poll_interval)
+        return False
+
+
+def create_readiness_strategy(name='complete'):
+    if name == 'complete':
+        return DocumentComplete()
+    if name == 'dom':
+        return DomContentLoaded()
+    if name == 'network-idle':
+        return NetworkIdle()
+    if name == 'fixed':
+        return FixedWait()
+    raise KeyError(f'provided value {name!r} is not recognised as a readiness strategy')
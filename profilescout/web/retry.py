@@ -0,0 +1,107 @@
+import time
+import random
+import threading
+
+from profilescout.common.constants import ConstantsNamespace
+
+
+constants = ConstantsNamespace
+
+DEAD_HOST_ACTIONS = ['drop', 'defer']
+
+
+class RetryPolicy:
+    '''
+    Decides if the failed visit should be retried and how long to wait before the next attempt.
+    Only errors with retryable reasons (see 'parse_web_driver_exception') are retried and the delay
+    grows exponentially with each attempt. Half of the delay is random, so retries don't happen at the same time
+    '''
+
+    def __init__(
+        self,
+        max_retries=constants.MAX_RETRIES,
+        base_delay=constants.RETRY_BASE_DELAY,
+        max_delay=constants.RETRY_MAX_DELAY,
+        retryable_reasons=constants.RETRYABLE_REASONS,
+        rng=random.random
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable_reasons = retryable_reasons
+        self._rng = rng
+
+    def should_retry(self, reason, attempt):
+        '''attempt is the number of retries that have already been made'''
+        return attempt < self.max_retries and reason in self.retryable_reasons
+
+    def delay(self, attempt):
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay / 2 + self._rng() * delay / 2
+
+
+class CircuitBreaker:
+    '''
+    Stops visits of the host after a number of consecutive failures which indicate that the host is down.
+
+    Once the circuit is open, the host is not visited until reset timeout passes. After that, a single visit
+    is allowed and the circuit is closed if it succeeds or opened again if it fails
+    '''
+
+    def __init__(
+        self,
+        failure_threshold=constants.BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=constants.BREAKER_RESET_TIMEOUT,
+        failure_reasons=constants.HOST_FAILURE_REASONS,
+        clock=time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_reasons = failure_reasons
+        self._clock = clock
+        self._failures = dict()  # host -> number of consecutive failures
+        self._opened_at = dict()  # host -> time
+        self._probing = set()  # hosts with open circuit which are visited once again
+        self._lock = threading.Lock()
+
+    def is_open(self, host):
+        with self._lock:
+            return host in self._opened_at
+
+    def retry_after(self, host):
+        '''number of seconds until the host can be visited again'''
+        with self._lock:
+            if host not in self._opened_at:
+                return 0
+            return max(0, self._opened_at[host] + self.reset_timeout - self._clock())
+
+    def allow(self, host):
+        with self._lock:
+            if host not in self._opened_at:
+                return True
+            if host in self._probing or self._clock() - self._opened_at[host] < self.reset_timeout:
+                return False
+            self._probing.add(host)
+            return True
+
+    def record_success(self, host):
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+            self._probing.discard(host)
+
+    def record_failure(self, host, reason):
+        '''records the failure and returns True if the circuit is opened'''
+        with self._lock:
+            if reason not in self.failure_reasons:
+                # host has responded, so failures are not consecutive anymore
+                # and the next visit can check if it's still down
+                self._failures.pop(host, None)
+                self._probing.discard(host)
+                return False
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if host in self._probing or self._failures[host] >= self.failure_threshold:
+                self._probing.discard(host)
+                self._opened_at[host] = self._clock()
+                return True
+            return False
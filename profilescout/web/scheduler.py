@@ -0,0 +1,83 @@
+import time
+import threading
+
+from urllib.parse import urlsplit
+
+
+def to_host(url):
+    try:
+        return urlsplit(url).hostname or ''
+    except ValueError:
+        return ''
+
+
+class PolitenessScheduler:
+    '''
+    Keeps track of the next allowed visit time for each host.
+
+    After a page is visited, the host can't be visited again until the delay passes, but the
+    crawler is free to do anything else in the meantime (e.g. process the page or visit other hosts).
+    Optionally, the number of visits per second is limited for each host with a token bucket.
+    Scheduler is thread-safe, so it can be shared by all crawlers.
+    '''
+
+    def __init__(self, rate=None, burst=1, clock=time.monotonic, sleep=time.sleep):
+        assert rate is None or rate > 0, 'rate must be greater then 0'
+        self._rate = rate
+        self._burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._next_allowed = dict()  # host -> time
+        self._in_flight = dict()  # host -> delay, for hosts whose visit is not released yet
+        self._buckets = dict()  # host -> (tokens, time of update)
+        self._lock = threading.Condition()
+
+    def _tokens(self, host, now):
+        tokens, updated = self._buckets.get(host, (self._burst, now))
+        return min(self._burst, tokens + (now - updated) * self._rate)
+
+    def _wait_time(self, host, now):
+        if host in self._in_flight:
+            # visit can take any time, so the delay after it is the best estimate
+            return self._in_flight[host]
+        wait = max(0, self._next_allowed.get(host, now) - now)
+        if wait == 0 and self._rate is not None:
+            tokens = self._tokens(host, now)
+            if tokens < 1:
+                wait = (1 - tokens) / self._rate
+        return wait
+
+    def wait_time(self, host):
+        '''returns number of seconds until the host can be visited'''
+        with self._lock:
+            return self._wait_time(host, self._clock())
+
+    def acquire(self, host, delay=0):
+        '''
+        Blocks until the host can be visited and reserves the host until the visit is released,
+        so other crawlers wait for the release and the delay after it. Returns time spent waiting
+        '''
+        waited = 0
+        while True:
+            with self._lock:
+                if host in self._in_flight:
+                    started = self._clock()
+                    self._lock.wait()
+                    waited += self._clock() - started
+                    continue
+                now = self._clock()
+                wait = self._wait_time(host, now)
+                if wait <= 0:
+                    self._in_flight[host] = delay
+                    if self._rate is not None:
+                        self._buckets[host] = (self._tokens(host, now) - 1, now)
+                    return waited
+            self._sleep(wait)
+            waited += wait
+
+    def release(self, host, delay):
+        '''marks the end of the visit, the host can be visited again after the delay'''
+        with self._lock:
+            self._in_flight.pop(host, None)
+            self._next_allowed[host] = self._clock() + delay
+            self._lock.notify_all()
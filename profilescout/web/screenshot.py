@@ -0,0 +1,53 @@
+from io import BytesIO
+from dataclasses import dataclass
+from PIL import Image, features
+
+from profilescout.common.constants import ConstantsNamespace
+
+
+constants = ConstantsNamespace
+
+SCREENSHOT_FORMATS = ['png', 'webp', 'jpeg']
+
+
+def is_format_supported(format):
+    '''whether the installed Pillow can encode the format, WebP and JPEG depend on optional libraries'''
+    if format == 'png':
+        return True
+    return features.check('webp' if format == 'webp' else 'jpg')
+
+
+@dataclass(frozen=True)
+class ScreenshotEncoding:
+    '''Format in which screenshots are stored, PNG captured by the browser is stored as is by default'''
+
+    format: str = 'png'
+    quality: int = constants.SCREENSHOT_QUALITY  # ignored for PNG
+    max_width: int = None  # screenshot is downscaled to this width, keeping the aspect ratio
+    grayscale: bool = False
+
+    def __post_init__(self):
+        assert self.format in SCREENSHOT_FORMATS, f'expected one of {SCREENSHOT_FORMATS}, but recieved: {self.format!r}'
+
+    @property
+    def extension(self):
+        return 'jpg' if self.format == 'jpeg' else self.format
+
+    def is_identity(self):
+        return self.format == 'png' and self.max_width is None and not self.grayscale
+
+    def encode(self, png):
+        '''converts PNG bytes captured by the browser to bytes of the selected format'''
+        if self.is_identity():
+            return png
+        with BytesIO(png) as buffer:
+            image = Image.open(buffer)
+            # JPEG doesn't support transparency
+            image = image.convert('L' if self.grayscale else 'RGB')
+        if self.max_width is not None and image.width > self.max_width:
+            height = max(1, round(image.height * self.max_width / image.width))
+            image = image.resize((self.max_width, height), Image.LANCZOS)
+        options = {'optimize': True} if self.format == 'png' else {'quality': self.quality}
+        with BytesIO() as buffer:
+            image.save(buffer, format=self.format.upper(), **options)
+            return buffer.getvalue()
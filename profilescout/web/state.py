@@ -0,0 +1,96 @@
+import json
+import pickle
+import sqlite3
+import itertools
+
+from profilescout.link.utils import PageLink, UrlIndex
+
+
+class CrawlStateStore:
+    '''
+    Persistent state of the crawl stored in SQLite database.
+
+    Links to visit are rewritten on every checkpoint, while visited links are only appended,
+    so checkpoint cost depends on the size of the queue and number of newly visited links.
+    Compact visited stores (hashed set, Bloom filter) can't list their urls, so they are pickled instead.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._saved_visited_count = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript('''
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS links_to_visit (
+                seq INTEGER PRIMARY KEY,
+                url TEXT NOT NULL,
+                depth INTEGER NOT NULL,
+                parent_url TEXT,
+                txt TEXT);
+            CREATE TABLE IF NOT EXISTS visited_links (
+                seq INTEGER PRIMARY KEY,
+                url TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS visited_store (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                data BLOB NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL);
+        ''')
+
+    def clear(self):
+        with self._conn:
+            self._conn.execute('DELETE FROM links_to_visit')
+            self._conn.execute('DELETE FROM visited_links')
+            self._conn.execute('DELETE FROM visited_store')
+            self._conn.execute('DELETE FROM meta')
+        self._saved_visited_count = 0
+
+    def save(self, links_to_visit, visited_links, scraped_count, origin_candidates=None, finished=False):
+        new_visited = []
+        visited_blob = None
+        if isinstance(visited_links, UrlIndex):
+            # visited links keep insertion order, so only the ones added after the last checkpoint are stored
+            new_visited = itertools.islice(visited_links, self._saved_visited_count, None)
+            new_visited = [(url,) for url in new_visited]
+        else:
+            visited_blob = pickle.dumps(visited_links, protocol=pickle.HIGHEST_PROTOCOL)
+        meta = {
+            'scraped_count': str(scraped_count),
+            'origin_candidates': json.dumps(origin_candidates or dict()),
+            'finished': json.dumps(finished)}
+        with self._conn:
+            self._conn.execute('DELETE FROM links_to_visit')
+            self._conn.executemany(
+                'INSERT INTO links_to_visit (url, depth, parent_url, txt) VALUES (?, ?, ?, ?)',
+                ((pl.url, pl.depth, pl.parent_url, pl.txt) for pl in links_to_visit))
+            self._conn.executemany('INSERT INTO visited_links (url) VALUES (?)', new_visited)
+            if visited_blob is not None:
+                self._conn.execute('INSERT OR REPLACE INTO visited_store (id, data) VALUES (0, ?)', (visited_blob,))
+            self._conn.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', meta.items())
+        self._saved_visited_count += len(new_visited)
+
+    def load(self, link_factory=PageLink):
+        '''returns saved state as a dict or None if nothing was saved'''
+        meta = dict(self._conn.execute('SELECT key, value FROM meta'))
+        if 'scraped_count' not in meta:
+            return None
+        links_to_visit = [
+            link_factory(url, depth, parent_url, txt)
+            for url, depth, parent_url, txt
+            in self._conn.execute('SELECT url, depth, parent_url, txt FROM links_to_visit ORDER BY seq')]
+        visited_links = [url for url, in self._conn.execute('SELECT url FROM visited_links ORDER BY seq')]
+        self._saved_visited_count = len(visited_links)
+        visited_blob = self._conn.execute('SELECT data FROM visited_store').fetchone()
+        if visited_blob is not None:
+            visited_links = pickle.loads(visited_blob[0])
+        return {
+            'links_to_visit': links_to_visit,
+            'visited_links': visited_links,
+            'scraped_count': int(meta['scraped_count']),
+            'origin_candidates': json.loads(meta['origin_candidates']),
+            'finished': json.loads(meta['finished'])}
+
+    def close(self):
+        self._conn.close()
@@ -1,22 +1,51 @@
+import queue
+import base64
 import platform
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import (
     StaleElementReferenceException as SeleniumStaleElementReferenceException,
+    TimeoutException as SeleniumTimeoutException,
     WebDriverException as SeleniumWebDriverException)
 
 from profilescout.common.constants import ConstantsNamespace
 from profilescout.common.wrappers import WebElementWrapper, WebDriverWrapper
 from profilescout.common.exceptions import StaleElementReferenceException, WebDriverException
+from profilescout.web.readiness import create_readiness_strategy
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
 
 
 constants = ConstantsNamespace
 
+RESOURCE_TYPES = list(constants.RESOURCE_EXTENSIONS.keys()) + ['third-party']
+
+
+def to_blocked_url_patterns(resource_types):
+    '''converts resource types to url patterns for the browser, '*' matches any sequence of characters'''
+    patterns = []
+    for resource_type in resource_types:
+        if resource_type == 'third-party':
+            patterns += [f'*://*{domain}/*' for domain in constants.THIRD_PARTY_DOMAINS]
+            continue
+        for ext in constants.RESOURCE_EXTENSIONS[resource_type]:
+            patterns += [f'*.{ext}', f'*.{ext}?*']
+    return patterns
 
-def setup_web_driver():
+
+def setup_web_driver(readiness='complete', page_load_timeout=constants.PAGE_LOAD_TIMEOUT):
+    '''readiness is the name of the strategy that decides when the loaded page is ready for extraction'''
+    readiness_strategy = create_readiness_strategy(readiness)
     # create a new Chrome browser instance Options
     options = webdriver.ChromeOptions()
+    readiness_strategy.configure(options)
 
     # disable file downloads
     null_path = '/dev/null'  # assume that program is run on Unix-like OS
@@ -51,10 +80,11 @@ def setup_web_driver():
         service=Service(),
         options=options)
 
-    # wait for the page to fully load
-    web_driver.implicitly_wait(constants.IMPL_WAIT_FOR_FULL_LOAD)
+    # readiness of the page is handled by the strategy, so queries that find nothing return immediately
+    web_driver.implicitly_wait(0)
+    web_driver.set_page_load_timeout(page_load_timeout)
 
-    return WebDriver(web_driver)
+    return WebDriver(web_driver, readiness_strategy, page_load_timeout)
 
 
 class WebElement(WebElementWrapper):
@@ -80,12 +110,27 @@ class WebElement(WebElementWrapper):
 class WebDriver(WebDriverWrapper):
     """Implementation of WebDriverWrapper that wraps WebDriver."""
 
-    def __init__(self, driver):
+    def __init__(self, driver, readiness_strategy=None, page_load_timeout=constants.PAGE_LOAD_TIMEOUT):
         self._driver = driver
+        self._readiness_strategy = readiness_strategy if readiness_strategy is not None else create_readiness_strategy()
+        self.page_load_timeout = page_load_timeout
+        self.page_count = 0
+        self._initial_size = driver.get_window_size()
+        self._window_size = (self._initial_size['width'], self._initial_size['height'])
 
     def get(self, url):
+        self.page_count += 1
         try:
-            return self._driver.get(url)
+            self._readiness_strategy.before_load(self._driver)
+            try:
+                self._driver.get(url)
+            except SeleniumTimeoutException as e:
+                # continue with the content that is loaded so far
+                try:
+                    self._driver.execute_script('window.stop();')
+                except SeleniumWebDriverException:
+                    raise WebDriverException(f'net::ERR_CONNECTION_TIMED_OUT ({e.msg})')
+            self._readiness_strategy.wait(self._driver, self.page_load_timeout)
         except SeleniumWebDriverException as e:
             raise WebDriverException.from_webdriver_exception(e)
 
@@ -95,6 +140,17 @@ class WebDriver(WebDriverWrapper):
     def save_screenshot(self, path):
         return self._driver.save_screenshot(path)
 
+    def get_screenshot_as_jpeg(self, scale=1, quality=95):
+        '''viewport is captured already scaled by the browser, which is much cheaper than scaling the full PNG'''
+        try:
+            viewport = self._driver.execute_cdp_cmd('Page.getLayoutMetrics', {})['cssLayoutViewport']
+            clip = {'x': 0, 'y': 0, 'width': viewport['clientWidth'], 'height': viewport['clientHeight'], 'scale': scale}
+            screenshot = self._driver.execute_cdp_cmd(
+                'Page.captureScreenshot', {'format': 'jpeg', 'quality': quality, 'clip': clip})
+        except SeleniumWebDriverException as e:
+            raise WebDriverException.from_webdriver_exception(e)
+        return base64.b64decode(screenshot['data'])
+
     def get_page_source(self):
         return self._driver.page_source
 
@@ -102,10 +158,192 @@ class WebDriver(WebDriverWrapper):
         return [WebElement(el) for el in self._driver.find_elements(By.XPATH, xpath)]
 
     def execute_script(self, script):
-        return self._driver.execute_script(script)
+        try:
+            return self._driver.execute_script(script)
+        except SeleniumWebDriverException as e:
+            raise WebDriverException.from_webdriver_exception(e)
+
+    def get_content_type(self):
+        return self._driver.execute_script('return document.contentType')
 
     def set_window_size(self, width, height):
-        return self._driver.set_window_size(width, height)
+        # resizing makes the browser lay out and render the page again
+        if self._window_size == (width, height):
+            return
+        self._driver.set_window_size(width, height)
+        self._window_size = (width, height)
+
+    def block_resources(self, resource_types):
+        self._driver.execute_cdp_cmd('Network.enable', {})
+        self._driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': to_blocked_url_patterns(resource_types)})
 
     def quit(self):
         self._driver.quit()
+
+    def reset(self):
+        '''clears cookies, storage and cache of all origins, extra windows, and restores initial window size'''
+        try:
+            self._driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': '*', 'storageTypes': 'all'})
+        except SeleniumWebDriverException:
+            # storage of other origins can't be cleared without DevTools
+            try:
+                self._driver.execute_script('try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}')
+            except SeleniumWebDriverException:
+                pass
+        self._driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+        handles = self._driver.window_handles
+        for handle in handles[1:]:
+            self._driver.switch_to.window(handle)
+            self._driver.close()
+        self._driver.switch_to.window(handles[0])
+        self._driver.delete_all_cookies()
+        self._driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        self._driver.get('about:blank')
+        self._driver.set_window_size(self._initial_size['width'], self._initial_size['height'])
+        self._window_size = (self._initial_size['width'], self._initial_size['height'])
+
+    def get_rss(self):
+        '''memory used by the browser and its driver in MB, None if it can't be determined'''
+        if psutil is None:
+            return None
+        try:
+            process = psutil.Process(self._driver.service.process.pid)
+            processes = [process] + process.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes) / 2**20
+        except (psutil.Error, AttributeError):
+            return None
+
+
+class WebDriverPool:
+    '''
+    Pool of warm headless browsers that are leased to crawlers.
+
+    The browser is reset when it's returned to the pool, so the next website starts with a clean state.
+    The browser is replaced after it visits max_pages pages or uses more than max_rss MB of memory,
+    either when it's returned or between pages of the website (see 'renew').
+    At most 'size' browsers are kept idle and 'prewarm' of them are started when the pool is created.
+    If all browsers are leased, new ones are created, up to max_live browsers in total. Number of
+    browsers is not limited if max_live is None, otherwise acquire blocks until a browser is released
+    '''
+
+    def __init__(self, size, max_pages=constants.DRIVER_MAX_PAGES, max_rss=None, factory=None, prewarm=0, max_live=None):
+        assert max_live is None or max_live >= size, 'max number of live browsers must not be less than the pool size'
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss = max_rss
+        self.max_live = max_live
+        self._factory = factory if factory is not None else setup_web_driver
+        self._idle = queue.LifoQueue()
+        self._leased = set()
+        self._live = 0
+        self._lock = threading.Condition()
+        if max_rss is not None and psutil is None:
+            print('WARN: psutil is not installed, memory limit for browsers is ignored')
+        self._prewarm(min(prewarm, size))
+
+    def _prewarm(self, count):
+        '''starts the browsers in parallel, since most of the startup time is spent waiting for the browser'''
+        if count <= 0:
+            return
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [executor.submit(self._create) for _ in range(count)]
+        for future in futures:
+            try:
+                self._idle.put(future.result())
+            except Exception as e:
+                print(f'WARN: Failed to start the browser in advance (reason: {e!r})')
+
+    def _create(self):
+        with self._lock:
+            self._live += 1
+        try:
+            return self._factory()
+        except Exception:
+            self._discard(None)
+            raise
+
+    def _discard(self, web_driver):
+        '''quits the browser and lets the waiting crawler create a new one'''
+        with self._lock:
+            self._live -= 1
+            self._lock.notify()
+        if web_driver is not None:
+            web_driver.quit()
+
+    def acquire(self):
+        while True:
+            try:
+                web_driver = self._idle.get_nowait()
+                break
+            except queue.Empty:
+                pass
+            with self._lock:
+                if self.max_live is not None and self._live >= self.max_live:
+                    # wait for a browser to be released or quitted
+                    self._lock.wait(timeout=1)
+                    continue
+            web_driver = self._create()
+            break
+        with self._lock:
+            self._leased.add(web_driver)
+        return web_driver
+
+    def _should_recycle(self, web_driver):
+        if self.max_pages is not None and getattr(web_driver, 'page_count', 0) >= self.max_pages:
+            return True
+        if self.max_rss is not None and hasattr(web_driver, 'get_rss'):
+            rss = web_driver.get_rss()
+            return rss is not None and rss > self.max_rss
+        return False
+
+    def renew(self, web_driver):
+        '''
+        returns a new browser instead of the leased one if the leased one needs to be recycled,
+        so browsers of long crawls are replaced between pages of the same website
+        '''
+        if not self._should_recycle(web_driver):
+            return web_driver
+        with self._lock:
+            self._leased.discard(web_driver)
+        self._discard(web_driver)
+        new_web_driver = self._create()
+        with self._lock:
+            self._leased.add(new_web_driver)
+        return new_web_driver
+
+    def release(self, web_driver):
+        with self._lock:
+            self._leased.discard(web_driver)
+        if self._idle.qsize() >= self.size or self._should_recycle(web_driver):
+            self._discard(web_driver)
+            return
+        try:
+            web_driver.reset()
+        except Exception:
+            # browser is in a bad state, replace it
+            self._discard(web_driver)
+        else:
+            self._idle.put(web_driver)
+            with self._lock:
+                self._lock.notify()
+
+    @contextmanager
+    def lease(self):
+        web_driver = self.acquire()
+        try:
+            yield web_driver
+        finally:
+            self.release(web_driver)
+
+    def close(self):
+        '''quits idle browsers and the ones that are still leased'''
+        with self._lock:
+            leased = list(self._leased)
+            self._leased.clear()
+        for web_driver in leased:
+            self._discard(web_driver)
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
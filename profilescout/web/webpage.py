@@ -1,5 +1,5 @@
 import os
-import time
+import numpy as np
 
 from enum import Enum
 from PIL import Image
@@ -8,7 +8,9 @@ from io import BytesIO
 from profilescout.common.exceptions import WebDriverException, StaleElementReferenceException
 from profilescout.common.constants import ConstantsNamespace
 from profilescout.common.interfaces import ImageProfileClassifier
+from profilescout.link.canonical import canonicalize
 from profilescout.link.utils import PageLink, is_valid, to_file_path
+from profilescout.web.screenshot import ScreenshotEncoding
 
 
 constants = ConstantsNamespace
@@ -24,6 +26,51 @@ WebpageActionType = Enum(
 ScrapeOption = Enum('ScrapeOption', ['ALL', 'HTML', 'SCREENSHOT'])
 
 
+def default_blocked_resources(action_type, scrape_option):
+    '''resource types that are not needed for the action, e.g. images and fonts are needed only for screenshots'''
+    blocked = ['media', 'third-party']
+    takes_screenshot = (
+        action_type in [WebpageActionType.SCRAPE_PROFILES, WebpageActionType.FIND_ORIGIN]
+        or scrape_option in [ScrapeOption.ALL, ScrapeOption.SCREENSHOT])
+    if not takes_screenshot:
+        blocked += ['image', 'font', 'stylesheet']
+    return blocked
+
+
+ALL_LINKS_XPATH = '//a[@href]'
+
+# links inside of structures (e.g. lists and tables) which are not part of the header, footer or navigation
+STRUCTURED_LINKS_XPATH = '''//*[self::table or self::ol or self::ul or self::section]//a[@href
+                                and not(ancestor::header or ancestor::footer or ancestor::nav)
+                                and not(ancestor::div[contains(@id, 'footer')])
+                                and not(ancestor::div[contains(@id, 'nav')])
+                                and not(ancestor::div[contains(@id, 'navigation')])
+                                and not(ancestor::div[contains(@class, 'footer')])
+                                and not(ancestor::div[contains(@class, 'nav')])
+                                and not(ancestor::div[contains(@class, 'navigation')])
+                                and not(ancestor::div[contains(@role, 'footer')])
+                                and not(ancestor::div[contains(@role, 'nav')])
+                                and not(ancestor::div[contains(@role, 'navigation')])
+                            ]'''
+
+# returns [href, text, structured] for every link on the page in a single call to the browser, where
+# 'structured' tells if the link is matched by STRUCTURED_LINKS_XPATH, while all links are matched by ALL_LINKS_XPATH
+HARVEST_LINKS_SCRIPT = '''
+    const isExcludedDiv = (div) => ['id', 'class', 'role'].some((name) => {
+        const val = div.getAttribute(name) || '';
+        return val.includes('footer') || val.includes('nav');
+    });
+    return Array.from(document.querySelectorAll('a[href]'), (a) => {
+        let structured = a.closest('table, ol, ul, section') !== null && a.closest('header, footer, nav') === null;
+        for (let el = a.parentElement; structured && el !== null; el = el.parentElement) {
+            structured = !(el.tagName === 'DIV' && isExcludedDiv(el));
+        }
+        const href = typeof a.href === 'string' ? a.href : a.getAttribute('href');
+        return [href, a.innerText, structured];
+    });
+'''
+
+
 class ActionResult:
     def __init__(self, successful, val=None, msg=''):
         self.successful = successful
@@ -32,30 +79,30 @@ class ActionResult:
 
 
 class Webpage:
-    def __init__(self, web_driver, page_link, out_file, err_file):
+    def __init__(self, web_driver, page_link, out_file, err_file, scaled_capture=False):
         self._web_driver = web_driver
         self.link = page_link
         self._out_file = out_file
         self._err_file = err_file
+        self.scaled_capture = scaled_capture  # capture at input size of the classifier (see 'take_scaled_screenshot')
+        self._clear_artifacts()
 
-    def visit(self):
-        # navigate to the web page you want to capture
-        try:
-            self._web_driver.get(self.link.url)
-        except WebDriverException:
-            # if not successful, retry after RETRY_TIME seconds
-            time.sleep(constants.RETRY_TIME)
+    def _clear_artifacts(self):
+        # screenshot of the current visit is shared by the classifier and the exporter
+        self._screenshot_size = None
+        self._screenshot_png = None
+        self._screenshot_image = None
 
-            try:
-                self._web_driver.get(self.link.url)
-            except WebDriverException as e:
-                raise e  # TODO
+    def visit(self):
+        self._clear_artifacts()
+        # navigate to the web page you want to capture, retries are handled by the caller (see 'RetryPolicy')
+        self._web_driver.get(self.link.url)
 
         # pause videos that have autoplay set to true
         pause_ap_script = 'videos = document.querySelectorAll("video"); for(video of videos) {video.pause()}'
         self._web_driver.execute_script(pause_ap_script)
 
-        content_type = self._web_driver.execute_script("return document.contentType")
+        content_type = self._web_driver.get_content_type()
 
         if content_type.startswith('text'):
             return True
@@ -68,17 +115,66 @@ class Webpage:
         source_txt_tag = f'<profilescout>Source text:{self.link.txt}</profilescout>\n'
         return f'{source_url_tag}\n{source_txt_tag}\n{html}'
 
+    def get_screenshot_as_png(self, width=constants.WIDTH, height=constants.HEIGHT):
+        '''screenshot of the current page, the page is captured only once per visit and resolution'''
+        if self._screenshot_png is None or self._screenshot_size != (width, height):
+            self._web_driver.set_window_size(width, height)
+            self._screenshot_png = self._web_driver.get_screenshot_as_png()
+            self._screenshot_size = (width, height)
+            self._screenshot_image = None
+        return self._screenshot_png
+
     def take_screenshot(self, width=constants.WIDTH, height=constants.HEIGHT):
         '''takes screenshot of current page and returns image as byte array'''
+        png = self.get_screenshot_as_png(width, height)
+
+        if self._screenshot_image is None:
+            with BytesIO(png) as screenshot_bytes:
+                self._screenshot_image = Image.open(screenshot_bytes).convert("RGB")
+
+        return ActionResult(True, self._screenshot_image, 'Image is stored in a buffer')
+
+    def _write(self, path, content, writer=None, encode=None):
+        '''writes content to the file, in background if the writer is provided (see 'ArtifactWriter')'''
+        if writer is not None:
+            writer.write(path, content, encode)
+            return True
+        try:
+            if encode is not None:
+                content = encode(content)
+            with open(path, 'wb' if isinstance(content, bytes) else 'w') as f:
+                f.write(content)
+        except Exception as e:
+            print(f'ERROR: Failed to write {path!r} (reason: {e!s})', file=self._err_file)
+            return False
+        return True
+
+    def take_scaled_screenshot(self, width, height, target_width, target_height):
+        '''
+        takes screenshot of the page laid out at width x height, which is scaled by the browser
+        so it covers at least target_width x target_height, and returns it as grayscale uint8 array
+        '''
         self._web_driver.set_window_size(width, height)
+        scale = min(1, max(target_width / width, target_height / height))
+        jpeg = self._web_driver.get_screenshot_as_jpeg(scale, constants.SCALED_CAPTURE_QUALITY)
 
-        # take a screenshot of the entire web page and store it in buffer
-        screenshot_bytes = BytesIO(self._web_driver.get_screenshot_as_png())  # TODO close
-        image = Image.open(screenshot_bytes).convert("RGB")
+        with BytesIO(jpeg) as screenshot_bytes:
+            image = Image.open(screenshot_bytes)
+            # JPEG is decoded directly to grayscale, without RGB copy
+            image.draft('L', image.size)
+            array = np.asarray(image if image.mode == 'L' else image.convert('L'))
 
-        return ActionResult(True, image, 'Image is stored in a buffer')
+        return ActionResult(True, array, 'Image is stored in an array')
 
-    def scrape_page(self, export_path, scrape_option, width=constants.WIDTH, height=constants.HEIGHT):
+    def scrape_page(
+        self,
+        export_path,
+        scrape_option,
+        width=constants.WIDTH,
+        height=constants.HEIGHT,
+        writer=None,
+        screenshot_encoding=ScreenshotEncoding()
+    ):
         successful = True
         result = {'html': None, 'screenshot': None}
         self._web_driver.set_window_size(width, height)
@@ -88,12 +184,13 @@ class Webpage:
             path = to_file_path(
                 self.link.url,
                 os.path.join(export_path, 'screenshots'),
-                constants.IMG_EXT,
+                screenshot_encoding.extension,
                 self._err_file)
             if path is None:
                 return ActionResult(False, 'Failed to craft valid storing path for the screenshot')
             result['screenshot'] = path
-            successful = self._web_driver.save_screenshot(path)
+            encode = None if screenshot_encoding.is_identity() else screenshot_encoding.encode
+            successful = self._write(path, self.get_screenshot_as_png(width, height), writer, encode)
 
         if scrape_option in [ScrapeOption.ALL, ScrapeOption.HTML]:
             # save html as a file
@@ -105,9 +202,7 @@ class Webpage:
             if path is None:
                 return ActionResult(False, 'Failed to craft valid storing path for the html')
             result['html'] = path
-            html = self.get_html()
-            with open(path, 'w') as f:
-                f.write(html)
+            successful = self._write(path, self.get_html(), writer) and successful
 
         return ActionResult(successful, result)
 
@@ -123,7 +218,11 @@ class Webpage:
                 height = kwargs['height']
             elif len(args) > 1:
                 height = args[1]
-            result = self.take_screenshot(width, height)
+            input_size = getattr(classifier, 'input_size', None)
+            if self.scaled_capture and input_size is not None:
+                result = self.take_scaled_screenshot(width, height, *input_size)
+            else:
+                result = self.take_screenshot(width, height)
             if not result.successful:
                 return ActionResult(False, 'Inference was not successfully performed')
             img_bytes = result.val
@@ -134,29 +233,29 @@ class Webpage:
 
         return ActionResult(True, profile_detected, 'Inference was successfully performed')
 
-    def extract_links(self, base_url, include_fragment=False, from_structure=False, previous_links=[]):
-        page_links = []
-        urls = []
-        xpath = '//a[@href]'
-        if from_structure:
-            xpath = '''//*[self::table or self::ol or self::ul or self::section]//a[@href
-                            and not(ancestor::header or ancestor::footer or ancestor::nav)
-                            and not(ancestor::div[contains(@id, 'footer')])
-                            and not(ancestor::div[contains(@id, 'nav')])
-                            and not(ancestor::div[contains(@id, 'navigation')])
-                            and not(ancestor::div[contains(@class, 'footer')])
-                            and not(ancestor::div[contains(@class, 'nav')])
-                            and not(ancestor::div[contains(@class, 'navigation')])
-                            and not(ancestor::div[contains(@role, 'footer')])
-                            and not(ancestor::div[contains(@role, 'nav')])
-                            and not(ancestor::div[contains(@role, 'navigation')])
-                        ]'''
+    def _harvest_links(self, from_structure=False):
+        '''
+        returns (href, text) pairs of the links with a single script execution
+        or None if the script can't be executed
+        '''
+        try:
+            harvested = self._web_driver.execute_script(HARVEST_LINKS_SCRIPT)
+        except WebDriverException as e:
+            print(f'WARN: Links of "{self.link.url}" are not harvested with the script (reason: {e!s})',
+                  file=self._err_file)
+            return None
+        if harvested is None:
+            return None
+        return [(href, txt) for href, txt, structured in harvested if structured or not from_structure]
+
+    def _find_links(self, from_structure=False):
+        '''returns (href, text) pairs of the links found with xpath, attributes are read element by element'''
+        links = []
+        xpath = STRUCTURED_LINKS_XPATH if from_structure else ALL_LINKS_XPATH
         a_tags = self._web_driver.find_elements_with_xpath(xpath)
         for a_tag in a_tags:
-            href = ''
             try:
-                href = a_tag.get_attribute('href').strip()
-                txt = a_tag.text
+                links.append((a_tag.get_attribute('href'), a_tag.text))
             except StaleElementReferenceException:
                 print(f'ERROR: One of the links to visit next, "{self.link.url}",',
                       'is skipped (reason: stale element)',
@@ -165,22 +264,25 @@ class Webpage:
                 print(f'ERROR: One of the links to visit next, "{self.link.url}",',
                       f'is skipped (reason: {str(e)})',
                       file=self._err_file)
-            else:
-                idx = href.find('?nocache')
-                if idx != -1:
-                    href = href[:idx]
-
-                if not include_fragment:
-                    # remove fragment
-                    frag_idx = href.find('#')
-                    if frag_idx != -1:
-                        href = href[:frag_idx]
-
-                if href not in urls and is_valid(href, base_url):
-                    urls.append(href)
-                    page_link = PageLink(href, self.link.depth+1, self.link.url, txt)
-                    if from_structure and page_link.url in previous_links:
-                        continue
-                    page_links += [page_link]
+        return links
+
+    def extract_links(self, base_url, include_fragment=False, from_structure=False, previous_links=[], link_factory=PageLink):
+        page_links = []
+        urls = set()
+        links = self._harvest_links(from_structure)
+        if links is None:
+            links = self._find_links(from_structure)
+        for href, txt in links:
+            if not href:
+                continue
+            # remove '?nocache' part and fragment (if it's not included) and normalize url
+            href = canonicalize(href.strip(), include_fragment)
+
+            if href not in urls and is_valid(href, base_url):
+                urls.add(href)
+                page_link = link_factory(href, self.link.depth+1, self.link.url, txt)
+                if from_structure and page_link.url in previous_links:
+                    continue
+                page_links += [page_link]
 
         return page_links
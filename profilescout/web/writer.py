@@ -0,0 +1,70 @@
+import sys
+import queue
+import threading
+
+from profilescout.common.constants import ConstantsNamespace
+
+
+constants = ConstantsNamespace
+
+
+class ArtifactWriter:
+    '''
+    Writes artifacts of the pages (e.g. HTML and screenshots) to files in background threads,
+    so the crawler can visit the next page right away. Queue of pending writes is bounded,
+    so the crawler is blocked if it produces artifacts faster than they are written
+    '''
+
+    def __init__(self, threads=constants.WRITER_THREADS, max_pending=constants.WRITER_QUEUE_SIZE, err_file=sys.stderr):
+        assert threads > 0, 'number of writer threads must be greater then 0'
+        self.err_file = err_file
+        self.failed_count = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(threads)]
+        for thread in self._threads:
+            thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            path = None
+            try:
+                if item is None:
+                    return
+                path, content, encode = item
+                if encode is not None:
+                    content = encode(content)
+                with open(path, 'wb' if isinstance(content, bytes) else 'w') as f:
+                    f.write(content)
+            except Exception as e:
+                # thread must keep consuming the queue, otherwise writes and close would block forever
+                with self._lock:
+                    self.failed_count += 1
+                target = repr(path) if path is not None else f'invalid item of type {type(item).__name__}'
+                print(f'ERROR: Failed to write {target} (reason: {e!s})', file=self.err_file)
+            finally:
+                self._queue.task_done()
+
+    def write(self, path, content, encode=None):
+        '''
+        queues content (str or bytes) to be written to the path, blocks while the queue is full.
+        If encode is provided, content is replaced with encode(content) by the writer thread
+        '''
+        assert not self._closed, 'writer is closed'
+        self._queue.put((path, content, encode))
+
+    def flush(self):
+        '''blocks until all queued artifacts are written'''
+        self._queue.join()
+
+    def close(self):
+        '''writes the remaining artifacts and stops the threads'''
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
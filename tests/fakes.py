@@ -0,0 +1,34 @@
+from context import profilescout  # noqa: F401
+from profilescout.common.exceptions import WebDriverException
+
+
+class FakeClock:
+    '''clock which is moved only by sleep or by setting the time, used instead of time.monotonic and time.sleep'''
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FailingDriver:
+    '''driver whose page visits fail with the given error messages'''
+
+    def __init__(self, errors):
+        self.errors = errors
+        self.visited = []
+
+    def get(self, url):
+        self.visited.append(url)
+        if self.errors:
+            raise WebDriverException(self.errors.pop(0))
+
+    def execute_script(self, script):
+        return None
+
+    def get_content_type(self):
+        return 'text/html'
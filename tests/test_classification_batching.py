@@ -0,0 +1,57 @@
+import threading
+import pytest
+
+from context import profilescout
+from profilescout.classification.batching import BatchingClassifier
+
+
+class FakeClassifier:
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    def predict_batch(self, images):
+        if self.error is not None:
+            raise self.error
+        self.batches.append(list(images))
+        return [image % 2 == 0 for image in images]
+
+
+@pytest.fixture
+def classifier():
+    return FakeClassifier()
+
+
+class TestBatchingClassifier:
+    def test_images_from_threads_are_batched(self, classifier):
+        batching = BatchingClassifier(classifier, max_batch_size=4, max_latency=5)
+        results = dict()
+        threads = [
+            threading.Thread(target=lambda i=i: results.update({i: batching.predict(i, None, None)}))
+            for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        batching.close()
+        assert results == {i: i % 2 == 0 for i in range(8)}
+        assert [len(batch) for batch in classifier.batches] == [4, 4]
+
+    def test_batch_is_classified_after_max_latency(self, classifier):
+        batching = BatchingClassifier(classifier, max_batch_size=100, max_latency=0.01)
+        assert batching.predict(2) is True
+        assert batching.predict_batch([1, 4]) == [False, True]
+        batching.close()
+        assert classifier.batches == [[2], [1, 4]]
+
+    def test_queued_images_are_classified_on_close(self, classifier):
+        batching = BatchingClassifier(classifier, max_batch_size=100, max_latency=60)
+        futures = [batching.submit(i) for i in range(3)]
+        batching.close()
+        assert [future.result(timeout=1) for future in futures] == [True, False, True]
+
+    def test_error_is_set_on_futures(self):
+        batching = BatchingClassifier(FakeClassifier(error=RuntimeError('model failed')), max_latency=0)
+        with pytest.raises(RuntimeError, match='model failed'):
+            batching.predict(1)
+        batching.close()
@@ -0,0 +1,119 @@
+import pytest
+
+import numpy as np
+
+from PIL import Image
+
+from context import profilescout
+from profilescout.classification.cache import CachingClassifier, dhash, hamming_distance
+
+
+class FakeClassifier:
+    input_size = (36, 48)
+
+    def __init__(self):
+        self.images = []
+
+    def predict(self, image, width, height, channels=3, verbose=0):
+        self.images.append(image)
+        return float(np.asarray(image).mean()) > 100
+
+
+def gradient(width=64, height=48, offset=0):
+    row = np.linspace(0, 200, width, dtype=np.uint8) + offset
+    return np.tile(row, (height, 1))
+
+
+def page(body):
+    '''screenshot with the header and the footer shared by the pages of the website'''
+    screenshot = np.full((96, 64), 255, dtype=np.uint8)
+    screenshot[:16] = 40
+    screenshot[-16:] = 80
+    screenshot[16:-16] = body
+    return screenshot
+
+
+def listing_page():
+    body = np.full((64, 64), 255, dtype=np.uint8)
+    body[::8, 4:60] = 0  # rows with the names
+    return body
+
+
+def profile_page():
+    body = np.full((64, 64), 255, dtype=np.uint8)
+    body[8:40, 4:28] = 120  # photo
+    body[8:12, 32:60] = 0  # name
+    return body
+
+
+@pytest.fixture
+def classifier():
+    return FakeClassifier()
+
+
+class TestDhash:
+    def test_same_image_in_different_formats(self):
+        array = gradient()
+        assert dhash(array) == dhash(Image.fromarray(array).convert('RGB'))
+        assert dhash(array) == dhash(array[..., np.newaxis])
+
+    def test_different_images(self):
+        assert hamming_distance(dhash(gradient()), dhash(gradient()[:, ::-1])) == 64
+
+
+class TestCachingClassifier:
+    def test_prediction_is_reused(self, classifier):
+        cache = CachingClassifier(classifier)
+        assert cache.predict(gradient(), 640, 480) == cache.predict(gradient(offset=1), 640, 480)
+        assert len(classifier.images) == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert cache.input_size == (36, 48)
+
+    def test_tolerance(self, classifier):
+        first, second = gradient(), gradient()
+        second[:, 30:34] = 0
+        distance = hamming_distance(dhash(first), dhash(second))
+        assert distance > 0
+        for tolerance, model_calls in [(distance - 1, 2), (distance, 1)]:
+            classifier.images.clear()
+            cache = CachingClassifier(classifier, tolerance=tolerance)
+            cache.predict(first)
+            cache.predict(second)
+            assert len(classifier.images) == model_calls
+
+    def test_pages_with_the_same_layout(self, classifier):
+        listing, profile = page(listing_page()), page(profile_page())
+        assert dhash(listing) != dhash(profile)
+        cache = CachingClassifier(classifier)
+        cache.predict(listing)
+        cache.predict(profile)
+        assert len(classifier.images) == 2
+
+    def test_least_recently_used_is_evicted(self, classifier):
+        cache = CachingClassifier(classifier, max_size=2, tolerance=0)
+        images = [gradient(), gradient()[:, ::-1], np.tile(gradient(width=8), (1, 8))]
+        assert len({dhash(image) for image in images}) == 3
+        cache.predict(images[0])
+        cache.predict(images[1])
+        cache.predict(images[0])
+        cache.predict(images[2])
+        cache.predict(images[0])
+        cache.predict(images[1])
+        assert (cache.hits, cache.misses) == (2, 4)
+
+    def test_predictions_are_persisted(self, classifier, tmp_path):
+        path = str(tmp_path / 'example.com.json')
+        cache = CachingClassifier(classifier, path=path)
+        cache.predict(gradient())
+        cache.close()
+        cache = CachingClassifier(classifier, path=path)
+        cache.predict(gradient())
+        assert (cache.hits, cache.misses) == (1, 0)
+        assert len(classifier.images) == 1
+
+    def test_invalid_file_is_ignored(self, classifier, tmp_path):
+        path = tmp_path / 'example.com.json'
+        path.write_text('not json')
+        cache = CachingClassifier(classifier, path=str(path))
+        cache.predict(gradient())
+        assert cache.misses == 1
@@ -0,0 +1,35 @@
+import sys
+import pytest
+
+from context import profilescout
+from profilescout.classification import convert
+
+
+@pytest.fixture
+def conversions(monkeypatch):
+    conversions = []
+    monkeypatch.setattr(convert, 'convert', lambda *args: conversions.append(args))
+    return conversions
+
+
+def run_cli(monkeypatch, *args):
+    monkeypatch.setattr(sys, 'argv', ['profilescout-convert', 'scooby.h5', *args])
+    convert.cli()
+
+
+class TestCli:
+    @pytest.mark.parametrize('output_path, quantization', [('scooby.tflite', 'float16'), ('scooby.onnx', 'none')])
+    def test_default_quantization(self, monkeypatch, conversions, output_path, quantization):
+        run_cli(monkeypatch, output_path)
+        assert conversions == [('scooby.h5', output_path, quantization, None)]
+
+    @pytest.mark.parametrize('args', [['scooby.onnx', '-q', 'float16'], ['scooby.pb']])
+    def test_invalid_arguments(self, monkeypatch, conversions, args):
+        with pytest.raises(SystemExit):
+            run_cli(monkeypatch, *args)
+        assert conversions == []
+
+
+def test_unsupported_onnx_quantization():
+    with pytest.raises(ValueError):
+        convert.to_onnx(None, 'scooby.onnx', 'float16')
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from context import profilescout
+from profilescout.classification.lite import LiteClassifier, preprocess, resize_bilinear, to_grayscale
+
+
+class TestPreprocess:
+    def test_grayscale(self):
+        rgb = np.zeros((2, 2, 3), dtype=np.uint8)
+        rgb[..., 0] = 255
+        assert to_grayscale(rgb) == pytest.approx(np.full((2, 2), 255 * 0.2989))
+        gray = np.full((2, 2), 7, dtype=np.uint8)
+        assert to_grayscale(gray).tolist() == [[7, 7], [7, 7]]
+
+    def test_resize_bilinear(self):
+        array = np.array([[0, 10], [20, 30]], dtype=np.float32)
+        # half pixel centers, edges are clamped
+        assert resize_bilinear(array, 4, 4)[0].tolist() == pytest.approx([0, 2.5, 7.5, 10])
+        assert resize_bilinear(array, 1, 1).tolist() == [[15]]
+
+    def test_batch_shape(self):
+        image = np.full((162, 288, 3), 255, dtype=np.uint8)
+        batch = preprocess(image, 36, 48)
+        assert batch.shape == (1, 48, 36, 1)
+        assert batch.dtype == np.float32
+        assert batch.max() == pytest.approx(1, abs=1e-3)
+
+
+class FakeRunner:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, batch):
+        self.batches.append(batch)
+        # probabilities of both classes, positive if the image is bright
+        positive = batch.mean(axis=(1, 2, 3))
+        return np.stack([1 - positive, positive], axis=1)
+
+
+class TestLiteClassifier:
+    def test_unsupported_model(self):
+        with pytest.raises(ValueError):
+            LiteClassifier('model.h5')
+
+    def test_predict_batch(self, monkeypatch):
+        runner = FakeRunner()
+        monkeypatch.setattr('profilescout.classification.lite._TFLiteRunner', lambda path, num_threads: runner)
+        classifier = LiteClassifier('model.tflite')
+        images = [np.full((48, 36, 3), value, dtype=np.uint8) for value in [255, 0, 200]]
+        assert classifier.predict_batch(images) == [True, False, True]
+        assert runner.batches[0].shape == (3, 480, 360, 1)
+        assert classifier.predict(images[1], 36, 48) is False
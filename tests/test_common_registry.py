@@ -0,0 +1,62 @@
+import sys
+import threading
+import pytest
+
+from context import profilescout
+from profilescout.common.registry import ModelRegistry
+
+
+class Model:
+    created = 0
+
+    def __init__(self, *args):
+        Model.created += 1
+        self.args = args
+
+
+@pytest.fixture
+def registry():
+    Model.created = 0
+    registry = ModelRegistry()
+    registry.register('fake', f'{__name__}:Model')
+    return registry
+
+
+class TestModelRegistry:
+    def test_model_is_created_on_first_use(self, registry):
+        assert not registry.is_loaded('fake', 'a')
+        model = registry.get('fake', 'a')
+        assert model.args == ('a',)
+        assert registry.get('fake', 'a') is model
+        assert registry.is_loaded('fake', 'a')
+        assert registry.get('fake', 'b') is not model
+        assert Model.created == 2
+
+    def test_model_is_shared_by_threads(self, registry):
+        loaded = []
+        threads = [threading.Thread(target=lambda: loaded.append(registry.get('fake'))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert Model.created == 1
+        assert len({id(model) for model in loaded}) == 1
+
+    def test_unknown_model(self, registry):
+        with pytest.raises(KeyError):
+            registry.get('missing')
+
+    def test_clear(self, registry):
+        registry.get('fake')
+        registry.clear()
+        registry.get('fake')
+        assert Model.created == 2
+
+
+def test_cli_does_not_import_heavy_libraries():
+    for name in ['tensorflow', 'transformers']:
+        if name in sys.modules:
+            pytest.skip(f'{name} is already imported')
+    import profilescout.cli  # noqa: F401
+    assert 'tensorflow' not in sys.modules
+    assert 'transformers' not in sys.modules
@@ -0,0 +1,45 @@
+import pytest
+
+from context import profilescout
+from profilescout.link.canonical import canonicalize, url_key
+
+
+class TestCanonicalize:
+    def test_canonicalize_scheme_host_and_port(self):
+        assert canonicalize('HTTPS://WWW.Example.COM:443/Staff') == 'https://www.example.com/Staff'
+        assert canonicalize('http://example.com:80') == 'http://example.com/'
+        assert canonicalize('http://example.com:8080/a') == 'http://example.com:8080/a'
+
+    def test_canonicalize_dot_segments(self):
+        assert canonicalize('https://example.com/a/b/../c/./d') == 'https://example.com/a/c/d'
+        assert canonicalize('https://example.com/a/..') == 'https://example.com/'
+        assert canonicalize('https://example.com/../a/.') == 'https://example.com/a/'
+
+    def test_canonicalize_fragment_and_nocache(self):
+        assert canonicalize('https://example.com/a?id=1#top') == 'https://example.com/a?id=1'
+        assert canonicalize('https://example.com/a#top', include_fragment=True) == 'https://example.com/a#top'
+        assert canonicalize('https://example.com/a?nocache=123') == 'https://example.com/a'
+
+    def test_canonicalize_not_http_url(self):
+        assert canonicalize('mailto:user@example.com') == 'mailto:user@example.com'
+        assert canonicalize('/relative/path#top') == '/relative/path'
+        assert canonicalize('http://[invalid/') == 'http://[invalid/'
+
+
+class TestUrlKey:
+    @pytest.mark.parametrize('url', [
+        'https://example.com/staff',
+        'https://www.example.com/staff/',
+        'HTTPS://Example.com:443/staff',
+        'https://example.com/people/../staff',
+    ])
+    def test_url_key_for_same_page(self, url):
+        assert url_key(url) == 'https://example.com/staff'
+
+    def test_url_key_for_different_pages(self):
+        assert url_key('http://example.com/staff') != url_key('https://example.com/staff')
+        assert url_key('https://example.com/staff?id=1') != url_key('https://example.com/staff?id=2')
+        assert url_key('https://example.com/Staff') != url_key('https://example.com/staff')
+
+    def test_url_key_for_root(self):
+        assert url_key('https://www.example.com/') == url_key('https://example.com')
@@ -0,0 +1,95 @@
+import pickle
+import pytest
+
+from context import profilescout
+from profilescout.link.compact import (
+    HashedUrlSet,
+    ScalableBloomFilter,
+    CompactPageLink,
+    create_visited_store)
+from profilescout.link.utils import PageLink, UrlIndex, select_new_links
+
+
+@pytest.fixture
+def urls():
+    return [f'https://example.com/page/{i}' for i in range(5000)]
+
+
+@pytest.mark.parametrize('store_cls', [HashedUrlSet, ScalableBloomFilter])
+class TestCompactVisitedStores:
+    def test_add_and_contains(self, store_cls, urls):
+        store = store_cls(urls)
+        assert len(store) == len(urls)
+        assert all(url in store for url in urls)
+        assert 'https://www.example.com/page/1/' in store
+
+    def test_no_false_negatives_after_growth(self, store_cls, urls):
+        store = store_cls()
+        for url in urls:
+            store.add(url)
+            store.add(url)
+        assert len(store) == len(urls)
+        assert all(url in store for url in urls)
+
+    def test_merge(self, store_cls, urls):
+        store, other = store_cls(urls[:10]), store_cls(urls[10:20])
+        store.merge(other)
+        assert all(url in store for url in urls[:20])
+
+    def test_select_new_links(self, store_cls, urls):
+        store = store_cls(urls[:2])
+        page_links = [PageLink(url, 1) for url in urls[:4]]
+        result = select_new_links(page_links, store)
+        assert [pl.url for pl in result] == urls[2:4]
+
+    def test_pickle(self, store_cls, urls):
+        store = pickle.loads(pickle.dumps(store_cls(urls[:100])))
+        assert all(url in store for url in urls[:100])
+
+
+class TestScalableBloomFilter:
+    def test_false_positive_rate(self, urls):
+        store = ScalableBloomFilter(urls, error_rate=0.01, initial_capacity=1000)
+        false_positives = sum(f'https://example.com/other/{i}' in store for i in range(10000))
+        assert false_positives / 10000 < 0.01
+
+    def test_merge_with_the_same_parameters(self, urls):
+        store = ScalableBloomFilter(urls[:1000], error_rate=0.01, initial_capacity=1000)
+        other = ScalableBloomFilter(urls[1000:1999], error_rate=0.01, initial_capacity=1000)
+        store.merge(other)
+        assert all(url in store for url in urls[:1999])
+        false_positives = sum(f'https://example.com/other/{i}' in store for i in range(10000))
+        # filters don't fit into the capacity together, so the rate is bounded by the sum of their rates
+        assert false_positives / 10000 < 0.02
+        other.add(urls[2000])
+        assert urls[2000] not in store
+
+    def test_merge_fits_into_capacity(self, urls):
+        store = ScalableBloomFilter(urls[:300], initial_capacity=1000)
+        store.merge(ScalableBloomFilter(urls[300:600], initial_capacity=1000))
+        assert len(store._filters) == 1
+        assert all(url in store for url in urls[:600])
+
+    def test_merge_with_different_parameters(self, urls):
+        store = ScalableBloomFilter(urls[:1500], initial_capacity=1000)
+        other = ScalableBloomFilter(urls[1500:2000], initial_capacity=100)
+        store.merge(other)
+        assert len(store._filters) == 5
+        assert all(url in store for url in urls[:2000])
+
+
+class TestCompactPageLink:
+    def test_compact_page_link(self):
+        page_link = CompactPageLink('https://example.com/a', 1, 'https://example.com/', 'a' * 1000)
+        assert not hasattr(page_link, '__dict__')
+        assert len(page_link.txt) < 1000
+        assert page_link == CompactPageLink('https://example.com/a', 1, 'https://example.com/', 'a' * 1000)
+
+
+class TestCreateVisitedStore:
+    def test_create_visited_store(self):
+        assert isinstance(create_visited_store('exact'), UrlIndex)
+        assert isinstance(create_visited_store('hashed'), HashedUrlSet)
+        assert isinstance(create_visited_store('bloom', 0.01), ScalableBloomFilter)
+        with pytest.raises(KeyError):
+            create_visited_store('unknown')
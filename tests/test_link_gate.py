@@ -0,0 +1,116 @@
+import random
+import pytest
+
+from context import profilescout
+from profilescout.common.structures import OriginPageDetectionStrategy
+from profilescout.link.gate import UrlTemplateGate, to_url_template, to_format_pattern
+from profilescout.link.utils import PageLink
+from profilescout.web.webpage import ActionResult
+
+
+BASE_URL = 'https://example.com'
+
+
+class FakePage:
+    def __init__(self, url, parent_url=None, depth=2):
+        self.link = PageLink(url, depth, parent_url)
+        self.classified = False
+
+    def is_profile(self, classifier, width, height):
+        self.classified = True
+        return ActionResult(True, '/staff/' in self.link.url)
+
+
+@pytest.fixture
+def gate():
+    return UrlTemplateGate(confidence=0.9, min_samples=3, verification_rate=0)
+
+
+class TestUrlTemplate:
+    @pytest.mark.parametrize('url, template', [
+        (f'{BASE_URL}/staff/john-doe', f'{BASE_URL}/staff/####'),
+        (f'{BASE_URL}/staff/john-doe/', f'{BASE_URL}/staff/####'),
+        (f'{BASE_URL}/profile.php?id=12&lang=en', f'{BASE_URL}/####?id=####&lang=####'),
+        (f'{BASE_URL}/', f'{BASE_URL}/')])
+    def test_template(self, url, template):
+        assert to_url_template(url) == template
+
+
+class TestUrlTemplateGate:
+    def test_ambiguous_until_enough_samples(self, gate):
+        for name in ['john', 'jane']:
+            gate.learn(f'{BASE_URL}/staff/{name}', True)
+        assert gate.decide(f'{BASE_URL}/staff/jim') is None
+        gate.learn(f'{BASE_URL}/staff/jim', True)
+        assert gate.decide(f'{BASE_URL}/staff/joe') is True
+        assert gate.decide(f'{BASE_URL}/news/today') is None
+        assert (gate.decided_count, gate.classified_count) == (1, 2)
+
+    def test_negative_template(self, gate):
+        for day in range(3):
+            gate.learn(f'{BASE_URL}/news/{day}', False)
+        assert gate.decide(f'{BASE_URL}/news/3') is False
+
+    def test_inconsistent_template_is_classified(self, gate):
+        for i, profile_detected in enumerate([True, True, True, False]):
+            gate.learn(f'{BASE_URL}/people/{i}', profile_detected)
+        assert gate.decide(f'{BASE_URL}/people/5') is None
+        assert gate.mismatch_count == 1
+
+    def test_profile_format_is_only_a_prior(self, gate):
+        gate.add_profile_format(f'{BASE_URL}/staff/####')
+        assert gate.decide(f'{BASE_URL}/staff/john') is None
+        for name in ['jane', 'jim']:
+            gate.learn(f'{BASE_URL}/staff/{name}', True)
+        assert gate.decide(f'{BASE_URL}/staff/john') is True
+
+    def test_top_level_profile_format(self, gate):
+        gate.add_profile_format(f'{BASE_URL}/####')
+        for url in [f'{BASE_URL}/contact', f'{BASE_URL}/news/2023/some-article', f'{BASE_URL}/research/staff-list']:
+            assert gate.decide(url) is None
+
+    def test_deeper_paths_under_profile_format(self, gate):
+        gate.add_profile_format(f'{BASE_URL}/staff/####')
+        for name in ['jane', 'jim']:
+            gate.learn(f'{BASE_URL}/staff/{name}', True)
+        assert gate.decide(f'{BASE_URL}/staff/john/publications') is None
+        for name in ['a', 'b', 'c']:
+            gate.learn(f'{BASE_URL}/staff/dept/{name}', False)
+        assert gate.decide(f'{BASE_URL}/staff/dept/d') is False
+
+    @pytest.mark.parametrize('url, matches', [
+        (f'{BASE_URL}/staff/john', True),
+        (f'{BASE_URL}/staff/john/', True),
+        (f'{BASE_URL}/staff/john/publications', False),
+        (f'{BASE_URL}/other/staff/john', False),
+        (f'{BASE_URL}/profile.php?id=12', False)])
+    def test_format_pattern(self, url, matches):
+        assert bool(to_format_pattern(f'{BASE_URL}/staff/####').fullmatch(url)) == matches
+
+    def test_verification(self):
+        gate = UrlTemplateGate(min_samples=1, verification_rate=0.5, rng=random.Random(0))
+        gate.learn(f'{BASE_URL}/staff/john', True)
+        decisions = [gate.decide(f'{BASE_URL}/staff/{i}') for i in range(100)]
+        assert set(decisions) == {True, None}
+        assert 30 < gate.classified_count < 70
+
+
+class TestOriginPageDetectionStrategy:
+    def test_pages_are_decided_by_url(self, gate):
+        strategy = OriginPageDetectionStrategy(gate=gate)
+        pages = [FakePage(f'{BASE_URL}/staff/{i}', f'{BASE_URL}/staff') for i in range(5)]
+        for page in pages:
+            strategy.analyse(page, None, (2880, 1620))
+            if strategy.successful():
+                strategy.reset()
+        assert [page.classified for page in pages] == [True, True, True, False, False]
+        assert strategy.gate is gate
+        assert strategy.origin_candidates == {f'{BASE_URL}/staff': [f'{BASE_URL}/staff/3', f'{BASE_URL}/staff/4']}
+
+    def test_without_gate(self):
+        strategy = OriginPageDetectionStrategy()
+        pages = [FakePage(f'{BASE_URL}/staff/{i}', f'{BASE_URL}/staff') for i in range(3)]
+        for page in pages:
+            strategy.analyse(page, None, (2880, 1620))
+        assert all(page.classified for page in pages)
+        assert strategy.get_result()['origin'] == f'{BASE_URL}/staff'
@@ -12,7 +12,12 @@ from profilescout.link.utils import (
     filter_out_long,
     filter_out_present_links,
     filter_out_visited,
-    with_and_without_www)
+    with_and_without_www,
+    url_key,
+    UrlIndex,
+    PageLink,
+    remove_duplicates,
+    select_new_links)
 
 @pytest.fixture
 def page_links():
@@ -248,4 +253,64 @@ class TestFilterOutPresentLinks:
             page_links[7],  # mailto:user@example.com
         ]
         result = filter_out_present_links(page_links, links_to_visit)
-        assert result == expected_result
\ No newline at end of file
+        assert result == expected_result
+
+class TestUrlIndex:
+    def test_url_key(self):
+        assert url_key('https://www.example.com/link') == 'https://example.com/link'
+        assert url_key('https://example.com/www.html') == 'https://example.com/www.html'
+        assert url_key('www.example.com') == 'example.com'
+
+    def test_url_index_ignores_www(self, visited_links):
+        index = UrlIndex(visited_links)
+        assert 'https://www.example.com/link1' in index
+        assert 'https://example.com/link3' in index
+        assert 'http://example.com/link1' not in index
+        assert len(index) == 2
+
+    def test_url_index_discard(self, visited_links):
+        index = UrlIndex(visited_links)
+        index.discard('https://example.com/link3')
+        assert list(index) == ['https://example.com/link1']
+
+    def test_filter_out_present_links_with_index(self, page_links, links_to_visit):
+        index = UrlIndex(to_visit.url for to_visit in links_to_visit)
+        assert filter_out_present_links(page_links, index) == filter_out_present_links(page_links, links_to_visit)
+
+
+class TestRemoveDuplicates:
+    def test_remove_duplicates_keeps_order_and_minimum_depth(self):
+        page_links = [
+            PageLink('https://example.com/a', 2),
+            PageLink('https://example.com/b', 1),
+            PageLink('https://www.example.com/a/', 1),
+            PageLink('https://example.com/c', 3),
+            PageLink('https://example.com/b', 2),
+        ]
+        result = remove_duplicates(page_links)
+        assert [(pl.url, pl.depth) for pl in result] == [
+            ('https://example.com/a', 1),
+            ('https://example.com/b', 1),
+            ('https://example.com/c', 3),
+        ]
+
+    def test_remove_duplicates_empty(self):
+        assert remove_duplicates([]) == []
+
+
+class TestSelectNewLinks:
+    def test_select_new_links(self, visited_links, links_to_visit):
+        page_links = [
+            PageLink('https://example.com/link1', 1),
+            PageLink('http://www.example.com/link2', 1),
+            PageLink('https://example.com/link5', 2),
+            PageLink('https://example.com/link5/', 1),
+            PageLink('https://example.com/link6', 1),
+        ]
+        visited = UrlIndex(visited_links)
+        to_visit = UrlIndex(to_visit.url for to_visit in links_to_visit)
+        result = select_new_links(page_links, visited, to_visit)
+        assert [(pl.url, pl.depth) for pl in result] == [
+            ('https://example.com/link5', 1),
+            ('https://example.com/link6', 1),
+        ]
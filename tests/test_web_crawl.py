@@ -0,0 +1,33 @@
+import io
+
+from context import profilescout
+from fakes import FailingDriver
+from profilescout.web.crawl import Crawler, CrawlOptions
+from profilescout.web.manager import CrawlManager
+from profilescout.web.retry import RetryPolicy
+
+
+class RecordingScheduler:
+    def __init__(self):
+        self.calls = []
+
+    def acquire(self, host, delay):
+        self.calls.append(('acquire', host, delay))
+
+    def release(self, host, delay):
+        self.calls.append(('release', host, delay))
+
+
+class TestCrawler:
+    def test_reload_respects_scheduler_and_retries(self, tmp_path):
+        scheduler = RecordingScheduler()
+        crawler = Crawler(CrawlOptions(crawl_sleep=1), str(tmp_path), scheduler=scheduler)
+        web_driver = FailingDriver(['net::ERR_CONNECTION_TIMED_OUT'])
+        crawler.crawl_manager = CrawlManager(web_driver, 'https://example.com/', io.StringIO(), io.StringIO())
+        crawler.crawl_manager.set_retry(RetryPolicy(max_retries=1, base_delay=2, rng=lambda: 1))
+        crawler.curr_page = crawler.crawl_manager.curr_page
+        assert crawler._reload_page()
+        assert scheduler.calls == [
+            ('acquire', 'example.com', 1), ('release', 'example.com', 2),
+            ('acquire', 'example.com', 1), ('release', 'example.com', 1)]
+        assert len(web_driver.visited) == 2
@@ -0,0 +1,106 @@
+import os
+import functools
+import threading
+import pytest
+
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from context import profilescout
+from profilescout.web.crawl import CrawlOptions, crawl_result
+from profilescout.web.executor import crawl_in_processes, shard_by_host
+from profilescout.web.httpdriver import setup_driver
+from profilescout.web.webpage import WebpageActionType, ScrapeOption
+
+
+def crawl_input(url):
+    return ('export', url, None, None, None, None)
+
+
+class TestShardByHost:
+    @pytest.fixture
+    def crawl_inputs(self):
+        return [
+            crawl_input('https://a.com/'),
+            crawl_input('https://b.com/'),
+            crawl_input('https://a.com/staff/'),
+            crawl_input('https://c.com/')]
+
+    def test_same_host_in_same_shard(self, crawl_inputs):
+        shards = shard_by_host(crawl_inputs)
+        assert [[ci[1] for ci in shard] for shard in shards] == [
+            ['https://a.com/', 'https://a.com/staff/'],
+            ['https://b.com/'],
+            ['https://c.com/']]
+
+    def test_hosts_per_shard(self, crawl_inputs):
+        shards = shard_by_host(crawl_inputs, 2)
+        assert [len(shard) for shard in shards] == [3, 1]
+
+
+class TestCrawlResult:
+    def test_failed_crawl(self):
+        result = crawl_result('https://a.com/', 'export', error='ValueError()')
+        assert not result['successful']
+        assert result['scraped_count'] == 0
+        assert result['error'] == 'ValueError()'
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        links = ''.join(f'<li><a href="/page/{i}">Page {i}</a></li>' for i in range(3))
+        body = f'<html><body><ul>{links}</ul><p>{"Lorem ipsum dolor sit amet. " * 20}</p></body></html>'.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+class CrashingOptions(CrawlOptions):
+    '''options which kill the worker process as soon as the crawl starts'''
+
+    @property
+    def blocked_resources(self):
+        os._exit(1)
+
+    @blocked_resources.setter
+    def blocked_resources(self, value):
+        pass
+
+
+class TestCrawlInProcesses:
+    def test_crash_fails_only_its_shard(self, tmp_path):
+        pytest.importorskip('lxml')
+        options = CrawlOptions(max_depth=1, crawl_sleep=0, engine='hybrid', writer_threads=0, checkpoint_interval=0)
+        urls = ['http://127.0.0.1:1/', 'http://localhost:1/', 'http://127.0.0.2:1/']
+        crawl_inputs = [
+            (str(tmp_path / str(i)), url, options, WebpageActionType.SCRAPE_PAGES, ScrapeOption.HTML, None)
+            for i, url in enumerate(urls)]
+        crawl_inputs.insert(1, (str(tmp_path / 'crash'), 'http://crash.invalid/', CrashingOptions(),
+                                WebpageActionType.SCRAPE_PAGES, ScrapeOption.HTML, None))
+        results = crawl_in_processes(crawl_inputs, 2, driver_factory=functools.partial(setup_driver, 'hybrid'))
+        assert [result['url'] for result in results] == [crawl_input[1] for crawl_input in crawl_inputs]
+        assert results[1]['error'] == 'worker process has crashed'
+        assert all(result['error'] == 'none of the pages could be visited' for i, result in enumerate(results) if i != 1)
+
+    def test_websites_of_the_same_host(self, tmp_path, server_url):
+        pytest.importorskip('lxml')
+        options = CrawlOptions(max_depth=1, crawl_sleep=1, engine='hybrid', writer_threads=0, checkpoint_interval=0)
+        crawl_inputs = [
+            (str(tmp_path / str(i)), f'{server_url}/{path}', options, WebpageActionType.SCRAPE_PAGES, ScrapeOption.HTML, None)
+            for i, path in enumerate(['', 'staff/'])]
+        results = crawl_in_processes(crawl_inputs, 1, driver_factory=functools.partial(setup_driver, 'hybrid'))
+        assert [result['url'] for result in results] == [crawl_input[1] for crawl_input in crawl_inputs]
+        assert all(result['successful'] for result in results)
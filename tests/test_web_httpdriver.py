@@ -0,0 +1,173 @@
+import threading
+import pytest
+
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from context import profilescout
+from profilescout.common.exceptions import WebDriverException
+
+pytest.importorskip('lxml')
+
+from profilescout.web import httpdriver  # noqa: E402
+from profilescout.web.httpdriver import HttpDriver, HybridDriver  # noqa: E402
+
+
+STATIC_PAGE = f'''<html><head><base href="/staff/"></head><body>
+    <nav><ul><li><a href="/">Home</a></li></ul></nav>
+    <ul><li><a href="john-doe?nocache">  John
+        Doe </a></li></ul>
+    <p>{'Lorem ipsum dolor sit amet. ' * 20}</p>
+</body></html>'''
+
+SCRIPT_PAGE = '<html><body><div id="root"></div><script src="/app.js"></script></body></html>'
+
+PAGES = {
+    '/static': (200, 'text/html; charset=utf-8', STATIC_PAGE.encode()),
+    '/script': (200, 'text/html', SCRIPT_PAGE.encode()),
+    '/blocked': (403, 'text/html', b'<html><body>Forbidden</body></html>'),
+    '/bogus-meta': (200, 'text/html', '<html><head><meta charset="utf8mb4"></head><body>Čao</body></html>'.encode()),
+    '/bogus-header': (200, 'text/html; charset=utf8mb4', '<html><body>Čao</body></html>'.encode()),
+    '/file.pdf': (200, 'application/pdf', b'%PDF-1.4'),
+    '/large.pdf': (200, 'application/pdf', b'%PDF-1.4' + b'0' * 2**20),
+    '/large': (200, 'text/html', b'<html><body><p>' + b'a' * 2**20 + b'</p></body></html>'),
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        status, content_type, body = PAGES.get(self.path, (404, 'text/html', b''))
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except OSError:
+            pass  # client closed the connection without reading the body
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.visited = []
+        self.page_count = 0
+        self.blocked_resources = None
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def get_screenshot_as_png(self):
+        return b'png'
+
+    def get_page_source(self):
+        return '<html>rendered</html>'
+
+    def get_content_type(self):
+        return 'text/html'
+
+    def set_window_size(self, width, height):
+        pass
+
+    def block_resources(self, resource_types):
+        self.blocked_resources = resource_types
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture(scope='module')
+def server_url():
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+@pytest.fixture
+def http_driver():
+    driver = HttpDriver(timeout=5)
+    yield driver
+    driver.quit()
+
+
+class TestHttpDriver:
+    def test_static_page(self, server_url, http_driver):
+        http_driver.get(f'{server_url}/static')
+        assert http_driver.get_content_type() == 'text/html'
+        assert not http_driver.looks_script_rendered()
+        links = http_driver.find_elements_with_xpath('//a[@href]')
+        assert [link.get_attribute('href') for link in links] == [
+            f'{server_url}/', f'{server_url}/staff/john-doe?nocache']
+        assert links[1].text == 'John Doe'
+        structured = http_driver.find_elements_with_xpath('//ul//a[@href and not(ancestor::nav)]')
+        assert len(structured) == 1
+
+    def test_script_rendered_page(self, server_url, http_driver):
+        http_driver.get(f'{server_url}/script')
+        assert http_driver.looks_script_rendered()
+
+    def test_non_html_page(self, server_url, http_driver):
+        http_driver.get(f'{server_url}/file.pdf')
+        assert http_driver.get_content_type() == 'application/pdf'
+        assert http_driver.find_elements_with_xpath('//a[@href]') == []
+
+    @pytest.mark.parametrize('path', ['/bogus-meta', '/bogus-header'])
+    def test_unknown_charset(self, server_url, http_driver, path):
+        http_driver.get(f'{server_url}{path}')
+        assert http_driver.find_elements_with_xpath('//body')[0].text == 'Čao'
+
+    def test_body_is_read_only_for_html(self, server_url, http_driver, monkeypatch):
+        read_urls = []
+        read_body = httpdriver._read_body
+        monkeypatch.setattr(httpdriver, '_read_body', lambda response, max_size: (
+            read_urls.append(response.url), read_body(response, max_size))[1])
+        http_driver.get(f'{server_url}/large.pdf')
+        http_driver.get(f'{server_url}/static')
+        assert read_urls == [f'{server_url}/static']
+
+    def test_body_size_is_capped(self, server_url):
+        http_driver = HttpDriver(timeout=5, max_size=1024)
+        http_driver.get(f'{server_url}/large')
+        assert len(http_driver.get_page_source()) == 1024
+        http_driver.quit()
+
+    def test_screenshot_is_not_supported(self, http_driver):
+        with pytest.raises(WebDriverException):
+            http_driver.get_screenshot_as_png()
+
+    def test_connection_error(self, http_driver):
+        with pytest.raises(WebDriverException):
+            http_driver.get('http://127.0.0.1:1/')
+
+
+class TestHybridDriver:
+    @pytest.fixture
+    def browser(self):
+        return FakeBrowser()
+
+    @pytest.fixture
+    def hybrid_driver(self, http_driver, browser):
+        return HybridDriver(http_driver, lambda: browser)
+
+    def test_static_page_without_browser(self, server_url, hybrid_driver, browser):
+        hybrid_driver.get(f'{server_url}/static')
+        assert 'Lorem ipsum' in hybrid_driver.get_page_source()
+        assert browser.visited == []
+        assert hybrid_driver.page_count == 0
+
+    def test_fallback_to_browser(self, server_url, hybrid_driver, browser):
+        hybrid_driver.get(f'{server_url}/script')
+        hybrid_driver.get(f'{server_url}/blocked')
+        assert browser.visited == [f'{server_url}/script', f'{server_url}/blocked']
+        assert hybrid_driver.get_page_source() == '<html>rendered</html>'
+
+    def test_screenshot_loads_page_in_browser(self, server_url, hybrid_driver, browser):
+        hybrid_driver.block_resources(['media'])
+        hybrid_driver.get(f'{server_url}/static')
+        assert hybrid_driver.get_screenshot_as_png() == b'png'
+        assert hybrid_driver.get_screenshot_as_png() == b'png'
+        assert browser.visited == [f'{server_url}/static']
+        assert browser.blocked_resources == ['media']
@@ -0,0 +1,234 @@
+import io
+import pytest
+
+from context import profilescout
+from fakes import FakeClock, FailingDriver
+from profilescout.link.utils import PageLink
+from profilescout.web.manager import CrawlManager, LinkFrontier
+from profilescout.web.retry import CircuitBreaker, RetryPolicy
+
+
+@pytest.fixture
+def page_links():
+    return [
+        PageLink('https://example.com/about', 1),
+        PageLink('https://example.com/staff', 1),
+        PageLink('https://example.com/news/1', 2),
+        PageLink('https://example.com/contact', 1),
+        PageLink('https://example.com/profile/1', 2),
+    ]
+
+
+class TestLinkFrontier:
+    def test_pop_keeps_bfs_order(self, page_links):
+        frontier = LinkFrontier(page_links)
+        urls = [frontier.pop().url for _ in range(len(page_links))]
+        assert urls == [
+            'https://example.com/about',
+            'https://example.com/staff',
+            'https://example.com/contact',
+            'https://example.com/news/1',
+            'https://example.com/profile/1',
+        ]
+        assert len(frontier) == 0
+
+    def test_pop_bumps_relevant(self, page_links):
+        frontier = LinkFrontier(page_links, bump_relevant=True)
+        urls = [pl.url for pl in frontier.to_list()]
+        assert urls == [
+            'https://example.com/staff',
+            'https://example.com/profile/1',
+            'https://example.com/about',
+            'https://example.com/contact',
+            'https://example.com/news/1',
+        ]
+
+    def test_set_bump_relevant_reorders_queue(self, page_links):
+        frontier = LinkFrontier(page_links)
+        frontier.set_bump_relevant(True)
+        assert frontier.pop().url == 'https://example.com/staff'
+
+    def test_remove(self, page_links):
+        frontier = LinkFrontier(page_links)
+        assert frontier.remove('https://example.com/about')
+        assert not frontier.remove('https://example.com/about')
+        assert 'https://example.com/about' not in frontier
+        assert frontier.peek().url == 'https://example.com/staff'
+        assert len(frontier) == 4
+
+    def test_push_keeps_minimum_depth(self, page_links):
+        frontier = LinkFrontier(page_links)
+        assert not frontier.push(PageLink('https://example.com/about', 2))
+        assert frontier.push(PageLink('https://example.com/news/1', 1))
+        assert len(frontier) == 5
+        assert [pl.url for pl in frontier.to_list()][:4] == [
+            'https://example.com/about',
+            'https://example.com/staff',
+            'https://example.com/contact',
+            'https://example.com/news/1',
+        ]
+
+    def test_contains_ignores_www(self, page_links):
+        frontier = LinkFrontier(page_links)
+        assert 'https://www.example.com/about' in frontier
+        assert not frontier.push(PageLink('https://www.example.com/about', 1))
+        assert frontier.remove('https://www.example.com/staff')
+        assert len(frontier) == 4
+
+    def test_remove_where(self, page_links):
+        frontier = LinkFrontier(page_links)
+        assert frontier.remove_where(lambda page_link: page_link.depth == 2) == 2
+        assert [pl.url for pl in frontier.to_list()] == [
+            'https://example.com/about',
+            'https://example.com/staff',
+            'https://example.com/contact',
+        ]
+
+    def test_pop_from_empty(self):
+        frontier = LinkFrontier()
+        assert frontier.peek() is None
+        with pytest.raises(IndexError):
+            frontier.pop()
+
+
+def create_manager(web_driver, base_url='https://example.com/'):
+    return CrawlManager(web_driver, base_url, io.StringIO(), io.StringIO())
+
+
+class TestCrawlManagerRetry:
+    def test_retry_with_backoff(self):
+        web_driver = FailingDriver(['net::ERR_CONNECTION_TIMED_OUT', 'net::ERR_CONNECTION_TIMED_OUT'])
+        manager = create_manager(web_driver)
+        manager.set_retry(RetryPolicy(max_retries=2, base_delay=2, rng=lambda: 1))
+        assert manager.visit_next() is None
+        assert manager.backoff == 2
+        assert manager.visit_next() is None
+        assert manager.backoff == 4
+        assert manager.visit_next() is not None
+        assert manager.backoff == 0
+        assert len(web_driver.visited) == 3
+
+    def test_permanent_error_is_not_retried(self):
+        manager = create_manager(FailingDriver(['net::ERR_NAME_NOT_RESOLVED']))
+        manager.set_retry(RetryPolicy())
+        assert manager.visit_next() is None
+        assert not manager.has_next()
+
+    def test_dead_host_links_are_dropped(self, page_links):
+        web_driver = FailingDriver(['net::ERR_CONNECTION_REFUSED'] * 2)
+        manager = create_manager(web_driver)
+        manager.restore(page_links, [], 0)
+        manager.set_retry(RetryPolicy(), CircuitBreaker(failure_threshold=2), 'drop')
+        manager.visit_next()
+        manager.visit_next()
+        assert manager.visit_next() is None
+        assert not manager.has_next()
+        assert len(web_driver.visited) == 2
+
+    def test_dead_host_links_are_deferred(self, page_links):
+        clock = FakeClock()
+        web_driver = FailingDriver(['net::ERR_CONNECTION_REFUSED'])
+        manager = create_manager(web_driver)
+        manager.restore(page_links, [], 0)
+        manager.set_retry(RetryPolicy(), CircuitBreaker(failure_threshold=1, reset_timeout=300, clock=clock), 'defer')
+        assert manager.visit_next() is None
+        # all links of the host are parked at once and the thread is not delayed
+        assert manager.backoff == 0
+        assert manager.has_next()
+        assert manager.peek_next() is None
+        assert manager.parked_wait() == 300
+        assert len(manager.get_links_to_visit()) == len(page_links)
+        clock.now = 300
+        # single link checks the host and the rest is queued once it succeeds
+        assert manager.peek_next() is not None
+        assert manager.visit_next() is not None
+        assert len(manager.get_links_to_visit()) == len(page_links) - 1
+        assert manager.parked_wait() == 0
+        assert len(web_driver.visited) == 2
+
+    def test_deferred_links_are_dropped_if_host_is_still_down(self, page_links):
+        clock = FakeClock()
+        web_driver = FailingDriver(['net::ERR_CONNECTION_REFUSED'] * 2)
+        manager = create_manager(web_driver)
+        manager.restore(page_links, [], 0)
+        manager.set_retry(RetryPolicy(), CircuitBreaker(failure_threshold=1, reset_timeout=300, clock=clock), 'defer')
+        manager.visit_next()
+        clock.now = 300
+        manager.peek_next()
+        assert manager.visit_next() is None
+        assert not manager.has_next()
+        assert len(web_driver.visited) == 2
+
+    @pytest.mark.parametrize('probe_released', [False, True])
+    def test_parked_links_visited_elsewhere(self, page_links, probe_released):
+        clock = FakeClock()
+        web_driver = FailingDriver(['net::ERR_CONNECTION_REFUSED'])
+        manager = create_manager(web_driver)
+        manager.restore(page_links, [], 0)
+        manager.set_retry(RetryPolicy(), CircuitBreaker(failure_threshold=1, reset_timeout=300, clock=clock), 'defer')
+        manager.visit_next()
+        if probe_released:
+            clock.now = 300
+            assert manager.peek_next() is not None
+        links_to_visit, _ = manager.mark_as_visited([pl.url for pl in page_links], 0)
+        assert len(links_to_visit) == 0
+        assert not manager.has_next()
+        assert manager.get_links_to_visit() == []
+
+    def test_probe_visited_elsewhere(self, page_links):
+        clock = FakeClock()
+        web_driver = FailingDriver(['net::ERR_CONNECTION_REFUSED'])
+        manager = create_manager(web_driver)
+        manager.restore(page_links, [], 0)
+        manager.set_retry(RetryPolicy(), CircuitBreaker(failure_threshold=1, reset_timeout=300, clock=clock), 'defer')
+        manager.visit_next()
+        clock.now = 300
+        probe = manager.peek_next()
+        manager.mark_as_visited([probe.url], 0)
+        # next parked link checks the host instead
+        assert manager.peek_next() not in (None, probe)
+        assert manager.has_next()
+
+
+class TestCrawlManagerReload:
+    def test_reload_is_retried(self):
+        web_driver = FailingDriver(['net::ERR_CONNECTION_TIMED_OUT'])
+        manager = create_manager(web_driver)
+        manager.set_retry(RetryPolicy(max_retries=1, base_delay=2, rng=lambda: 1))
+        assert manager.reload_curr_page() is None
+        assert manager.backoff == 2
+        assert manager.reload_curr_page(1) is True
+        assert manager.backoff == 0
+
+    def test_reload_of_dead_host(self):
+        web_driver = FailingDriver(['net::ERR_CONNECTION_REFUSED'])
+        manager = create_manager(web_driver)
+        manager.set_retry(RetryPolicy(), CircuitBreaker(failure_threshold=1))
+        assert manager.reload_curr_page() is False
+        assert manager.reload_curr_page() is False
+        assert len(web_driver.visited) == 1
+
+
+class FakePreflight:
+    def __init__(self, text_urls):
+        self.text_urls = text_urls
+
+    def is_text(self, url):
+        return url in self.text_urls
+
+
+class TestCrawlManagerPreflight:
+    def test_non_text_page_is_not_visited(self):
+        web_driver = FailingDriver([])
+        manager = create_manager(web_driver)
+        manager.set_preflight(FakePreflight([]))
+        assert manager.visit_next() is None
+        assert web_driver.visited == []
+        assert len(manager.get_visited_links()) == 1
+
+    def test_text_page_is_visited(self):
+        web_driver = FailingDriver([])
+        manager = create_manager(web_driver)
+        manager.set_preflight(FakePreflight(['https://example.com/']))
+        assert manager.visit_next() is not None
+        assert len(web_driver.visited) == 1
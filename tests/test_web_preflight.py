@@ -0,0 +1,101 @@
+import threading
+import pytest
+
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from context import profilescout
+from profilescout.web.preflight import ContentTypePreflight, to_url_pattern
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests = []
+
+    def _respond(self, with_body):
+        Handler.requests.append((self.command, self.path, self.headers.get('Range')))
+        if self.path.startswith('/no-head') and self.command == 'HEAD':
+            self.send_response(405)
+            self.end_headers()
+            return
+        if self.path.startswith('/missing'):
+            self.send_response(404)
+            self.end_headers()
+            return
+        content_type = 'application/pdf' if 'download' in self.path else 'text/html; charset=utf-8'
+        body = b'content'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if with_body:
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._respond(with_body=False)
+
+    def do_GET(self):
+        self._respond(with_body=True)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def server_url():
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+@pytest.fixture
+def preflight():
+    Handler.requests = []
+    preflight = ContentTypePreflight(timeout=5)
+    yield preflight
+    preflight.close()
+
+
+@pytest.mark.parametrize('url, pattern', [
+    ('https://Example.com/2023/files/report.PDF?v=2', 'example.com/#/files/*.pdf?v=####'),
+    ('https://example.com:8080/staff/john', 'example.com:8080/staff/john'),
+    ('https://example.com/people/12', 'example.com/people/#'),
+    ('https://example.com/get.php?id=3&lang=en', 'example.com/get.php?id=####&lang=####')])
+def test_url_pattern(url, pattern):
+    assert to_url_pattern(url) == pattern
+
+
+class TestContentTypePreflight:
+    def test_head_request(self, server_url, preflight):
+        assert preflight.is_text(f'{server_url}/staff')
+        assert not preflight.is_text(f'{server_url}/download/1')
+        assert [request[0] for request in Handler.requests] == ['HEAD', 'HEAD']
+
+    def test_ranged_get_fallback(self, server_url, preflight):
+        assert preflight.content_type(f'{server_url}/no-head/download') == 'application/pdf'
+        assert Handler.requests == [('HEAD', '/no-head/download', None), ('GET', '/no-head/download', 'bytes=0-0')]
+
+    def test_result_is_cached_per_pattern(self, server_url, preflight):
+        for i in range(3):
+            assert not preflight.is_text(f'{server_url}/download/{i}')
+        assert preflight.request_count == 1
+
+    def test_scripts_in_the_same_directory(self, server_url, preflight):
+        assert not preflight.is_text(f'{server_url}/download.php?id=4')
+        assert preflight.is_text(f'{server_url}/view.php?id=3')
+        assert preflight.request_count == 2
+
+    def test_unknown_content_type(self, server_url, preflight):
+        assert preflight.content_type(f'{server_url}/missing') is None
+        assert preflight.is_text('http://127.0.0.1:1/')
+        # errors are not cached
+        preflight.content_type(f'{server_url}/missing')
+        assert preflight.request_count == 3
+
+    def test_cache_size(self, server_url):
+        preflight = ContentTypePreflight(timeout=5, cache_size=1)
+        preflight.content_type(f'{server_url}/a')
+        preflight.content_type(f'{server_url}/b')
+        preflight.content_type(f'{server_url}/a')
+        assert preflight.request_count == 3
+        preflight.close()
@@ -0,0 +1,93 @@
+import json
+import pytest
+
+from selenium.common.exceptions import TimeoutException, JavascriptException
+
+from context import profilescout
+from fakes import FakeClock
+from profilescout.common.exceptions import WebDriverException
+from profilescout.web.readiness import NetworkIdle, FixedWait, create_readiness_strategy, READINESS_STRATEGIES
+from profilescout.web.webdriver import WebDriver
+
+
+def network_event(method, request_id):
+    return {'message': json.dumps({'message': {'method': method, 'params': {'requestId': request_id}}})}
+
+
+class FakeSeleniumDriver:
+    def __init__(self, logs=None, timeout=False, stop_error=False):
+        self.logs = list(logs or [])
+        self.timeout = timeout
+        self.stop_error = stop_error
+        self.scripts = []
+
+    def get_window_size(self):
+        return {'width': 800, 'height': 600}
+
+    def get_log(self, log_type):
+        return self.logs.pop(0) if self.logs else []
+
+    def get(self, url):
+        if self.timeout:
+            raise TimeoutException('timeout: Timed out receiving message from renderer')
+
+    def execute_script(self, script):
+        if self.stop_error:
+            raise JavascriptException('javascript error')
+        self.scripts.append(script)
+
+
+class FakeOptions:
+    def __init__(self):
+        self.page_load_strategy = None
+        self.capabilities = dict()
+
+    def set_capability(self, name, value):
+        self.capabilities[name] = value
+
+
+class TestReadinessStrategy:
+    @pytest.mark.parametrize('name, page_load_strategy', list(zip(READINESS_STRATEGIES, ['normal', 'eager', 'eager', 'eager'])))
+    def test_configure(self, name, page_load_strategy):
+        options = FakeOptions()
+        create_readiness_strategy(name).configure(options)
+        assert options.page_load_strategy == page_load_strategy
+        assert ('goog:loggingPrefs' in options.capabilities) == (name == 'network-idle')
+
+    def test_unknown_strategy(self):
+        with pytest.raises(KeyError):
+            create_readiness_strategy('load')
+
+    def test_fixed_wait_is_limited_by_timeout(self):
+        clock = FakeClock()
+        FixedWait(wait_time=5, sleep=clock.sleep).wait(FakeSeleniumDriver(), timeout=2)
+        assert clock.now == 2
+
+    def test_network_idle(self):
+        clock = FakeClock()
+        logs = [
+            [network_event('Network.requestWillBeSent', '1'), network_event('Network.requestWillBeSent', '2')],
+            [network_event('Network.loadingFinished', '1'), network_event('Network.dataReceived', '2')],
+            [network_event('Network.loadingFailed', '2')]]
+        strategy = NetworkIdle(idle_time=0.5, poll_interval=0.25, clock=clock, sleep=clock.sleep)
+        assert strategy.wait(FakeSeleniumDriver(logs), timeout=10)
+        # last request has finished after the third poll
+        assert clock.now == 1
+
+    def test_network_never_idle(self):
+        clock = FakeClock()
+        logs = [[network_event('Network.requestWillBeSent', str(i))] for i in range(100)]
+        strategy = NetworkIdle(clock=clock, sleep=clock.sleep)
+        assert not strategy.wait(FakeSeleniumDriver(logs), timeout=3)
+        assert clock.now == pytest.approx(3)
+
+
+class TestPageLoadTimeout:
+    def test_partially_loaded_page_is_used(self):
+        selenium_driver = FakeSeleniumDriver(timeout=True)
+        WebDriver(selenium_driver).get('https://example.com')
+        assert selenium_driver.scripts == ['window.stop();']
+
+    def test_page_that_cannot_be_stopped(self):
+        with pytest.raises(WebDriverException, match='ERR_CONNECTION_TIMED_OUT'):
+            WebDriver(FakeSeleniumDriver(timeout=True, stop_error=True)).get('https://example.com')
@@ -0,0 +1,58 @@
+import pytest
+
+from context import profilescout
+from fakes import FakeClock
+from profilescout.web.retry import CircuitBreaker, RetryPolicy
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestRetryPolicy:
+    def test_should_retry(self):
+        policy = RetryPolicy(max_retries=2)
+        assert policy.should_retry('timed out', 0)
+        assert policy.should_retry('timed out', 1)
+        assert not policy.should_retry('timed out', 2)
+        assert not policy.should_retry('unresolved', 0)
+
+    def test_exponential_delay_with_jitter(self):
+        policy = RetryPolicy(base_delay=2, max_delay=10, rng=lambda: 0)
+        assert [policy.delay(attempt) for attempt in range(4)] == [1, 2, 4, 5]
+        policy = RetryPolicy(base_delay=2, max_delay=10, rng=lambda: 1)
+        assert [policy.delay(attempt) for attempt in range(4)] == [2, 4, 8, 10]
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self, clock):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60, clock=clock)
+        assert not breaker.record_failure('example.com', 'unreachable')
+        breaker.record_success('example.com')
+        assert not breaker.record_failure('example.com', 'unreachable')
+        assert not breaker.record_failure('example.com', 'stale')
+        # failure which is not caused by the host breaks the sequence
+        assert not breaker.record_failure('example.com', 'unreachable')
+        assert breaker.record_failure('example.com', 'unreachable')
+        assert breaker.is_open('example.com')
+        assert not breaker.allow('example.com')
+        assert breaker.allow('other.com')
+
+    def test_half_open_after_timeout(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, clock=clock)
+        breaker.record_failure('example.com', 'unresolved')
+        clock.now = 30
+        assert breaker.retry_after('example.com') == 30
+        clock.now = 60
+        # only one visit is allowed to check the host
+        assert breaker.allow('example.com')
+        assert not breaker.allow('example.com')
+        # failed check opens the circuit again
+        assert breaker.record_failure('example.com', 'unresolved')
+        assert not breaker.allow('example.com')
+        clock.now = 120
+        assert breaker.allow('example.com')
+        breaker.record_success('example.com')
+        assert not breaker.is_open('example.com')
+        assert breaker.allow('example.com')
@@ -0,0 +1,57 @@
+import threading
+import pytest
+
+from context import profilescout
+from fakes import FakeClock
+from profilescout.web.scheduler import PolitenessScheduler, to_host
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestPolitenessScheduler:
+    def test_to_host(self):
+        assert to_host('https://www.example.com/a?b=c') == 'www.example.com'
+        assert to_host('not a url') == ''
+
+    def test_delay_starts_after_release(self, clock):
+        scheduler = PolitenessScheduler(clock=clock, sleep=clock.sleep)
+        assert scheduler.acquire('example.com', 2) == 0
+        clock.now = 5
+        scheduler.release('example.com', 2)
+        assert scheduler.wait_time('example.com') == 2
+        assert scheduler.wait_time('other.com') == 0
+        clock.now = 6
+        assert scheduler.acquire('example.com', 2) == 1
+        assert clock.now == 7
+
+    def test_acquire_reserves_host(self, clock):
+        scheduler = PolitenessScheduler(clock=clock, sleep=clock.sleep)
+        scheduler.acquire('example.com', 2)
+        assert scheduler.wait_time('example.com') == 2
+
+    def test_host_is_reserved_until_release(self):
+        scheduler = PolitenessScheduler()
+        scheduler.acquire('example.com', 0)
+        events = []
+        second = threading.Thread(target=lambda: events.append(('acquired', scheduler.acquire('example.com', 0))))
+        second.start()
+        second.join(timeout=0.2)
+        # visit takes longer than the delay, but the host is not visited by the other thread
+        assert second.is_alive()
+        events.append('released')
+        scheduler.release('example.com', 0)
+        second.join()
+        assert events[0] == 'released'
+        assert events[1][0] == 'acquired'
+        assert scheduler.acquire('other.com', 0) == 0
+
+    def test_token_bucket(self, clock):
+        scheduler = PolitenessScheduler(rate=0.5, burst=2, clock=clock, sleep=clock.sleep)
+        for _ in range(2):
+            assert scheduler.acquire('example.com') == 0
+            scheduler.release('example.com', 0)
+        assert scheduler.wait_time('example.com') == 2
+        assert scheduler.acquire('example.com') == 2
@@ -0,0 +1,55 @@
+import io
+import pytest
+
+from PIL import Image
+
+from context import profilescout
+from profilescout.web.screenshot import ScreenshotEncoding, is_format_supported
+
+
+@pytest.fixture
+def png():
+    with io.BytesIO() as buffer:
+        Image.new('RGBA', (40, 30), (255, 0, 0, 128)).save(buffer, format='PNG')
+        return buffer.getvalue()
+
+
+def decode(content):
+    with io.BytesIO(content) as buffer:
+        image = Image.open(buffer)
+        image.load()
+        return image
+
+
+class TestScreenshotEncoding:
+    def test_png_is_stored_as_is(self, png):
+        encoding = ScreenshotEncoding()
+        assert encoding.is_identity()
+        assert encoding.encode(png) is png
+        assert encoding.extension == 'png'
+
+    @pytest.mark.parametrize('fmt, extension, pil_format', [('webp', 'webp', 'WEBP'), ('jpeg', 'jpg', 'JPEG')])
+    def test_lossy_formats(self, png, fmt, extension, pil_format):
+        encoding = ScreenshotEncoding(fmt, quality=50)
+        image = decode(encoding.encode(png))
+        assert encoding.extension == extension
+        assert image.format == pil_format
+        assert image.size == (40, 30)
+
+    def test_downscale_and_grayscale(self, png):
+        image = decode(ScreenshotEncoding('png', max_width=20, grayscale=True).encode(png))
+        assert image.size == (20, 15)
+        assert image.mode == 'L'
+
+    def test_smaller_image_is_not_upscaled(self, png):
+        assert decode(ScreenshotEncoding('jpeg', max_width=100).encode(png)).size == (40, 30)
+
+    def test_unknown_format(self):
+        with pytest.raises(AssertionError):
+            ScreenshotEncoding('gif')
+
+    def test_format_support_depends_on_pillow(self, monkeypatch):
+        assert is_format_supported('png')
+        monkeypatch.setattr('PIL.features.check', lambda feature: feature != 'webp')
+        assert not is_format_supported('webp')
+        assert is_format_supported('jpeg')
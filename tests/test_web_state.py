@@ -0,0 +1,46 @@
+import pytest
+
+from context import profilescout
+from profilescout.link.utils import PageLink, UrlIndex
+from profilescout.web.state import CrawlStateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CrawlStateStore(str(tmp_path / 'crawl_state.sqlite3'))
+    yield store
+    store.close()
+
+
+class TestCrawlStateStore:
+    def test_load_without_saved_state(self, store):
+        assert store.load() is None
+
+    def test_save_and_load(self, store):
+        links_to_visit = [PageLink('https://example.com/b', 1, 'https://example.com/', 'B')]
+        visited_links = UrlIndex(['https://example.com/'])
+        origin_candidates = {'https://example.com/': ['https://example.com/a']}
+        store.save(links_to_visit, visited_links, 3, origin_candidates)
+
+        state = store.load()
+        assert state['links_to_visit'] == links_to_visit
+        assert state['visited_links'] == ['https://example.com/']
+        assert state['scraped_count'] == 3
+        assert state['origin_candidates'] == origin_candidates
+        assert not state['finished']
+
+    def test_save_appends_only_new_visited_links(self, store):
+        visited_links = UrlIndex(['https://example.com/'])
+        store.save([], visited_links, 0)
+        visited_links.add('https://example.com/a')
+        store.save([], visited_links, 1, finished=True)
+
+        state = store.load()
+        assert state['visited_links'] == ['https://example.com/', 'https://example.com/a']
+        assert state['links_to_visit'] == []
+        assert state['finished']
+
+    def test_clear(self, store):
+        store.save([PageLink('https://example.com/', 0)], UrlIndex(), 0)
+        store.clear()
+        assert store.load() is None
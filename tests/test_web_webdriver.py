@@ -0,0 +1,191 @@
+import base64
+import threading
+import pytest
+
+from context import profilescout
+from profilescout.web.webdriver import WebDriver, WebDriverPool, to_blocked_url_patterns
+
+
+class FakeDriver:
+    def __init__(self, rss=None, broken=False):
+        self.page_count = 0
+        self.rss = rss
+        self.broken = broken
+        self.reset_count = 0
+        self.quitted = False
+
+    def get_rss(self):
+        return self.rss
+
+    def reset(self):
+        if self.broken:
+            raise RuntimeError('browser crashed')
+        self.reset_count += 1
+
+    def quit(self):
+        self.quitted = True
+
+
+@pytest.fixture
+def created():
+    return []
+
+
+@pytest.fixture
+def pool(created):
+    def factory():
+        created.append(FakeDriver())
+        return created[-1]
+    return WebDriverPool(2, max_pages=10, max_rss=100, factory=factory)
+
+
+class TestWebDriverPool:
+    def test_driver_is_reused_after_reset(self, pool, created):
+        driver = pool.acquire()
+        pool.release(driver)
+        assert driver.reset_count == 1
+        assert pool.acquire() is driver
+        assert len(created) == 1
+
+    def test_new_driver_when_all_are_leased(self, pool, created):
+        first, second, third = pool.acquire(), pool.acquire(), pool.acquire()
+        assert len({id(first), id(second), id(third)}) == 3
+        for driver in (first, second, third):
+            pool.release(driver)
+        # only 'size' drivers are kept idle
+        assert sum(driver.quitted for driver in created) == 1
+
+    def test_driver_is_recycled(self, pool, created):
+        with pool.lease() as driver:
+            driver.page_count = 10
+        assert driver.quitted
+        with pool.lease() as driver:
+            driver.rss = 150
+        assert driver.quitted
+        with pool.lease() as driver:
+            driver.broken = True
+        assert driver.quitted
+        assert pool.acquire() not in created[:3]
+
+    def test_prewarm(self, created):
+        def factory():
+            created.append(FakeDriver())
+            return created[-1]
+        pool = WebDriverPool(2, factory=factory, prewarm=2)
+        assert len(created) == 2
+        assert pool.acquire() in created
+        assert pool.acquire() in created
+        assert len(created) == 2
+
+    def test_number_of_live_browsers_is_bounded(self, created):
+        def factory():
+            created.append(FakeDriver())
+            return created[-1]
+        pool = WebDriverPool(1, factory=factory, max_live=1)
+        first = pool.acquire()
+        acquired = []
+        waiting = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+        waiting.start()
+        waiting.join(timeout=0.2)
+        assert waiting.is_alive()
+        pool.release(first)
+        waiting.join()
+        assert acquired == [first]
+        assert len(created) == 1
+
+    def test_browser_is_renewed_between_pages(self, pool, created):
+        driver = pool.acquire()
+        assert pool.renew(driver) is driver
+        driver.page_count = 10
+        renewed = pool.renew(driver)
+        assert renewed is not driver
+        assert driver.quitted
+        pool.release(renewed)
+        assert pool.acquire() is renewed
+
+    def test_close(self, pool, created):
+        leased = pool.acquire()
+        pool.release(pool.acquire())
+        pool.close()
+        assert all(driver.quitted for driver in created)
+        assert leased.quitted
+
+
+class FakeSeleniumDriver:
+    def __init__(self):
+        self.cdp_cmds = []
+        self.window_sizes = []
+
+    def get_window_size(self):
+        return {'width': 800, 'height': 600}
+
+    def set_window_size(self, width, height):
+        self.window_sizes.append((width, height))
+
+    @property
+    def window_handles(self):
+        return ['main']
+
+    @property
+    def switch_to(self):
+        return self
+
+    def window(self, handle):
+        pass
+
+    def delete_all_cookies(self):
+        pass
+
+    def get(self, url):
+        pass
+
+    def execute_cdp_cmd(self, cmd, args):
+        self.cdp_cmds.append((cmd, args))
+        if cmd == 'Page.getLayoutMetrics':
+            return {'cssLayoutViewport': {'clientWidth': 800, 'clientHeight': 600}}
+        if cmd == 'Page.captureScreenshot':
+            return {'data': base64.b64encode(b'jpeg').decode()}
+
+
+class TestResourceBlocking:
+    def test_url_patterns(self):
+        patterns = to_blocked_url_patterns(['stylesheet', 'third-party'])
+        assert patterns[:2] == ['*.css', '*.css?*']
+        assert '*://*google-analytics.com/*' in patterns
+        assert to_blocked_url_patterns([]) == []
+
+    def test_block_resources(self):
+        selenium_driver = FakeSeleniumDriver()
+        WebDriver(selenium_driver).block_resources(['font'])
+        assert selenium_driver.cdp_cmds[0] == ('Network.enable', {})
+        cmd, args = selenium_driver.cdp_cmds[1]
+        assert cmd == 'Network.setBlockedURLs'
+        assert '*.woff2?*' in args['urls']
+
+
+class TestReset:
+    def test_storage_of_all_origins_is_cleared(self):
+        selenium_driver = FakeSeleniumDriver()
+        WebDriver(selenium_driver).reset()
+        assert ('Storage.clearDataForOrigin', {'origin': '*', 'storageTypes': 'all'}) in selenium_driver.cdp_cmds
+        assert ('Network.clearBrowserCache', {}) in selenium_driver.cdp_cmds
+
+
+class TestScaledScreenshot:
+    def test_capture_is_scaled_by_browser(self):
+        selenium_driver = FakeSeleniumDriver()
+        assert WebDriver(selenium_driver).get_screenshot_as_jpeg(0.25, 80) == b'jpeg'
+        cmd, args = selenium_driver.cdp_cmds[-1]
+        assert cmd == 'Page.captureScreenshot'
+        assert args == {
+            'format': 'jpeg', 'quality': 80, 'clip': {'x': 0, 'y': 0, 'width': 800, 'height': 600, 'scale': 0.25}}
+
+
+class TestWindowSize:
+    def test_window_is_resized_only_when_size_changes(self):
+        selenium_driver = FakeSeleniumDriver()
+        web_driver = WebDriver(selenium_driver)
+        web_driver.set_window_size(800, 600)
+        web_driver.set_window_size(1024, 768)
+        web_driver.set_window_size(1024, 768)
+        assert selenium_driver.window_sizes == [(1024, 768)]
@@ -0,0 +1,199 @@
+import io
+import pytest
+
+import numpy as np
+
+from PIL import Image
+
+from context import profilescout
+from profilescout.common.exceptions import StaleElementReferenceException, WebDriverException
+from profilescout.link.utils import PageLink
+from profilescout.web.webpage import Webpage, WebpageActionType, ScrapeOption, ALL_LINKS_XPATH, STRUCTURED_LINKS_XPATH
+from profilescout.web.webpage import default_blocked_resources
+from profilescout.common.interfaces import ImageProfileClassifier
+
+
+BASE_URL = 'https://example.com'
+
+
+class FakeElement:
+    def __init__(self, href, text, stale=False):
+        self.href = href
+        self.text = text
+        self.stale = stale
+
+    def get_attribute(self, name):
+        if self.stale:
+            raise StaleElementReferenceException('stale element reference')
+        return self.href
+
+
+class FakeDriver:
+    def __init__(self, harvested=None, elements=None, script_error=False):
+        self.harvested = harvested
+        self.elements = elements or dict()
+        self.script_error = script_error
+        self.xpaths = []
+
+    def execute_script(self, script):
+        if self.script_error:
+            raise WebDriverException('javascript error')
+        return self.harvested
+
+    def find_elements_with_xpath(self, xpath):
+        self.xpaths.append(xpath)
+        return self.elements.get(xpath, [])
+
+
+def create_webpage(web_driver):
+    return Webpage(web_driver, PageLink(f'{BASE_URL}/', 0), io.StringIO(), io.StringIO())
+
+
+class TestExtractLinks:
+    @pytest.fixture
+    def harvested(self):
+        return [
+            [f'{BASE_URL}/staff/john?nocache', 'John', True],
+            [f'{BASE_URL}/contact#form', 'Contact', False],
+            [f'{BASE_URL}/staff/john', 'John again', True],
+            ['https://other.com/', 'Other', True],
+            [None, '', False]]
+
+    def test_links_are_harvested_with_single_script(self, harvested):
+        web_driver = FakeDriver(harvested=harvested)
+        page_links = create_webpage(web_driver).extract_links(BASE_URL)
+        assert [(pl.url, pl.txt, pl.depth) for pl in page_links] == [
+            (f'{BASE_URL}/staff/john', 'John', 1),
+            (f'{BASE_URL}/contact', 'Contact', 1)]
+        assert web_driver.xpaths == []
+
+    def test_structured_links_are_harvested(self, harvested):
+        web_driver = FakeDriver(harvested=harvested)
+        page_links = create_webpage(web_driver).extract_links(BASE_URL, from_structure=True)
+        assert [pl.url for pl in page_links] == [f'{BASE_URL}/staff/john']
+
+    @pytest.mark.parametrize('from_structure, xpath', [(False, ALL_LINKS_XPATH), (True, STRUCTURED_LINKS_XPATH)])
+    def test_fallback_to_xpath(self, from_structure, xpath):
+        elements = {xpath: [FakeElement(f'{BASE_URL}/stale', '', stale=True), FakeElement(f'{BASE_URL}/a', 'A')]}
+        for web_driver in [FakeDriver(elements=elements), FakeDriver(elements=elements, script_error=True)]:
+            page_links = create_webpage(web_driver).extract_links(BASE_URL, from_structure=from_structure)
+            assert [pl.url for pl in page_links] == [f'{BASE_URL}/a']
+            assert web_driver.xpaths == [xpath]
+
+
+class TestDefaultBlockedResources:
+    def test_images_are_blocked_without_screenshots(self):
+        blocked = default_blocked_resources(WebpageActionType.SCRAPE_PAGES, ScrapeOption.HTML)
+        assert set(blocked) == {'media', 'third-party', 'image', 'font', 'stylesheet'}
+
+    @pytest.mark.parametrize('action_type, scrape_option', [
+        (WebpageActionType.SCRAPE_PAGES, ScrapeOption.ALL),
+        (WebpageActionType.SCRAPE_PAGES, ScrapeOption.SCREENSHOT),
+        (WebpageActionType.FIND_ORIGIN, ScrapeOption.HTML)])
+    def test_images_are_loaded_for_screenshots(self, action_type, scrape_option):
+        assert set(default_blocked_resources(action_type, scrape_option)) == {'media', 'third-party'}
+
+
+class ScreenshotDriver:
+    def __init__(self):
+        self.window_sizes = []
+        self.capture_count = 0
+
+    def get(self, url):
+        pass
+
+    def execute_script(self, script):
+        return None
+
+    def get_content_type(self):
+        return 'text/html'
+
+    def set_window_size(self, width, height):
+        self.window_sizes.append((width, height))
+
+    def get_screenshot_as_png(self):
+        self.capture_count += 1
+        with io.BytesIO() as png:
+            Image.new('RGB', (4, 3)).save(png, format='PNG')
+            return png.getvalue()
+
+    def get_screenshot_as_jpeg(self, scale=1, quality=95):
+        self.capture_count += 1
+        self.scale = scale
+        width, height = self.window_sizes[-1]
+        with io.BytesIO() as jpeg:
+            Image.new('RGB', (round(width * scale), round(height * scale)), (200, 100, 0)).save(jpeg, format='JPEG')
+            return jpeg.getvalue()
+
+
+class FakeClassifier(ImageProfileClassifier):
+    input_size = (36, 48)
+
+    def __init__(self):
+        self.images = []
+
+    def preprocess(self, image, **kwargs):
+        return image
+
+    def predict(self, image, width, height, channels=3, verbose=0, **kwargs):
+        self.images.append(image)
+        return True
+
+
+class TestScreenshot:
+    def test_screenshot_is_shared_by_classifier_and_exporter(self, tmp_path):
+        web_driver = ScreenshotDriver()
+        webpage = create_webpage(web_driver)
+        image = webpage.take_screenshot(4, 3).val
+        assert image.size == (4, 3)
+        assert webpage.take_screenshot(4, 3).val is image
+        (tmp_path / 'screenshots').mkdir()
+        result = webpage.scrape_page(str(tmp_path), ScrapeOption.SCREENSHOT, 4, 3)
+        assert result.successful
+        with open(result.val['screenshot'], 'rb') as f:
+            assert f.read() == webpage.get_screenshot_as_png(4, 3)
+        assert web_driver.capture_count == 1
+        assert web_driver.window_sizes == [(4, 3), (4, 3)]
+
+    def test_artifacts_are_passed_to_writer(self, tmp_path):
+        class FakeWriter:
+            written = dict()
+
+            def write(self, path, content, encode=None):
+                self.written[path] = content if encode is None else encode(content)
+
+        writer = FakeWriter()
+        webpage = create_webpage(ScreenshotDriver())
+        webpage._web_driver.get_page_source = lambda: '<html></html>'
+        (tmp_path / 'screenshots').mkdir()
+        (tmp_path / 'html').mkdir()
+        result = webpage.scrape_page(str(tmp_path), ScrapeOption.ALL, 4, 3, writer=writer)
+        assert result.successful
+        assert writer.written[result.val['screenshot']] == webpage.get_screenshot_as_png(4, 3)
+        assert writer.written[result.val['html']].endswith('<html></html>')
+        assert list(tmp_path.glob('*/*')) == []
+
+    def test_scaled_screenshot(self):
+        web_driver = ScreenshotDriver()
+        array = create_webpage(web_driver).take_scaled_screenshot(288, 162, 36, 48).val
+        assert web_driver.scale == pytest.approx(48 / 162)
+        assert array.dtype == np.uint8
+        assert array.shape == (48, 85)
+
+    @pytest.mark.parametrize('scaled_capture', [True, False])
+    def test_capture_for_classifier(self, scaled_capture):
+        classifier = FakeClassifier()
+        webpage = create_webpage(ScreenshotDriver())
+        webpage.scaled_capture = scaled_capture
+        assert webpage.is_profile(classifier, 288, 162).val
+        image = classifier.images[0]
+        assert isinstance(image, np.ndarray) == scaled_capture
+
+    def test_screenshot_is_taken_again(self):
+        web_driver = ScreenshotDriver()
+        webpage = create_webpage(web_driver)
+        webpage.take_screenshot(4, 3)
+        webpage.take_screenshot(8, 6)
+        webpage.visit()
+        webpage.take_screenshot(8, 6)
+        assert web_driver.capture_count == 3
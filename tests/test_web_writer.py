@@ -0,0 +1,83 @@
+import io
+import threading
+import pytest
+
+from context import profilescout
+from profilescout.web.writer import ArtifactWriter
+
+
+@pytest.fixture
+def err_file():
+    return io.StringIO()
+
+
+class TestArtifactWriter:
+    def test_artifacts_are_written_on_close(self, tmp_path, err_file):
+        writer = ArtifactWriter(threads=2, max_pending=2, err_file=err_file)
+        for i in range(10):
+            writer.write(str(tmp_path / f'{i}.html'), f'<html>{i}</html>')
+        writer.write(str(tmp_path / 'image.png'), b'\x89PNG')
+        writer.close()
+        assert (tmp_path / '9.html').read_text() == '<html>9</html>'
+        assert (tmp_path / 'image.png').read_bytes() == b'\x89PNG'
+        assert writer.failed_count == 0
+
+    def test_write_blocks_when_queue_is_full(self, tmp_path, err_file, monkeypatch):
+        writer = ArtifactWriter(threads=1, max_pending=1, err_file=err_file)
+        started, release = threading.Event(), threading.Event()
+        original_open = open
+
+        def slow_open(*args, **kwargs):
+            started.set()
+            release.wait()
+            return original_open(*args, **kwargs)
+
+        monkeypatch.setattr('builtins.open', slow_open)
+        writer.write(str(tmp_path / 'a'), 'a')
+        started.wait()
+        writer.write(str(tmp_path / 'b'), 'b')  # fills the queue
+        blocked = threading.Thread(target=writer.write, args=(str(tmp_path / 'c'), 'c'))
+        blocked.start()
+        blocked.join(timeout=0.2)
+        assert blocked.is_alive()
+        release.set()
+        blocked.join()
+        writer.flush()
+        writer.close()
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['a', 'b', 'c']
+
+    def test_content_is_encoded_by_writer_thread(self, tmp_path, err_file):
+        writer = ArtifactWriter(threads=1, err_file=err_file)
+        writer.write(str(tmp_path / 'page.txt'), 'page', encode=lambda content: content.upper())
+        writer.close()
+        assert (tmp_path / 'page.txt').read_text() == 'PAGE'
+
+    def test_failed_write(self, tmp_path, err_file):
+        writer = ArtifactWriter(threads=1, err_file=err_file)
+        writer.write(str(tmp_path / 'missing' / 'page.html'), '<html></html>')
+        writer.flush()
+        assert writer.failed_count == 1
+        assert 'ERROR: Failed to write' in err_file.getvalue()
+        writer.close()
+        writer.close()
+
+    def test_invalid_item_does_not_stop_writer(self, tmp_path, err_file):
+        writer = ArtifactWriter(threads=1, err_file=err_file)
+        writer._queue.put(('page.html',))
+        writer.write(str(tmp_path / 'page.html'), '<html></html>')
+        writer.close()
+        assert writer.failed_count == 1
+        assert 'invalid item of type tuple' in err_file.getvalue()
+        assert (tmp_path / 'page.html').exists()
+
+    def test_encoding_error_does_not_stop_writer(self, tmp_path, err_file):
+        def encode(content):
+            raise KeyError('WEBP')
+
+        writer = ArtifactWriter(threads=1, max_pending=1, err_file=err_file)
+        for i in range(3):
+            writer.write(str(tmp_path / f'{i}.webp'), b'png', encode=encode)
+        writer.write(str(tmp_path / 'page.html'), '<html></html>')
+        writer.close()
+        assert writer.failed_count == 3
+        assert (tmp_path / 'page.html').exists()